@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 
-from . import strategies, alerts, health, simulations
+from . import strategies, alerts, health, simulations, metrics, backtests, candles
 
 router = APIRouter()
 router.include_router(health.router, tags=["health"])
 router.include_router(strategies.router, prefix="/strategies", tags=["strategies"])
 router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 router.include_router(simulations.router, prefix="/simulations", tags=["simulations"])
+router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+router.include_router(backtests.router, prefix="/backtests", tags=["backtests"])
+router.include_router(candles.router, prefix="/candles", tags=["candles"])
@@ -1,14 +1,37 @@
-from fastapi import APIRouter, status
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 
 from app.schemas.alert import AlertCreate, AlertRead
 from app.services.alert_store import alert_store
 
 router = APIRouter()
 
+_ALERT_LIST = TypeAdapter(list[AlertRead])
+
 
 @router.get("/", response_model=list[AlertRead])
-async def list_alerts() -> list[AlertRead]:
-    return list(alert_store.list())
+async def list_alerts(
+    symbol: str | None = None,
+    strategy_id: int | None = None,
+    since: datetime | None = Query(None, description="Apenas alertas disparados a partir deste instante (UTC)."),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior."),
+    limit: int = Query(50, ge=1, le=500),
+) -> Response:
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        after = int(cursor) if cursor is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido") from exc
+
+    page, next_cursor = alert_store.query(symbol=symbol, strategy_id=strategy_id, since=since, cursor=after, limit=limit)
+    # Os alertas já são modelos validados: serializa direto, sem revalidar a resposta
+    response = Response(content=_ALERT_LIST.dump_json(page), media_type="application/json")
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
 
 
 @router.post("/", response_model=AlertRead, status_code=status.HTTP_201_CREATED)
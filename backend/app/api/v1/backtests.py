@@ -0,0 +1,64 @@
+import asyncio
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.schemas.backtest import BacktestRequest, BacktestResult, SweepRequest
+from app.services.backtest import load_history, run_backtest
+from app.services.sweep import ParameterSweep, rank
+
+router = APIRouter()
+
+
+def _dataset_path(dataset: str) -> Path:
+    root = Path(get_settings().backtest_data_dir).resolve()
+    path = (root / dataset).resolve()
+    # Apenas arquivos dentro do diretório configurado
+    if not path.is_relative_to(root) or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Histórico não encontrado")
+    return path
+
+
+def _run(payload: BacktestRequest, path: Path) -> BacktestResult:
+    return run_backtest(payload.strategy, load_history(path), payload.horizons)
+
+
+@router.post("/", response_model=BacktestResult)
+async def create_backtest(payload: BacktestRequest) -> BacktestResult:
+    path = _dataset_path(payload.dataset)
+    try:
+        # Leitura e cálculo vetorizado fora do event loop
+        return await asyncio.to_thread(_run, payload, path)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+
+@router.post("/sweep", summary="Otimiza parâmetros do template; resultados em NDJSON à medida que terminam")
+async def sweep_backtest(payload: SweepRequest) -> StreamingResponse:
+    path = _dataset_path(payload.dataset)
+    settings = get_settings()
+    try:
+        sweep = await asyncio.to_thread(
+            ParameterSweep,
+            payload.template,
+            payload.parameters,
+            horizon=payload.horizon,
+            processes=settings.sweep_processes or None,
+            max_points=settings.sweep_max_points,
+        )
+        history = await asyncio.to_thread(load_history, path)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+    async def lines():
+        points = []
+        async for point in sweep.stream(history):
+            points.append(point)
+            yield json.dumps({"type": "point", **point.model_dump()}) + "\n"
+        ranking = rank(points, payload.rank_by, payload.min_triggers)[: payload.top]
+        yield json.dumps({"type": "ranking", "points": [point.model_dump() for point in ranking]}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.indicators.buffer import COLUMNS
+from app.services.market_stream import market_stream_service
+
+router = APIRouter()
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/", summary="Histórico de candles em disco, em colunas e em ordem cronológica")
+async def list_candles(
+    # Viram nomes de diretório no histórico: nada de separadores de caminho nem ``..``
+    symbol: str = Query(..., pattern=r"^[A-Za-z0-9][A-Za-z0-9._/-]{0,31}$"),
+    timeframe: str = Query(..., pattern=r"^M[0-9]+$"),
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    limit: int = Query(1000, ge=1, le=100_000),
+) -> dict[str, object]:
+    """Sem ``from`` devolve os ``limit`` candles mais recentes até ``to``; com ``from``, os primeiros a partir dele."""
+    store = market_stream_service.history
+    if store is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Histórico em disco desativado")
+    window = store.range(symbol, timeframe, _naive_utc(start), _naive_utc(end), limit)
+    timestamps = np.datetime_as_string(window.timestamps.view("datetime64[ns]"), unit="auto")
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "count": len(window),
+        "timestamps": timestamps.tolist(),
+        **{name: getattr(window, name).tolist() for name in COLUMNS},
+    }
@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+
+from app.services.event_bus import event_bus
+from app.services.market_stream import market_stream_service
+from app.services.pipeline import ingestion_pipeline
+from app.services.telegram import telegram_notifier
+from app.services.tick_builder import tick_ingestion
+
+router = APIRouter()
+
+
+@router.get("/pipeline", summary="Profundidade, atraso e descartes das filas de ingestão")
+async def pipeline_metrics() -> dict[str, object]:
+    return ingestion_pipeline.metrics()
+
+
+@router.get("/event-bus", summary="Fila, atraso, descartes e conflações por assinante do barramento")
+async def event_bus_metrics() -> dict[str, object]:
+    return event_bus.metrics()
+
+
+@router.get("/telegram", summary="Fila, envios, repetições e resumos da entrega ao Telegram")
+async def telegram_metrics() -> dict[str, object]:
+    return telegram_notifier.snapshot()
+
+
+@router.get("/aggregator", summary="Barras consolidadas, incompletas e candles ignorados pelo agregador de timeframes")
+async def aggregator_metrics() -> dict[str, object]:
+    aggregator = market_stream_service.aggregator
+    return {"enabled": False} if aggregator is None else {"enabled": True, **aggregator.snapshot()}
+
+
+@router.get("/ticks", summary="Ticks recebidos, barras fechadas, atrasados e prévias do montador de candles")
+async def tick_metrics() -> dict[str, object]:
+    return tick_ingestion.snapshot()
+
+
+@router.get("/alerts", summary="Disparos que viraram alerta e os suprimidos por cooldown ou modo borda")
+async def alert_metrics() -> dict[str, object]:
+    return market_stream_service.gate.snapshot()
+
+
+@router.get("/candles", summary="Duplicatas, correções, lacunas e candles ausentes na ingestão de candles")
+async def candle_metrics() -> dict[str, object]:
+    return await market_stream_service.ingest_metrics()
@@ -1,23 +1,135 @@
+import json
+from collections import defaultdict
 from datetime import datetime
+from typing import AsyncIterator
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import ValidationError
 
 from app.indicators.engine import Candle
-from app.schemas.market import CandleIn
+from app.schemas.market import BarIn, CandleHistoryIn, CandleIn
 from app.services.market_stream import market_stream_service
+from app.services.pipeline import ingestion_pipeline
+from app.services.tick_builder import TICK_LIST, tick_ingestion
 
 router = APIRouter()
 
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def _to_candle(bar: BarIn) -> Candle:
+    return Candle(
+        timestamp=bar.timestamp,
+        open=bar.open,
+        high=bar.high,
+        low=bar.low,
+        close=bar.close,
+        volume=bar.volume,
+    )
+
 
 @router.post("/candles", status_code=status.HTTP_202_ACCEPTED)
 async def push_candle(payload: CandleIn) -> dict[str, str]:
-    candle = Candle(
-        timestamp=payload.timestamp,
-        open=payload.open,
-        high=payload.high,
-        low=payload.low,
-        close=payload.close,
-        volume=payload.volume,
-    )
-    await market_stream_service.on_candle(payload.symbol, payload.timeframe, candle)
+    candle = _to_candle(payload)
+    if ingestion_pipeline.running:
+        await ingestion_pipeline.submit(payload.symbol, payload.timeframe, candle)
+    else:
+        # Sem o lifespan (ex.: scripts e testes) o candle é processado em linha
+        await market_stream_service.on_candle(payload.symbol, payload.timeframe, candle)
     return {"status": "accepted"}
+
+
+@router.post("/history", status_code=status.HTTP_202_ACCEPTED)
+async def load_history(payload: CandleHistoryIn) -> dict[str, object]:
+    # Aquece os indicadores da chave sem avaliar estratégias nem publicar eventos
+    candles = [_to_candle(bar) for bar in payload.candles]
+    indicators = await market_stream_service.warm_up(payload.symbol, payload.timeframe, candles)
+    return {"status": "accepted", "candles": len(candles), "indicators": indicators}
+
+
+@router.post("/ticks", status_code=status.HTTP_202_ACCEPTED)
+async def push_ticks(request: Request) -> dict[str, object]:
+    """Recebe um array JSON de ticks (negócios ou cotações) em ordem de chegada.
+
+    O lote é validado de uma vez e rejeitado inteiro se algum tick for inválido.
+    Os ticks alimentam as barras em formação; as barras fechadas seguem para o
+    stream de mercado como candles de ``tick_timeframe``.
+    """
+    try:
+        ticks = TICK_LIST.validate_json(await request.body())
+    except ValidationError as exc:
+        errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors) from exc
+    closed = await tick_ingestion.ingest(ticks)
+    return {"status": "accepted", "ticks": len(ticks), "closed": closed}
+
+
+@router.post("/candles/batch", status_code=status.HTTP_202_ACCEPTED)
+async def push_candles(request: Request) -> dict[str, object]:
+    """Recebe um array JSON ou um corpo NDJSON (um candle por linha).
+
+    Cada item é validado isoladamente; os válidos são agrupados por
+    symbol:timeframe, mantendo a ordem de chegada, e processados em lote.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        raw_items: AsyncIterator[object] = _ndjson_lines(request)
+        parse = CandleIn.model_validate_json
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo JSON inválido.") from exc
+        if not isinstance(body, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="O corpo deve ser um array de candles."
+            )
+        raw_items = _iterate(body)
+        parse = CandleIn.model_validate
+
+    groups: dict[tuple[str, str], list[Candle]] = defaultdict(list)
+    items: list[dict[str, object]] = []
+    index = 0
+    async for raw in raw_items:
+        try:
+            payload = parse(raw)
+        except ValidationError as exc:
+            errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+            items.append({"index": index, "status": "rejected", "errors": errors})
+        else:
+            groups[(payload.symbol, payload.timeframe)].append(_to_candle(payload))
+            items.append({"index": index, "status": "accepted"})
+        index += 1
+
+    for (symbol, timeframe), candles in groups.items():
+        if ingestion_pipeline.running:
+            await ingestion_pipeline.submit_many(symbol, timeframe, candles)
+        else:
+            await market_stream_service.on_candles(symbol, timeframe, candles)
+
+    accepted = sum(len(candles) for candles in groups.values())
+    return {
+        "status": "accepted" if accepted == len(items) else "partial" if accepted else "rejected",
+        "accepted": accepted,
+        "rejected": len(items) - accepted,
+        "groups": len(groups),
+        "items": items,
+    }
+
+
+async def _iterate(values: list[object]) -> AsyncIterator[object]:
+    for value in values:
+        yield value
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    # Lê o corpo em streaming, sem esperar pelo payload completo
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
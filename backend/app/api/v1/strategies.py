@@ -1,12 +1,28 @@
+from typing import Sequence
+
 from fastapi import APIRouter, HTTPException, status
 
-from app.schemas.strategy import StrategyCreate, StrategyRead, StrategyUpdate
+from app.indicators.registry import registry
+from app.schemas.strategy import StrategyCondition, StrategyCreate, StrategyRead, StrategyUpdate
 from app.services.strategy_store import strategy_store
 from app.services.market_stream import market_stream_service
 
 router = APIRouter()
 
 
+def _validate_indicators(conditions: Sequence[StrategyCondition] | None) -> None:
+    paths = [
+        operand.path
+        for condition in conditions or ()
+        for operand in (condition.left, condition.right)
+        if operand.source == "indicator" and operand.path
+    ]
+    try:
+        registry.validate(paths)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+
 @router.get("/", response_model=list[StrategyRead])
 async def list_strategies() -> list[StrategyRead]:
     return list(strategy_store.list())
@@ -14,7 +30,8 @@ async def list_strategies() -> list[StrategyRead]:
 
 @router.post("/", response_model=StrategyRead, status_code=status.HTTP_201_CREATED)
 async def create_strategy(payload: StrategyCreate) -> StrategyRead:
-    strategy = strategy_store.create(payload)
+    _validate_indicators(payload.conditions)
+    strategy = await strategy_store.create(payload)
     await market_stream_service.register_strategy(strategy)
     return strategy
 
@@ -32,8 +49,12 @@ async def update_strategy(strategy_id: int, payload: StrategyUpdate) -> Strategy
     existing = strategy_store.get(strategy_id)
     if not existing:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estratégia não encontrada")
-    await market_stream_service.unregister_strategy(existing)
-    updated = strategy_store.update(strategy_id, payload)
+    _validate_indicators(payload.conditions)
+    # Atualiza antes de desregistrar: uma falha não deixa a estratégia desligada
+    updated = await strategy_store.update(strategy_id, payload)
+    # Só zera o portão se as regras dele mudaram: renomear não reabre o cooldown
+    same_gate = (existing.cooldown_seconds, existing.edge_trigger) == (updated.cooldown_seconds, updated.edge_trigger)
+    await market_stream_service.unregister_strategy(existing, keep_gate=same_gate)
     await market_stream_service.register_strategy(updated)
     return updated
 
@@ -44,4 +65,4 @@ async def delete_strategy(strategy_id: int) -> None:
     if not strategy:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estratégia não encontrada")
     await market_stream_service.unregister_strategy(strategy)
-    strategy_store.delete(strategy_id)
+    await strategy_store.delete(strategy_id)
@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pydantic import Field, AnyUrl
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -11,9 +11,63 @@ class Settings(BaseSettings):
     allowed_origins: List[str] = Field(default_factory=lambda: ["*"])
 
     database_url: AnyUrl | None = None
+    strategy_db_path: str = Field(
+        "data/traderup.sqlite3", description="Banco SQLite das estratégias, usado quando ``database_url`` não é definido."
+    )
 
     telegram_token: str | None = None
     telegram_chat_ids: List[str] = Field(default_factory=list)
+    telegram_api_url: str = "https://api.telegram.org"
+    telegram_global_rate: float = Field(30.0, gt=0, description="Mensagens por segundo somando todos os chats.")
+    telegram_chat_rate: float = Field(1.0, gt=0, description="Mensagens por segundo em um mesmo chat.")
+    telegram_pool_size: int = Field(4, ge=1, description="Conexões keep-alive com a API do Telegram.")
+    telegram_max_attempts: int = Field(5, ge=1)
+    telegram_retry_base: float = Field(0.5, ge=0, description="Base (s) do backoff exponencial.")
+    telegram_digest_max: int = Field(50, ge=1, description="Máximo de alertas agrupados em um resumo.")
+
+    alert_retention: int = Field(500, ge=1, description="Alertas mantidos em memória; os mais antigos são descartados.")
+    alert_log_path: str | None = Field(
+        "data/alerts.sqlite3", description="Banco SQLite (WAL) com o histórico de alertas; vazio desativa."
+    )
+    alert_log_retention: int = Field(1_000_000, ge=1, description="Alertas mantidos no log após a compactação.")
+
+    pipeline_shards: int = Field(4, ge=1, description="Workers/filas de ingestão, particionados por símbolo.")
+    pipeline_queue_size: int = Field(1000, ge=1, description="Capacidade de cada fila de shard.")
+    pipeline_overflow_policy: Literal["block", "drop_oldest", "coalesce"] = "block"
+    event_bus_queue_size: int = Field(1000, ge=1, description="Capacidade da fila de cada assinante do barramento.")
+    websocket_send_timeout: float = Field(1.0, gt=0, description="Tempo máximo (s) para enviar um frame a um WebSocket.")
+    websocket_tick_interval: float = Field(
+        0.1, ge=0, description="Intervalo (s) dos frames de ticks conflacionados por cliente (0 = um frame por tick)."
+    )
+    websocket_max_tick_interval: float = Field(2.0, gt=0, description="Intervalo máximo para clientes lentos.")
+    aggregate_timeframes: List[str] = Field(
+        default_factory=list,
+        description=(
+            "Timeframes consolidados no servidor a partir dos candles M1 recebidos (ex.: M5, M15); vazio desativa."
+            " Não inclua timeframes que o feed já envia."
+        ),
+    )
+    tick_timeframe: str = Field("M1", pattern="M[0-9]+", description="Timeframe dos candles montados a partir de ticks.")
+    tick_close_grace: float = Field(
+        2.0, ge=0, description="Atraso (s, no relógio dos ticks) para fechar a barra de um símbolo sem ticks novos."
+    )
+    tick_preview_interval: float = Field(
+        1.0, ge=0, description="Intervalo mínimo (s) entre prévias da barra em formação por símbolo (0 desativa)."
+    )
+    candle_store_path: str | None = Field(
+        "data/candles", description="Diretório do histórico de candles em disco (colunar, mapeado em memória); vazio desativa."
+    )
+    candle_warm_up: int = Field(5000, ge=0, description="Candles do histórico em disco usados para aquecer cada chave ao iniciar.")
+    rule_state_path: str | None = Field(
+        "data/rule_state.json",
+        description="Arquivo JSON com o estado das regras entre candles (autômatos SEQUENCE), salvo ao encerrar; vazio desativa.",
+    )
+    backtest_data_dir: str = Field("data/history", description="Diretório dos arquivos CSV/Parquet aceitos pela API de backtest.")
+    sweep_processes: int = Field(0, ge=0, description="Processos do otimizador de parâmetros (0 = número de CPUs).")
+    sweep_max_points: int = Field(10_000, ge=1, description="Máximo de pontos da grade em uma otimização.")
+    market_stream_processes: int = Field(
+        0, ge=0, description="Processos worker de indicadores/regras, particionados por símbolo (0 = no processo da API)."
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+COLUMNS = ("open", "high", "low", "close", "volume")
+_TIMEFRAME = re.compile(r"M([0-9]+)")
+_MINUTE_NS = 60_000_000_000
+
+
+def to_epoch_ns(timestamp: datetime) -> int:
+    """Converte para nanossegundos desde a época; datetimes sem fuso são tratados como UTC."""
+    if timestamp.tzinfo is None:
+        return (timestamp - _NAIVE_EPOCH) // _MICROSECOND * 1000
+    return (timestamp - EPOCH) // _MICROSECOND * 1000
+
+
+def from_epoch_ns(value: int) -> datetime:
+    return (EPOCH + timedelta(microseconds=int(value) // 1000)).replace(tzinfo=None)
+
+
+def timeframe_ns(timeframe: str) -> int:
+    """Duração do timeframe (``M1``, ``M5``, ``M15``...) em nanossegundos."""
+    match = _TIMEFRAME.fullmatch(timeframe)
+    if match is None or int(match.group(1)) <= 0:
+        raise ValueError(f"Timeframe inválido: {timeframe}")
+    return int(match.group(1)) * _MINUTE_NS
+
+
+@dataclass(frozen=True)
+class CandleWindow:
+    """Visões somente leitura sobre as últimas linhas de um ``CandleBuffer``.
+
+    As visões compartilham memória com o buffer e só são válidas até o próximo
+    ``append``; use ``copy()`` para guardá-las.
+    """
+
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def copy(self) -> "CandleWindow":
+        return CandleWindow(*(np.array(getattr(self, name)) for name in ("timestamps", *COLUMNS)))
+
+
+class CandleBuffer:
+    """Buffer circular colunar com arrays pré-alocados de OHLCV e timestamps int64.
+
+    Reserva ``slack`` linhas extras: quando o fim do array é alcançado as últimas
+    ``capacity`` linhas são movidas para o início (custo amortizado O(1)), o que
+    mantém qualquer janela contígua e permite visões sem cópia.
+    """
+
+    __slots__ = ("capacity", "_timestamps", "_values", "_start", "_end")
+
+    def __init__(self, capacity: int, slack: int | None = None) -> None:
+        if capacity <= 0:
+            raise ValueError("Capacidade do buffer deve ser positiva.")
+        self.capacity = capacity
+        size = capacity + (slack if slack is not None else max(capacity // 4, 1))
+        self._timestamps = np.zeros(size, dtype=np.int64)
+        self._values = np.zeros((len(COLUMNS), size), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def append(
+        self, timestamp_ns: int, open_: float, high: float, low: float, close: float, volume: float
+    ) -> None:
+        if self._end == len(self._timestamps):
+            self._compact(self.capacity - 1)
+        end = self._end
+        self._timestamps[end] = timestamp_ns
+        values = self._values
+        values[0, end] = open_
+        values[1, end] = high
+        values[2, end] = low
+        values[3, end] = close
+        values[4, end] = volume
+        self._end = end + 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, timestamps_ns: np.ndarray, values: np.ndarray) -> None:
+        """Acrescenta linhas em bloco; ``values`` tem formato ``(5, n)`` na ordem de ``COLUMNS``."""
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)[-self.capacity :]
+        values = np.asarray(values, dtype=np.float64)[:, -self.capacity :]
+        count = len(timestamps_ns)
+        if self._end + count > len(self._timestamps):
+            self._compact(min(self.capacity - count, len(self)))
+        end = self._end + count
+        self._timestamps[self._end : end] = timestamps_ns
+        self._values[:, self._end : end] = values
+        self._end = end
+        self._start = max(self._start, end - self.capacity)
+
+    def clear(self) -> None:
+        self._start = self._end = 0
+
+    def last_timestamp(self) -> int | None:
+        return int(self._timestamps[self._end - 1]) if self._end > self._start else None
+
+    def locate(self, timestamp_ns: int) -> tuple[int, bool]:
+        """Posição (relativa à janela) onde ``timestamp_ns`` está ou entraria, e se já existe."""
+        timestamps = self._timestamps[self._start : self._end]
+        index = int(np.searchsorted(timestamps, timestamp_ns))
+        return index, index < len(timestamps) and int(timestamps[index]) == timestamp_ns
+
+    def row(self, index: int) -> tuple[float, ...]:
+        return tuple(self._values[:, self._start + index].tolist())
+
+    def replace(self, index: int, row: tuple[float, ...]) -> None:
+        self._values[:, self._start + index] = row
+
+    def insert(self, index: int, timestamp_ns: int, row: tuple[float, ...]) -> None:
+        """Insere uma linha no meio da janela deslocando as posteriores; custo O(linhas após ``index``)."""
+        if self._end == len(self._timestamps):
+            dropped = max(len(self) - (self.capacity - 1), 0)
+            self._compact(self.capacity - 1)
+            index = max(index - dropped, 0)
+        position = self._start + index
+        self._timestamps[position + 1 : self._end + 1] = self._timestamps[position : self._end]
+        self._values[:, position + 1 : self._end + 1] = self._values[:, position : self._end]
+        self._timestamps[position] = timestamp_ns
+        self._values[:, position] = row
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def window(self, size: int | None = None) -> CandleWindow:
+        start = self._start if size is None else max(self._start, self._end - size)
+        timestamps = self._timestamps[start : self._end]
+        columns = self._values[:, start : self._end]
+        views = [timestamps, *columns]
+        for view in views:
+            view.flags.writeable = False
+        return CandleWindow(*views)
+
+    def closes(self) -> np.ndarray:
+        view = self._values[3, self._start : self._end]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._values.nbytes
+
+    def _compact(self, keep: int) -> None:
+        keep = max(keep, 0)
+        start = self._end - keep
+        self._timestamps[:keep] = self._timestamps[start : self._end]
+        self._values[:, :keep] = self._values[:, start : self._end]
+        self._start = 0
+        self._end = keep
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from dataclasses import dataclass
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
 from math import sqrt
 from typing import Deque, Dict, Iterable, List
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+from app.indicators.buffer import CandleBuffer, CandleWindow, timeframe_ns, to_epoch_ns
+from app.indicators.registry import DEFAULT_PATHS, MIN_CANDLES, SOURCES, Checkpoint, IndicatorPlan, registry
+
 
 @dataclass
 class Candle:
@@ -17,6 +23,18 @@ class Candle:
     volume: float
 
 
+_LEGACY_FIELDS = {
+    "ema_fast": "ema.close.9",
+    "ema_slow": "ema.close.21",
+    "rsi": "rsi.close.14",
+    "macd": "macd.line",
+    "macd_signal": "macd.signal",
+    "bb_upper": "bb.upper.20",
+    "bb_middle": "bb.middle.20",
+    "bb_lower": "bb.lower.20",
+}
+
+
 @dataclass
 class IndicatorSnapshot:
     ema_fast: float | None = None
@@ -27,42 +45,413 @@ class IndicatorSnapshot:
     bb_upper: float | None = None
     bb_middle: float | None = None
     bb_lower: float | None = None
+    extra: dict[str, float] = field(default_factory=dict)
 
     def to_mapping(self) -> dict[str, float]:
         data: dict[str, float] = {}
-        if self.ema_fast is not None:
-            data["ema.close.9"] = self.ema_fast
-        if self.ema_slow is not None:
-            data["ema.close.21"] = self.ema_slow
-        if self.rsi is not None:
-            data["rsi.close.14"] = self.rsi
-        if self.macd is not None:
-            data["macd.line"] = self.macd
-        if self.macd_signal is not None:
-            data["macd.signal"] = self.macd_signal
-        if self.bb_upper is not None:
-            data["bb.upper.20"] = self.bb_upper
-        if self.bb_middle is not None:
-            data["bb.middle.20"] = self.bb_middle
-        if self.bb_lower is not None:
-            data["bb.lower.20"] = self.bb_lower
+        for name, path in _LEGACY_FIELDS.items():
+            value = getattr(self, name)
+            if value is not None:
+                data[path] = value
+        data.update(self.extra)
         return data
 
+    @classmethod
+    def from_mapping(cls, values: dict[str, float]) -> "IndicatorSnapshot":
+        extra = dict(values)
+        legacy = {name: extra.pop(path, None) for name, path in _LEGACY_FIELDS.items()}
+        return cls(**legacy, extra=extra)
+
+
+@dataclass(slots=True)
+class KeyState:
+    """Plano de indicadores e valores correntes de uma chave symbol:timeframe."""
+
+    plan: IndicatorPlan
+    values: list[float | None]
+    count: int = 0
+    # Estados anteriores, do mais antigo ao mais recente, para corrigir candles passados
+    checkpoints: Deque[Checkpoint] = field(default_factory=deque)
+
+
+@dataclass
+class IngestMetrics:
+    duplicates: int = 0
+    # Último candle da chave substituído por outro com o mesmo horário
+    replaced: int = 0
+    # Candles anteriores substituídos ou inseridos dentro da janela de correção
+    corrected: int = 0
+    inserted: int = 0
+    # Correções mais antigas que a janela, descartadas
+    rejected: int = 0
+    replayed: int = 0
+    gaps: int = 0
+    # Candles ausentes somando todas as lacunas
+    missing: int = 0
+
 
 class IndicatorEngine:
-    """Calcula indicadores mantendo apenas estruturas em memória."""
+    """Calcula indicadores mantendo apenas estruturas em memória.
+
+    No modo ``streaming`` (padrão) cada chave calcula apenas os caminhos exigidos
+    via ``require`` (ou ``default_paths`` enquanto nada foi exigido), com estado
+    incremental O(1) por candle e nós compartilhados entre caminhos. Com
+    ``streaming=False`` o conjunto padrão é recalculado sobre toda a janela,
+    caminho mantido como referência de paridade.
 
-    def __init__(self, window: int = 500) -> None:
+    Candles chegam em ordem de timestamp: duplicatas exatas são descartadas e
+    correções dos últimos ``correction_window`` candles voltam ao checkpoint
+    mais próximo (um a cada ``checkpoint_interval`` candles) e reprocessam só o
+    sufixo afetado. Lacunas entre candles consecutivos entram nas métricas.
+    """
+
+    MIN_CANDLES = MIN_CANDLES
+
+    def __init__(
+        self,
+        window: int = 500,
+        streaming: bool = True,
+        default_paths: Iterable[str] = DEFAULT_PATHS,
+        correction_window: int = 64,
+        checkpoint_interval: int = 16,
+    ) -> None:
         self.window = window
-        self._candles: Dict[str, Deque[Candle]] = defaultdict(lambda: deque(maxlen=window))
+        self.checkpoint_interval = max(checkpoint_interval, 1)
+        # O reprocessamento lê o sufixo do buffer: a janela de correção precisa caber nele
+        self.correction_window = max(min(correction_window, window - 2 * self.checkpoint_interval), 0)
+        self.streaming = streaming
+        self.default_paths = tuple(default_paths)
+        self._candles: Dict[str, CandleBuffer] = defaultdict(lambda: CandleBuffer(window))
         self._macd_history: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=60))
+        self._states: Dict[str, KeyState] = {}
+        self._requirements: Dict[str, Counter[str]] = {}
+        self._steps: Dict[str, int] = {}
+        self._missing: Counter[str] = Counter()
+        self.metrics = IngestMetrics()
+
+    def require(self, symbol: str, timeframe: str, paths: Iterable[str]) -> None:
+        """Passa a calcular ``paths`` na chave; novos nós são semeados com a janela atual."""
+        key = f"{symbol}:{timeframe}"
+        registry.validate(paths)
+        counter = self._requirements.setdefault(key, Counter())
+        before = set(counter)
+        counter.update(paths)
+        if set(counter) != before:
+            self._replan(key)
+
+    def release(self, symbol: str, timeframe: str, paths: Iterable[str]) -> None:
+        key = f"{symbol}:{timeframe}"
+        counter = self._requirements.get(key)
+        if counter is None:
+            return
+        before = set(counter)
+        counter.subtract(paths)
+        for path in [path for path, refs in counter.items() if refs <= 0]:
+            del counter[path]
+        if not counter:
+            del self._requirements[key]
+        if set(counter) != before:
+            self._replan(key)
 
     def update(self, symbol: str, timeframe: str, candle: Candle) -> IndicatorSnapshot:
+        if self.streaming:
+            return IndicatorSnapshot.from_mapping(self.update_mapping(symbol, timeframe, candle))
+        key = f"{symbol}:{timeframe}"
+        self._admit(key, to_epoch_ns(candle.timestamp), candle)
+        return self._update_batch(key)
+
+    def update_mapping(self, symbol: str, timeframe: str, candle: Candle) -> dict[str, float]:
+        """Como ``update``, mas devolve direto o mapeamento caminho → valor.
+
+        Duplicatas e correções não avançam a chave: o retorno é o estado corrente.
+        """
+        key = f"{symbol}:{timeframe}"
+        admitted = self._admit(key, to_epoch_ns(candle.timestamp), candle)
+        if not self.streaming:
+            return self._update_batch(key).to_mapping()
+        if not admitted:
+            state = self._states.get(key)
+            return {} if state is None else state.plan.mapping(state.values, state.count)
+        return self._advance(key, candle)
+
+    def update_many(self, symbol: str, timeframe: str, candles: List[Candle]) -> list[dict[str, float] | None]:
+        """Aplica candles em ordem e devolve o mapeamento após cada um.
+
+        O buffer recebe o lote com um único ``extend``; o estado incremental avança
+        candle a candle, então o resultado é idêntico a chamadas a ``update_mapping``.
+        Candles que não são posteriores ao último da chave (duplicatas e
+        correções, ver ``_correct``) não avançam o estado e têm ``None`` no lugar
+        do mapeamento.
+        """
         key = f"{symbol}:{timeframe}"
-        self._candles[key].append(candle)
+        if not candles:
+            return []
+        timestamps = np.fromiter((to_epoch_ns(c.timestamp) for c in candles), dtype=np.int64, count=len(candles))
+        last = self._candles[key].last_timestamp()
+        ordered = (last is None or timestamps[0] > last) and bool(np.all(timestamps[1:] > timestamps[:-1]))
+        if not self.streaming or not ordered:
+            results: list[dict[str, float] | None] = []
+            for timestamp, candle in zip(timestamps.tolist(), candles):
+                if not self._admit(key, timestamp, candle):
+                    results.append(None)
+                elif self.streaming:
+                    results.append(self._advance(key, candle))
+                else:
+                    results.append(self._update_batch(key).to_mapping())
+            return results
+
+        if last is not None:
+            self._record_gaps(key, np.diff(timestamps, prepend=last))
+        elif len(candles) > 1:
+            self._record_gaps(key, np.diff(timestamps))
+        tail = candles[-self.window :]
+        columns = np.array([(c.open, c.high, c.low, c.close, c.volume) for c in tail], dtype=np.float64)
+        self._candles[key].extend(timestamps[-len(tail) :], columns.reshape(-1, 5).T)
+
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = self._new_state(key)
+        plan = state.plan
+        values = state.values
+        interval = self.checkpoint_interval
+        results = []
+        for candle in candles:
+            state.count += 1
+            values[0] = candle.open
+            values[1] = candle.high
+            values[2] = candle.low
+            values[3] = candle.close
+            values[4] = candle.volume
+            plan.update(values, state.count)
+            if state.count % interval == 0:
+                self._checkpoint(state)
+            results.append(plan.mapping(values, state.count))
+        return results
+
+    def ingest_metrics(self) -> dict[str, object]:
+        return {**self.metrics.__dict__, "missing_by_key": dict(self._missing.most_common(20))}
+
+    def _admit(self, key: str, timestamp: int, candle: Candle) -> bool:
+        """Acrescenta o candle se for posterior ao último da chave; senão trata como duplicata ou correção."""
+        buffer = self._candles[key]
+        last = buffer.last_timestamp()
+        if last is not None and timestamp <= last:
+            self._correct(key, timestamp, candle)
+            return False
+        if last is not None:
+            self._record_gaps(key, np.array([timestamp - last]))
+        buffer.append(timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume)
+        return True
+
+    def _advance(self, key: str, candle: Candle) -> dict[str, float]:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = self._new_state(key)
+        state.count += 1
+        values = state.values
+        values[0] = candle.open
+        values[1] = candle.high
+        values[2] = candle.low
+        values[3] = candle.close
+        values[4] = candle.volume
+        state.plan.update(values, state.count)
+        if state.count % self.checkpoint_interval == 0:
+            self._checkpoint(state)
+        return state.plan.mapping(values, state.count)
 
-        closes = [c.close for c in self._candles[key]]
-        if len(closes) < 30:
+    def _correct(self, key: str, timestamp: int, candle: Candle) -> None:
+        """Duplicata exata é descartada em O(1); um candle diferente para um horário já visto
+        o substitui e um horário ausente é inserido, desde que esteja entre os últimos
+        ``correction_window`` candles. O estado volta ao checkpoint anterior ao candle
+        afetado e só o sufixo é reprocessado.
+        """
+        buffer = self._candles[key]
+        row = (candle.open, candle.high, candle.low, candle.close, candle.volume)
+        size = len(buffer)
+        if timestamp == buffer.last_timestamp():
+            index, exists = size - 1, True
+        else:
+            index, exists = buffer.locate(timestamp)
+        if exists and buffer.row(index) == row:
+            self.metrics.duplicates += 1
+            return
+        if size - index > self.correction_window:
+            self.metrics.rejected += 1
+            return
+
+        state = self._states.get(key) if self.streaming else None
+        checkpoint = None
+        if state is not None:
+            # Número (1-based) do primeiro candle cujo estado muda
+            first = state.count - size + index + 1
+            checkpoint = next((cp for cp in reversed(state.checkpoints) if cp.count < first), None)
+            if checkpoint is None:
+                self.metrics.rejected += 1
+                return
+        if exists:
+            buffer.replace(index, row)
+            if index == size - 1:
+                self.metrics.replaced += 1
+            else:
+                self.metrics.corrected += 1
+        else:
+            buffer.insert(index, timestamp, row)
+            self.metrics.inserted += 1
+        if state is not None and checkpoint is not None:
+            self._replay(state, buffer, checkpoint, state.count + (0 if exists else 1))
+
+    def _replay(self, state: KeyState, buffer: CandleBuffer, checkpoint: Checkpoint, total: int) -> None:
+        checkpoints = state.checkpoints
+        while checkpoints and checkpoints[-1].count > checkpoint.count:
+            checkpoints.pop()
+        values = state.values = state.plan.restore(checkpoint)
+        state.count = checkpoint.count
+        window = buffer.window(total - checkpoint.count)
+        rows = zip(*(column.tolist() for column in self._columns(window)))
+        update = state.plan.update
+        interval = self.checkpoint_interval
+        for row in rows:
+            state.count += 1
+            values[0:5] = row
+            update(values, state.count)
+            # O checkpoint antes do último candle torna O(1) novas substituições dele
+            if state.count % interval == 0 or state.count == total - 1:
+                self._checkpoint(state)
+        self.metrics.replayed += total - checkpoint.count
+
+    def _checkpoint(self, state: KeyState) -> None:
+        checkpoints = state.checkpoints
+        checkpoints.append(state.plan.checkpoint(state.values, state.count))
+        # Mantém o mais recente que ainda cobre toda a janela de correção
+        horizon = state.count - self.correction_window
+        while len(checkpoints) > 1 and checkpoints[1].count <= horizon:
+            checkpoints.popleft()
+
+    def _record_gaps(self, key: str, deltas: np.ndarray) -> None:
+        step = self._steps.get(key)
+        if step is None:
+            try:
+                step = timeframe_ns(key.rpartition(":")[2])
+            except ValueError:
+                step = 0
+            self._steps[key] = step
+        if not step:
+            return
+        periods = deltas // step - 1
+        gaps = periods > 0
+        if gaps.any():
+            missing = int(periods[gaps].sum())
+            self.metrics.gaps += int(gaps.sum())
+            self.metrics.missing += missing
+            self._missing[key] += missing
+
+    def _new_state(self, key: str) -> KeyState:
+        plan = IndicatorPlan(self._paths(key))
+        values: list[float | None] = [None] * plan.size
+        return KeyState(plan=plan, values=values, checkpoints=deque([plan.checkpoint(values, 0)]))
+
+    def _paths(self, key: str) -> tuple[str, ...]:
+        counter = self._requirements.get(key)
+        return tuple(counter) if counter is not None else self.default_paths
+
+    def _replan(self, key: str) -> None:
+        state = self._states.get(key)
+        if state is None:
+            return
+        plan = IndicatorPlan(self._paths(key), state.plan.nodes)
+        state.values = plan.seed(self._columns(self._candles[key].window()), state.count, plan.new_nodes)
+        state.plan = plan
+        # Checkpoints antigos não têm o estado dos nós novos
+        state.checkpoints = deque([plan.checkpoint(state.values, state.count)])
+
+    def warm_up(self, symbol: str, timeframe: str, candles: Iterable[Candle]) -> IndicatorSnapshot:
+        """Reconstrói a chave a partir de um histórico em uma única passada vetorizada.
+
+        O estado anterior da chave é descartado; o snapshot retornado equivale ao que
+        ``update`` devolveria após o último candle do histórico.
+        """
+        history = list(candles)
+        timestamps = np.fromiter((to_epoch_ns(c.timestamp) for c in history), dtype=np.int64, count=len(history))
+        values = np.array(
+            [(c.open, c.high, c.low, c.close, c.volume) for c in history], dtype=np.float64
+        ).reshape(-1, 5).T
+        return self.warm_up_window(symbol, timeframe, CandleWindow(timestamps, *values))
+
+    def warm_up_window(self, symbol: str, timeframe: str, window: CandleWindow) -> IndicatorSnapshot:
+        """Como ``warm_up``, lendo colunas já prontas (ex.: visões mapeadas do ``CandleStore``) sem copiá-las.
+
+        Um histórico fora de ordem ou com timestamps repetidos é ordenado antes
+        (vale a última versão de cada candle): as correções localizam candles por
+        busca binária no buffer.
+        """
+        key = f"{symbol}:{timeframe}"
+        window = self._ordered(window)
+        size = len(window)
+        columns = self._columns(window)
+        start = max(size - self.window, 0)
+
+        buffer = self._candles[key]
+        buffer.clear()
+        buffer.extend(window.timestamps[start:], np.array([column[start:] for column in columns]))
+
+        plan = IndicatorPlan(self._paths(key))
+        values = plan.seed(columns, size)
+        state = KeyState(plan=plan, values=values, count=size, checkpoints=deque([plan.checkpoint(values, size)]))
+        self._states[key] = state
+
+        macd_line = IndicatorPlan(("macd.line",)).frame(columns)["macd.line"]
+        self._macd_history[key] = deque(macd_line[~np.isnan(macd_line)][-60:].tolist(), maxlen=60)
+        return IndicatorSnapshot.from_mapping(plan.mapping(state.values, state.count))
+
+    def preview(self, symbol: str, timeframe: str, candle: Candle) -> dict[str, float]:
+        """Indicadores como se ``candle`` (barra ainda em formação) fechasse agora, sem alterar o estado.
+
+        Recalcula sobre a janela em memória mais o candle: indicadores de memória
+        longa (EMA, MACD) ficam próximos, não idênticos, aos do caminho incremental.
+        """
+        key = f"{symbol}:{timeframe}"
+        buffer = self._candles.get(key)
+        window = buffer.window() if buffer is not None else CandleBuffer(1).window()
+        row = (candle.open, candle.high, candle.low, candle.close, candle.volume)
+        columns = [np.append(column, value) for column, value in zip(self._columns(window), row)]
+        state = self._states.get(key)
+        count = (state.count if state is not None else len(window)) + 1
+        frame = IndicatorPlan(self._paths(key)).frame(columns, count)
+        return {path: float(series[-1]) for path, series in frame.items() if not np.isnan(series[-1])}
+
+    def candle_window(self, symbol: str, timeframe: str, size: int | None = None) -> CandleWindow:
+        """Visões somente leitura (sem cópia) dos últimos ``size`` candles da chave."""
+        key = f"{symbol}:{timeframe}"
+        buffer = self._candles.get(key)
+        if buffer is None:
+            return CandleBuffer(1).window()
+        return buffer.window(size)
+
+    def compute_series(self, candles: Iterable[Candle], paths: Iterable[str] | None = None) -> pd.DataFrame:
+        """Retorna as colunas de indicadores (uma linha por candle) sem alterar o estado."""
+        frame = self._to_dataframe(candles)
+        plan = IndicatorPlan(paths if paths is not None else self.default_paths or DEFAULT_PATHS)
+        series = plan.frame([frame[column].to_numpy() for column in SOURCES])
+        return pd.DataFrame(series, index=frame.index)
+
+    @staticmethod
+    def _ordered(window: CandleWindow) -> CandleWindow:
+        timestamps = window.timestamps
+        if len(timestamps) < 2 or bool(np.all(timestamps[1:] > timestamps[:-1])):
+            return window
+        order = np.argsort(timestamps, kind="stable")
+        ordered = timestamps[order]
+        # Entre repetidos a ordenação estável deixa a última versão recebida por último
+        index = order[np.append(ordered[1:] != ordered[:-1], True)]
+        return CandleWindow(timestamps[index], *(column[index] for column in IndicatorEngine._columns(window)))
+
+    @staticmethod
+    def _columns(window: CandleWindow) -> list[np.ndarray]:
+        return [window.open, window.high, window.low, window.close, window.volume]
+
+    def _update_batch(self, key: str) -> IndicatorSnapshot:
+        closes = self._candles[key].closes().tolist()
+        if len(closes) < self.MIN_CANDLES:
             return IndicatorSnapshot()
 
         ema_fast = self._ema(closes, 9)
@@ -138,8 +527,12 @@ class IndicatorEngine:
         return upper, mean, lower
 
     @staticmethod
-    def _to_dataframe(_: Iterable[Candle]) -> None:  # Mantido por compatibilidade futura
-        return None
+    def _to_dataframe(candles: Iterable[Candle]) -> pd.DataFrame:
+        frame = pd.DataFrame(
+            [(c.timestamp, c.open, c.high, c.low, c.close, c.volume) for c in candles],
+            columns=["timestamp", "open", "high", "low", "close", "volume"],
+        )
+        return frame.set_index("timestamp")
 
 
-indicator_engine = IndicatorEngine()
+indicator_engine = IndicatorEngine(default_paths=())
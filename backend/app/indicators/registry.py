@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, ClassVar, Dict, Iterable, Sequence
+
+import numpy as np
+
+from app.indicators.streaming import BollingerState, EmaState, RsiState
+from app.indicators.vectorized import bollinger_series, ema_series, rsi_series
+
+MIN_CANDLES = 30
+SOURCES = ("open", "high", "low", "close", "volume")
+DEFAULT_PATHS = (
+    "ema.close.9",
+    "ema.close.21",
+    "rsi.close.14",
+    "macd.line",
+    "macd.signal",
+    "bb.upper.20",
+    "bb.middle.20",
+    "bb.lower.20",
+)
+
+Value = float | None
+
+
+@dataclass(frozen=True)
+class NodeDef:
+    """Nó do DAG de indicadores; definições iguais são compartilhadas entre caminhos."""
+
+    kind: str
+    params: tuple = ()
+    inputs: tuple["NodeDef", ...] = ()
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Estado de todos os nós de um plano após o candle ``count``."""
+
+    count: int
+    values: tuple[Value, ...]
+    nodes: tuple[object, ...]
+
+
+@dataclass(frozen=True)
+class OutputRef:
+    node: NodeDef
+    component: int = 0
+
+
+def source(name: str) -> NodeDef:
+    return NodeDef("source", (name,))
+
+
+class Node:
+    """Estado incremental de um nó; ``series``/``seed`` cobrem o caminho vetorizado.
+
+    ``bind`` informa ao nó o slot onde escrever e os slots das entradas no vetor de
+    valores da chave; ``update`` lê e escreve diretamente nesse vetor.
+    """
+
+    width: ClassVar[int] = 1
+
+    def __init__(self, definition: NodeDef) -> None:
+        self.definition = definition
+        self.slot = 0
+        self.inputs: tuple[int, ...] = ()
+
+    def bind(self, slot: int, inputs: tuple[int, ...]) -> None:
+        self.slot = slot
+        self.inputs = inputs
+
+    def update(self, values: list[Value], count: int) -> None:
+        raise NotImplementedError
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        raise NotImplementedError
+
+    def seed(self, inputs: Sequence[np.ndarray], outputs: Sequence[np.ndarray], count: int) -> None:
+        """Restaura o estado incremental a partir das séries já calculadas."""
+
+    def snapshot(self) -> object:
+        """Cópia do estado incremental, para ``restore`` após uma correção do histórico."""
+        state = getattr(self, "state", None)
+        return None if state is None else state.copy()
+
+    def restore(self, snapshot: object) -> None:
+        if snapshot is not None:
+            # A cópia mantém o checkpoint reutilizável em correções seguintes
+            self.state = snapshot.copy()  # type: ignore[attr-defined]
+
+
+class EmaNode(Node):
+    def __init__(self, definition: NodeDef) -> None:
+        super().__init__(definition)
+        self.state = EmaState(definition.params[0])
+
+    def update(self, values: list[Value], count: int) -> None:
+        value = values[self.inputs[0]]
+        state = self.state
+        values[self.slot] = state.current() if value is None else state.update(value)
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        values = inputs[0]
+        result = ema_series(values, self.state.period)
+        result[np.cumsum(~np.isnan(values)) < self.state.period] = np.nan
+        return [result]
+
+    def seed(self, inputs: Sequence[np.ndarray], outputs: Sequence[np.ndarray], count: int) -> None:
+        values = inputs[0][~np.isnan(inputs[0])]
+        if len(values):
+            self.state.seed(float(ema_series(values, self.state.period)[-1]), len(values))
+
+
+class RsiNode(Node):
+    def __init__(self, definition: NodeDef) -> None:
+        super().__init__(definition)
+        self.state = RsiState(definition.params[0])
+
+    def update(self, values: list[Value], count: int) -> None:
+        values[self.slot] = self.state.update(values[self.inputs[0]])
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        return [rsi_series(inputs[0], self.state.period)]
+
+    def seed(self, inputs: Sequence[np.ndarray], outputs: Sequence[np.ndarray], count: int) -> None:
+        self.state.seed(inputs[0][-(self.state.period + 1) :].tolist())
+
+
+class BollingerNode(Node):
+    width = 3
+
+    def __init__(self, definition: NodeDef) -> None:
+        super().__init__(definition)
+        period, std_factor = definition.params
+        self.state = BollingerState(period, std_factor)
+
+    def update(self, values: list[Value], count: int) -> None:
+        slot = self.slot
+        values[slot], values[slot + 1], values[slot + 2] = self.state.update(values[self.inputs[0]])
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        return list(bollinger_series(inputs[0], self.state.period, self.state.std_factor))
+
+    def seed(self, inputs: Sequence[np.ndarray], outputs: Sequence[np.ndarray], count: int) -> None:
+        self.state.seed(inputs[0][-self.state.period :].tolist())
+
+
+class MacdLineNode(Node):
+    """Diferença entre as EMAs rápida e lenta, publicada só após ``MIN_CANDLES``."""
+
+    def update(self, values: list[Value], count: int) -> None:
+        fast = values[self.inputs[0]]
+        slow = values[self.inputs[1]]
+        if count < MIN_CANDLES or fast is None or slow is None:
+            values[self.slot] = None
+        else:
+            values[self.slot] = fast - slow
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        line = inputs[0] - inputs[1]
+        line[positions < MIN_CANDLES - 1] = np.nan
+        return [line]
+
+
+class DifferenceNode(Node):
+    def update(self, values: list[Value], count: int) -> None:
+        left = values[self.inputs[0]]
+        right = values[self.inputs[1]]
+        values[self.slot] = None if left is None or right is None else left - right
+
+    def series(self, inputs: Sequence[np.ndarray], positions: np.ndarray) -> list[np.ndarray]:
+        return [inputs[0] - inputs[1]]
+
+
+PathParser = Callable[[list[str]], OutputRef]
+
+
+class IndicatorRegistry:
+    """Traduz caminhos como ``ema.close.50`` em nós do DAG de indicadores."""
+
+    def __init__(self) -> None:
+        self._parsers: Dict[str, PathParser] = {}
+        self._nodes: Dict[str, type[Node]] = {}
+
+    def register_path(self, prefix: str) -> Callable[[PathParser], PathParser]:
+        def decorator(parser: PathParser) -> PathParser:
+            self._parsers[prefix] = parser
+            return parser
+
+        return decorator
+
+    def register_node(self, kind: str, node_type: type[Node]) -> None:
+        self._nodes[kind] = node_type
+
+    def parse(self, path: str) -> OutputRef:
+        return self._parse(path)
+
+    def validate(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self._parse(path)
+
+    def create(self, definition: NodeDef) -> Node:
+        return self._nodes[definition.kind](definition)
+
+    @lru_cache(maxsize=4096)
+    def _parse(self, path: str) -> OutputRef:
+        prefix, *parts = path.split(".")
+        parser = self._parsers.get(prefix)
+        if parser is None:
+            raise ValueError(f"Indicador desconhecido: {path}")
+        try:
+            return parser(parts)
+        except (IndexError, ValueError) as exc:
+            raise ValueError(f"Caminho de indicador inválido: {path}") from exc
+
+
+def _period(value: str) -> int:
+    period = int(value)
+    if period <= 0:
+        raise ValueError("Período deve ser positivo.")
+    return period
+
+
+def _source(value: str) -> NodeDef:
+    if value not in SOURCES:
+        raise ValueError(f"Fonte desconhecida: {value}")
+    return source(value)
+
+
+def ema(input_node: NodeDef, period: int) -> NodeDef:
+    return NodeDef("ema", (period,), (input_node,))
+
+
+registry = IndicatorRegistry()
+registry.register_node("ema", EmaNode)
+registry.register_node("rsi", RsiNode)
+registry.register_node("bb", BollingerNode)
+registry.register_node("macd", MacdLineNode)
+registry.register_node("diff", DifferenceNode)
+
+
+@registry.register_path("ema")
+def _parse_ema(parts: list[str]) -> OutputRef:
+    name, period = parts
+    return OutputRef(ema(_source(name), _period(period)))
+
+
+@registry.register_path("rsi")
+def _parse_rsi(parts: list[str]) -> OutputRef:
+    name, period = parts
+    return OutputRef(NodeDef("rsi", (_period(period),), (_source(name),)))
+
+
+@registry.register_path("bb")
+def _parse_bollinger(parts: list[str]) -> OutputRef:
+    band, period, *factor = parts
+    component = ("upper", "middle", "lower").index(band)
+    std_factor = float(".".join(factor)) if factor else 2
+    return OutputRef(NodeDef("bb", (_period(period), std_factor), (source("close"),)), component)
+
+
+@registry.register_path("macd")
+def _parse_macd(parts: list[str]) -> OutputRef:
+    output, *params = parts
+    fast, slow, signal_period = (_period(p) for p in params) if params else (12, 26, 9)
+    close = source("close")
+    line = NodeDef("macd", (), (ema(close, fast), ema(close, slow)))
+    if output == "line":
+        return OutputRef(line)
+    signal = ema(line, signal_period)
+    if output == "signal":
+        return OutputRef(signal)
+    if output == "histogram":
+        return OutputRef(NodeDef("diff", (), (line, signal)))
+    raise ValueError(f"Saída de MACD desconhecida: {output}")
+
+
+class IndicatorPlan:
+    """Ordem topológica dos nós necessários para um conjunto de caminhos.
+
+    Os cinco primeiros slots guardam OHLCV; cada nó ocupa ``width`` slots a seguir.
+    Nós já existentes (``nodes``) são reaproveitados com seu estado.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        nodes: Dict[NodeDef, Node] | None = None,
+        indicator_registry: IndicatorRegistry = registry,
+    ) -> None:
+        existing = nodes or {}
+        self.paths = tuple(dict.fromkeys(paths))
+        self.nodes: Dict[NodeDef, Node] = {}
+        self.new_nodes: list[Node] = []
+        self._slots: Dict[NodeDef, int] = {source(name): index for index, name in enumerate(SOURCES)}
+        self._steps: list[Node] = []
+        refs = {path: indicator_registry.parse(path) for path in self.paths}
+        for ref in refs.values():
+            self._visit(ref.node, existing, indicator_registry)
+        self.size = len(SOURCES) + sum(node.width for node in self._steps)
+        self._updates = tuple(node.update for node in self._steps)
+        self.outputs: tuple[tuple[str, int], ...] = tuple(
+            (path, self._slots[ref.node] + ref.component) for path, ref in refs.items()
+        )
+
+    def _visit(self, definition: NodeDef, existing: Dict[NodeDef, Node], indicator_registry: IndicatorRegistry) -> int:
+        slot = self._slots.get(definition)
+        if slot is not None:
+            return slot
+        inputs = tuple(self._visit(dep, existing, indicator_registry) for dep in definition.inputs)
+        node = existing.get(definition)
+        if node is None:
+            node = indicator_registry.create(definition)
+            self.new_nodes.append(node)
+        slot = len(SOURCES) + sum(step.width for step in self._steps)
+        node.bind(slot, inputs)
+        self._slots[definition] = slot
+        self.nodes[definition] = node
+        self._steps.append(node)
+        return slot
+
+    def update(self, values: list[Value], count: int) -> None:
+        """Avança todos os nós um candle; ``values[:5]`` já deve conter o OHLCV."""
+        for update in self._updates:
+            update(values, count)
+
+    def checkpoint(self, values: Sequence[Value], count: int) -> Checkpoint:
+        return Checkpoint(count, tuple(values), tuple(node.snapshot() for node in self._steps))
+
+    def restore(self, checkpoint: Checkpoint) -> list[Value]:
+        """Volta os nós ao estado do checkpoint e devolve uma cópia dos valores de então."""
+        for node, snapshot in zip(self._steps, checkpoint.nodes):
+            node.restore(snapshot)
+        return list(checkpoint.values)
+
+    def mapping(self, values: Sequence[Value], count: int) -> dict[str, float]:
+        if count < MIN_CANDLES:
+            return {}
+        return {path: values[slot] for path, slot in self.outputs if values[slot] is not None}
+
+    def compute(self, columns: Sequence[np.ndarray], count: int) -> list[np.ndarray]:
+        """Calcula as séries de todos os slots sobre colunas OHLCV completas.
+
+        ``count`` é o total de candles já vistos pela chave; a última linha das
+        colunas corresponde ao candle ``count - 1``.
+        """
+        size = len(columns[0])
+        positions = np.arange(count - size, count)
+        slots: list[np.ndarray] = [np.asarray(column, dtype=np.float64) for column in columns]
+        for node in self._steps:
+            slots.extend(node.series([slots[i] for i in node.inputs], positions))
+        return slots
+
+    def seed(self, columns: Sequence[np.ndarray], count: int, nodes: Iterable[Node] | None = None) -> list[Value]:
+        """Semeia ``nodes`` (padrão: todos) e devolve os valores da última linha."""
+        slots = self.compute(columns, count)
+        targets = {id(node) for node in (self.nodes.values() if nodes is None else nodes)}
+        for node in self._steps:
+            if id(node) in targets:
+                outputs = slots[node.slot : node.slot + node.width]
+                node.seed([slots[i] for i in node.inputs], outputs, count)
+        if not len(columns[0]):
+            return [None] * self.size
+        return [None if np.isnan(series[-1]) else float(series[-1]) for series in slots]
+
+    def frame(self, columns: Sequence[np.ndarray], count: int | None = None) -> dict[str, np.ndarray]:
+        """Séries por caminho, com ``nan`` onde ``update`` não publicaria valor."""
+        size = len(columns[0])
+        count = size if count is None else count
+        slots = self.compute(columns, count)
+        gate = np.arange(count - size, count) < MIN_CANDLES - 1
+        result = {}
+        for path, slot in self.outputs:
+            series = slots[slot].copy()
+            series[gate] = np.nan
+            result[path] = series
+        return result
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from math import sqrt
+from typing import Deque, Sequence
+
+
+@dataclass(slots=True)
+class EmaState:
+    """EMA incremental semeada com o primeiro valor, igual ao cálculo em lote."""
+
+    period: int
+    k: float = 0.0
+    value: float | None = None
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.k = 2 / (self.period + 1)
+
+    def update(self, price: float) -> float | None:
+        if self.value is None:
+            self.value = price
+        else:
+            self.value = price * self.k + self.value * (1 - self.k)
+        self.count += 1
+        return self.current()
+
+    def seed(self, value: float, count: int) -> None:
+        self.value = value
+        self.count = count
+
+    def copy(self) -> "EmaState":
+        # Construtor direto: ``dataclasses.replace`` custa várias vezes mais por nó
+        return EmaState(self.period, self.k, self.value, self.count)
+
+    def current(self) -> float | None:
+        if self.count < self.period:
+            return None
+        return self.value
+
+
+@dataclass(slots=True)
+class RsiState:
+    """RSI com somas móveis de ganhos/perdas das últimas ``period`` variações.
+
+    Replica a média simples usada por ``IndicatorEngine._rsi``; as somas são
+    recalculadas a cada ``period`` inserções para não acumular erro de ponto
+    flutuante.
+    """
+
+    period: int
+    previous: float | None = None
+    gains: float = 0.0
+    losses: float = 0.0
+    loss_count: int = 0
+    deltas: Deque[float] = field(default_factory=deque)
+    _since_resync: int = 0
+
+    def update(self, price: float) -> float | None:
+        if self.previous is not None:
+            self._push(price - self.previous)
+        self.previous = price
+        return self.current()
+
+    def seed(self, closes: Sequence[float]) -> None:
+        """Restaura o estado a partir dos últimos ``period + 1`` fechamentos."""
+        tail = list(closes[-(self.period + 1) :])
+        self.deltas = deque(b - a for a, b in zip(tail, tail[1:]))
+        self.previous = tail[-1] if tail else None
+        self.loss_count = sum(1 for delta in self.deltas if delta < 0)
+        self._resync()
+
+    def copy(self) -> "RsiState":
+        return RsiState(
+            self.period, self.previous, self.gains, self.losses, self.loss_count, deque(self.deltas), self._since_resync
+        )
+
+    def _push(self, delta: float) -> None:
+        if len(self.deltas) == self.period:
+            self._pop(self.deltas.popleft())
+        self.deltas.append(delta)
+        if delta >= 0:
+            self.gains += delta
+        else:
+            self.losses -= delta
+            self.loss_count += 1
+
+        self._since_resync += 1
+        if self._since_resync >= self.period:
+            self._resync()
+
+    def _pop(self, delta: float) -> None:
+        if delta >= 0:
+            self.gains -= delta
+        else:
+            self.losses += delta
+            self.loss_count -= 1
+
+    def _resync(self) -> None:
+        self.gains = sum(d for d in self.deltas if d >= 0)
+        self.losses = sum(-d for d in self.deltas if d < 0)
+        self._since_resync = 0
+
+    def current(self) -> float | None:
+        if len(self.deltas) < self.period:
+            return None
+        if self.loss_count == 0:
+            return 100.0
+        avg_gain = self.gains / self.period
+        avg_loss = self.losses / self.period
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+@dataclass(slots=True)
+class BollingerState:
+    """Bandas de Bollinger com soma e soma dos quadrados móveis.
+
+    Os valores são deslocados por uma âncora (média da última ressincronização)
+    para evitar cancelamento catastrófico na variância.
+    """
+
+    period: int
+    std_factor: float
+    window: Deque[float] = field(default_factory=deque)
+    anchor: float = 0.0
+    total: float = 0.0
+    total_sq: float = 0.0
+    _since_resync: int = 0
+
+    def update(self, price: float) -> tuple[float | None, float | None, float | None]:
+        if not self.window:
+            self.anchor = price
+        if len(self.window) == self.period:
+            old = self.window.popleft() - self.anchor
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(price)
+        shifted = price - self.anchor
+        self.total += shifted
+        self.total_sq += shifted * shifted
+
+        self._since_resync += 1
+        if self._since_resync >= self.period and len(self.window) == self.period:
+            self._resync()
+        return self.current()
+
+    def copy(self) -> "BollingerState":
+        return BollingerState(
+            self.period, self.std_factor, deque(self.window), self.anchor, self.total, self.total_sq, self._since_resync
+        )
+
+    def seed(self, closes: Sequence[float]) -> None:
+        self.window = deque(closes[-self.period :])
+        if self.window:
+            self._resync()
+
+    def _resync(self) -> None:
+        self.anchor = sum(self.window) / len(self.window)
+        shifted = [price - self.anchor for price in self.window]
+        self.total = sum(shifted)
+        self.total_sq = sum(value * value for value in shifted)
+        self._since_resync = 0
+
+    def current(self) -> tuple[float | None, float | None, float | None]:
+        if len(self.window) < self.period:
+            return (None, None, None)
+        offset = self.total / self.period
+        variance = max(self.total_sq / self.period - offset * offset, 0.0)
+        mean = self.anchor + offset
+        std_dev = sqrt(variance)
+        return mean + self.std_factor * std_dev, mean, mean - self.std_factor * std_dev
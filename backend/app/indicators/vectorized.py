@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def ema_series(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA semeada com o primeiro valor (mesma recorrência de ``IndicatorEngine._ema``)."""
+    if len(values) == 0:
+        return np.empty(0, dtype=np.float64)
+    alpha = 2 / (period + 1)
+    return pd.Series(values, copy=False).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def rolling_sum(values: np.ndarray, period: int) -> np.ndarray:
+    """Soma móvel alinhada ao último elemento da janela; ``nan`` antes de completar."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1 :] = sliding_window_view(values, period).sum(axis=1)
+    return out
+
+
+def rsi_series(closes: np.ndarray, period: int) -> np.ndarray:
+    """RSI pela média simples das últimas ``period`` variações, como no caminho em lote."""
+    out = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return out
+    deltas = np.diff(closes)
+    gains = rolling_sum(np.where(deltas >= 0, deltas, 0.0), period)[period - 1 :]
+    losses = rolling_sum(np.where(deltas < 0, -deltas, 0.0), period)[period - 1 :]
+    loss_count = rolling_sum((deltas < 0).astype(np.float64), period)[period - 1 :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = (gains / period) / (losses / period)
+        values = 100 - (100 / (1 + rs))
+    out[period:] = np.where(loss_count == 0, 100.0, values)
+    return out
+
+
+def bollinger_series(
+    closes: np.ndarray, period: int, std_factor: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    middle = np.full(len(closes), np.nan)
+    std_dev = np.full(len(closes), np.nan)
+    if len(closes) >= period:
+        windows = sliding_window_view(closes, period)
+        middle[period - 1 :] = windows.mean(axis=1)
+        std_dev[period - 1 :] = windows.std(axis=1)
+    return middle + std_factor * std_dev, middle, middle - std_factor * std_dev
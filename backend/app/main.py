@@ -1,11 +1,23 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 
 from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
 from app.api.router import api_router
 from app.core.config import get_settings, Settings
+from app.services.alert_log import AlertLog
+from app.services.alert_store import alert_store
+from app.services.candle_store import CandleStore
+from app.services.event_bus import event_bus
+from app.services.market_stream import market_stream_service
+from app.services.pipeline import ingestion_pipeline
+from app.services.strategy_repository import StrategyRepository, database_url
+from app.services.strategy_store import strategy_store
+from app.services.telegram import telegram_notifier
+from app.services.tick_builder import TICK_LIST, tick_ingestion
 from app.services.websocket_manager import ws_manager
 
 logger = logging.getLogger("traderup")
@@ -14,7 +26,40 @@ logger = logging.getLogger("traderup")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Iniciando aplicação TraderUP Alerts")
+    settings = get_settings()
+    if settings.alert_log_path:
+        log = AlertLog(settings.alert_log_path, retention=settings.alert_log_retention)
+        replayed = alert_store.attach_log(log)
+        logger.info("%d alertas recarregados de %s", replayed, settings.alert_log_path)
+    if settings.market_stream_processes:
+        await market_stream_service.start_processes(settings.market_stream_processes)
+    strategies = await strategy_store.open(StrategyRepository(database_url(settings)))
+    active = await market_stream_service.register_many(strategies)
+    logger.info("%d estratégias carregadas (%d ativas)", len(strategies), active)
+    if settings.candle_store_path:
+        market_stream_service.attach_history(CandleStore(settings.candle_store_path))
+        warmed = await market_stream_service.warm_up_from_history(settings.candle_warm_up)
+        logger.info("%d chaves aquecidas a partir de %s", warmed, settings.candle_store_path)
+    if settings.rule_state_path:
+        restored = await market_stream_service.load_rule_state(settings.rule_state_path)
+        logger.info("%d sequências retomadas de %s", restored, settings.rule_state_path)
+    await telegram_notifier.start()
+    await ingestion_pipeline.start()
     yield
+    await ingestion_pipeline.stop()
+    await telegram_notifier.stop()
+    if settings.rule_state_path:
+        await market_stream_service.save_rule_state(settings.rule_state_path)
+    await market_stream_service.stop_processes()
+    await strategy_store.close()
+    history = market_stream_service.detach_history()
+    if history is not None:
+        history.close()
+    await ws_manager.close()
+    await event_bus.close()
+    log = alert_store.detach_log()
+    if log is not None:
+        await asyncio.to_thread(log.close)
     logger.info("Encerrando aplicação TraderUP Alerts")
 
 
@@ -41,11 +86,27 @@ def create_app() -> FastAPI:
         await ws_manager.connect(websocket)
         try:
             while True:
-                # Mantém conexão ativa; mensagens recebidas são ignoradas por ora
-                await websocket.receive_text()
+                # Mensagens do cliente ajustam as inscrições por evento, símbolo e timeframe
+                await ws_manager.handle_message(websocket, await websocket.receive_text())
         except WebSocketDisconnect:
             await ws_manager.disconnect(websocket)
 
+    @app.websocket("/ws/ticks")
+    async def websocket_ticks(websocket: WebSocket):
+        # Cada mensagem é um array JSON de ticks; lotes inválidos são recusados sem fechar a conexão
+        await websocket.accept()
+        try:
+            while True:
+                try:
+                    ticks = TICK_LIST.validate_json(await websocket.receive_text())
+                except ValidationError as exc:
+                    errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+                    await websocket.send_json({"type": "error", "errors": errors})
+                    continue
+                await tick_ingestion.ingest(ticks)
+        except WebSocketDisconnect:
+            pass
+
     return app
 
 
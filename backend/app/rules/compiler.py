@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+import operator
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Mapping, Sequence
+
+from app.schemas.strategy import LogicGate, Operand, Operator, StrategyCondition, StrategyRead
+
+Values = Sequence[float | None]
+# Recebe os valores do candle e os anteriores (memória de cruzamento), ambos por slot
+Predicate = Callable[[Values, Values], bool]
+
+_COMPARISONS: Dict[Operator, Callable[[float, float], bool]] = {
+    Operator.GREATER_THAN: operator.gt,
+    Operator.LESS_THAN: operator.lt,
+    Operator.GREATER_OR_EQUAL: operator.ge,
+    Operator.LESS_OR_EQUAL: operator.le,
+    Operator.EQUAL: operator.eq,
+    Operator.NOT_EQUAL: operator.ne,
+}
+
+
+class SlotTable:
+    """Atribui um índice fixo a cada operando ``price``/``indicator`` referenciado.
+
+    Por candle o contexto é resolvido uma única vez em uma lista indexada por slot;
+    as estratégias compiladas leem os valores por índice, sem consultar dicts.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[tuple[str, str], int] = {}
+        self._refs: list[int] = []
+        self._keys: list[tuple[str, str] | None] = []
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def acquire(self, source: str, path: str) -> int:
+        key = (source, path)
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._keys[slot] = key
+                self._refs[slot] = 0
+            else:
+                slot = len(self._keys)
+                self._keys.append(key)
+                self._refs.append(0)
+            self._slots[key] = slot
+        self._refs[slot] += 1
+        return slot
+
+    def release(self, slot: int) -> None:
+        self._refs[slot] -= 1
+        if self._refs[slot] <= 0:
+            key = self._keys[slot]
+            if key is not None:
+                del self._slots[key]
+            self._keys[slot] = None
+            self._free.append(slot)
+
+    def resolve(self, price: dict[str, float], indicators: dict[str, float]) -> list[float | None]:
+        values: list[float | None] = []
+        append = values.append
+        for key in self._keys:
+            if key is None:
+                append(None)
+            elif key[0] == "indicator":
+                append(indicators.get(key[1]))
+            else:
+                append(price.get(key[1]))
+        return values
+
+
+class CrossMemory:
+    """Último valor conhecido de cada slot em uma chave symbol:timeframe.
+
+    É a memória dos cruzamentos: um valor por operando, lido por todos os
+    predicados que comparam aquele caminho. Os predicados leem ``values`` e só
+    depois de avaliado o candle inteiro ``commit`` grava os valores atuais,
+    então a ordem de avaliação e o curto-circuito não alteram o resultado.
+    """
+
+    __slots__ = ("values", "_refs")
+
+    def __init__(self) -> None:
+        self.values: list[float | None] = []
+        self._refs: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def track(self, slots: Iterable[int]) -> None:
+        """Passa a guardar os slots; um slot novo na chave começa sem valor anterior."""
+        for slot in slots:
+            refs = self._refs.get(slot, 0)
+            if not refs:
+                if slot >= len(self.values):
+                    self.values.extend([None] * (slot + 1 - len(self.values)))
+                # O slot pode ter pertencido a outro caminho antes de ser liberado
+                self.values[slot] = None
+            self._refs[slot] = refs + 1
+
+    def untrack(self, slots: Iterable[int]) -> None:
+        for slot in slots:
+            refs = self._refs[slot] - 1
+            if refs:
+                self._refs[slot] = refs
+            else:
+                del self._refs[slot]
+                self.values[slot] = None
+
+    def commit(self, values: Values) -> None:
+        # Valores ausentes no candle mantêm o anterior
+        self.values = [previous if current is None else current for current, previous in zip(values, self.values)]
+
+
+class CompiledStrategy:
+    """Programa plano de uma estratégia avulsa, com memória de cruzamento própria.
+
+    ``ConfluenceEngine.process`` mantém um programa por estratégia e chave
+    symbol:timeframe, de modo que ativos diferentes não compartilham memória.
+    """
+
+    __slots__ = ("strategy", "slots", "memory", "_predicate")
+
+    def __init__(self, strategy: StrategyRead, slots: tuple[int, ...], predicate: Predicate) -> None:
+        self.strategy = strategy
+        self.slots = slots
+        self.memory = CrossMemory()
+        self.memory.track(slots)
+        self._predicate = predicate
+
+    def evaluate(self, values: Values) -> bool:
+        hit = self._predicate(values, self.memory.values)
+        self.memory.commit(values)
+        return hit
+
+
+def compile_strategy(strategy: StrategyRead, slots: SlotTable) -> CompiledStrategy:
+    """Transforma as condições em closures indexadas por slot.
+
+    Como a memória de cruzamento só é gravada depois do candle, todas as
+    condições entram no curto-circuito de ALL/ANY, com os cruzamentos por
+    último. Em SEQUENCE todas são avaliadas a cada candle e o autômato guarda o
+    passo na própria closure.
+    """
+    acquired: list[int] = []
+    declared: list[Predicate] = []
+    comparisons: list[Predicate] = []
+    crosses: list[Predicate] = []
+    for condition in strategy.conditions:
+        predicate = _compile_condition(condition, slots, acquired)
+        declared.append(predicate)
+        if condition.operator in (Operator.CROSSES_ABOVE, Operator.CROSSES_BELOW):
+            crosses.append(predicate)
+        else:
+            comparisons.append(predicate)
+
+    if strategy.logic == LogicGate.SEQUENCE:
+        predicate = _sequence(tuple(declared), strategy.sequence_window)
+    elif strategy.logic == LogicGate.ANY:
+        predicate = _any(tuple(comparisons + crosses))
+    else:
+        predicate = _all(tuple(comparisons + crosses))
+    return CompiledStrategy(strategy, tuple(acquired), predicate)
+
+
+def _all(predicates: tuple[Predicate, ...]) -> Predicate:
+    def evaluate(values: Values, previous: Values) -> bool:
+        for predicate in predicates:
+            if not predicate(values, previous):
+                return False
+        return True
+
+    return evaluate
+
+
+def _any(predicates: tuple[Predicate, ...]) -> Predicate:
+    def evaluate(values: Values, previous: Values) -> bool:
+        for predicate in predicates:
+            if predicate(values, previous):
+                return True
+        return False
+
+    return evaluate
+
+
+def advance_sequence(
+    step: int, deadline: int, bar: int, window: int, conditions: Sequence[int], satisfied: Callable[[int], bool]
+) -> tuple[int, int, bool]:
+    """Avança o autômato SEQUENCE em um candle; retorna ``(passo, limite, disparou)``.
+
+    ``step`` é a próxima condição esperada e ``deadline`` o último candle em que
+    ela ainda pode ser atendida. Avança no máximo um passo por candle; enquanto
+    espera, a condição anterior atendida de novo renova o prazo, de modo que
+    conta a ocorrência mais recente. ``conditions`` traz o identificador que
+    ``satisfied`` recebe para cada condição, em ordem.
+    """
+    if step and bar > deadline:
+        step = 0
+    if satisfied(conditions[step]):
+        step += 1
+        if step == len(conditions):
+            return 0, 0, True
+        return step, bar + window, False
+    if step and satisfied(conditions[step - 1]):
+        return step, bar + window, False
+    return step, deadline, False
+
+
+def _sequence(predicates: tuple[Predicate, ...], window: int) -> Predicate:
+    if not predicates:
+        return lambda values, previous: True
+    positions = range(len(predicates))
+    # Passo, limite e número de candles avaliados
+    state = [0, 0, 0]
+
+    def evaluate(values: Values, previous: Values) -> bool:
+        results = [predicate(values, previous) for predicate in predicates]
+        state[2] += 1
+        state[0], state[1], hit = advance_sequence(state[0], state[1], state[2], window, positions, results.__getitem__)
+        return hit
+
+    return evaluate
+
+
+def _never(values: Values, previous: Values) -> bool:
+    return False
+
+
+def _operand_slot(operand: Operand, slots: SlotTable, acquired: list[int]) -> int | None:
+    if operand.source == "number" or operand.path is None:
+        return None
+    slot = slots.acquire(operand.source, operand.path)
+    acquired.append(slot)
+    return slot
+
+
+def _compile_condition(condition: StrategyCondition, slots: SlotTable, acquired: list[int]) -> Predicate:
+    left, right = condition.left, condition.right
+    if (left.source != "number" and left.path is None) or (right.source != "number" and right.path is None):
+        return _never
+
+    left_slot = _operand_slot(left, slots, acquired)
+    right_slot = _operand_slot(right, slots, acquired)
+    op = condition.operator
+
+    if op in (Operator.CROSSES_ABOVE, Operator.CROSSES_BELOW):
+        return _compile_cross(left_slot, left.value, right_slot, right.value, op == Operator.CROSSES_ABOVE)
+
+    compare = _COMPARISONS.get(op)
+    if compare is None:
+        return _never
+
+    if left_slot is None and right_slot is None:
+        constant = compare(left.value, right.value)
+        return lambda values, previous: constant
+    if right_slot is None:
+        right_value = right.value
+
+        def against_constant(values: Values, previous: Values) -> bool:
+            current = values[left_slot]
+            return current is not None and compare(current, right_value)
+
+        return against_constant
+    if left_slot is None:
+        left_value = left.value
+
+        def constant_against(values: Values, previous: Values) -> bool:
+            current = values[right_slot]
+            return current is not None and compare(left_value, current)
+
+        return constant_against
+
+    def between_slots(values: Values, previous: Values) -> bool:
+        left_current = values[left_slot]
+        right_current = values[right_slot]
+        return left_current is not None and right_current is not None and compare(left_current, right_current)
+
+    return between_slots
+
+
+def _compile_cross(
+    left_slot: int | None,
+    left_value: float | None,
+    right_slot: int | None,
+    right_value: float | None,
+    above: bool,
+) -> Predicate:
+    def crosses(values: Values, previous: Values) -> bool:
+        current = left_value if left_slot is None else values[left_slot]
+        right = right_value if right_slot is None else values[right_slot]
+        if current is None or right is None:
+            return False
+        # Valor do lado esquerdo no último candle em que existia
+        before = left_value if left_slot is None else previous[left_slot]
+        if before is None:
+            return False
+        if above:
+            return before <= right and current > right
+        return before >= right and current < right
+
+    return crosses
+
+
+def operand_key(operand: Operand) -> tuple:
+    if operand.source == "number":
+        return ("number", operand.value)
+    return (operand.source, operand.path)
+
+
+def condition_key(condition: StrategyCondition) -> tuple:
+    return (operand_key(condition.left), condition.operator.value, operand_key(condition.right))
+
+
+@dataclass
+class _SharedPredicate:
+    key: tuple
+    predicate: Predicate
+    slots: tuple[int, ...]
+    refs: int = 0
+
+
+@dataclass
+class _Program:
+    strategy: StrategyRead
+    any_of: bool
+    predicates: tuple[int, ...]
+    # Posição do autômato nos arrays de SEQUENCE da tabela (-1 nas demais lógicas)
+    sequence: int = -1
+
+
+class PredicateTable:
+    """Predicados distintos das estratégias de uma chave symbol:timeframe.
+
+    Cada condição distinta é compilada uma vez e avaliada uma vez por candle; as
+    estratégias apenas combinam os booleanos já calculados. Os predicados têm
+    contagem de referências e são liberados quando a última estratégia sai.
+
+    Estratégias SEQUENCE guardam o autômato em dois arrays compactos (passo e
+    candle limite, 10 bytes por estratégia), contados pelo relógio de candles
+    da tabela. A memória de cruzamento é uma só para a chave: um valor anterior
+    por operando, qualquer que seja o número de estratégias que o cruzam.
+    """
+
+    def __init__(self, slots: SlotTable) -> None:
+        self._slots = slots
+        self._index: Dict[tuple, int] = {}
+        self._predicates: list[_SharedPredicate | None] = []
+        self._free: list[int] = []
+        self._programs: Dict[int, _Program] = {}
+        self._memory = CrossMemory()
+        self._bar = 0
+        self._steps = array("H")
+        self._deadlines = array("q")
+        self._sequence_free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def strategy_count(self) -> int:
+        return len(self._programs)
+
+    def add(self, strategy: StrategyRead) -> None:
+        self.remove(strategy.id)
+        indices = tuple(self._acquire(condition) for condition in strategy.conditions)
+        program = _Program(strategy, strategy.logic == LogicGate.ANY, indices)
+        if strategy.logic == LogicGate.SEQUENCE and indices:
+            program.sequence = self._acquire_sequence()
+        self._programs[strategy.id] = program
+
+    def remove(self, strategy_id: int) -> None:
+        program = self._programs.pop(strategy_id, None)
+        if program is None:
+            return
+        for index in program.predicates:
+            self._release(index)
+        if program.sequence >= 0:
+            self._sequence_free.append(program.sequence)
+
+    @property
+    def memory(self) -> CrossMemory:
+        return self._memory
+
+    def evaluate(self, values: Values) -> list[StrategyRead]:
+        previous = self._memory.values
+        results = [entry is not None and entry.predicate(values, previous) for entry in self._predicates]
+        self._memory.commit(values)
+        lookup = results.__getitem__
+        self._bar += 1
+        bar = self._bar
+        steps, deadlines = self._steps, self._deadlines
+        triggered = []
+        for program in self._programs.values():
+            position = program.sequence
+            if position >= 0:
+                # advance_sequence em linha: é o laço mais quente com muitas estratégias SEQUENCE
+                step = steps[position]
+                if step and bar > deadlines[position]:
+                    step = 0
+                predicates = program.predicates
+                hit = False
+                if results[predicates[step]]:
+                    step += 1
+                    if step == len(predicates):
+                        step, hit = 0, True
+                    else:
+                        deadlines[position] = bar + program.strategy.sequence_window
+                elif step and results[predicates[step - 1]]:
+                    deadlines[position] = bar + program.strategy.sequence_window
+                steps[position] = step
+            elif program.any_of:
+                hit = any(map(lookup, program.predicates))
+            else:
+                hit = all(map(lookup, program.predicates))
+            if hit:
+                triggered.append(program.strategy)
+        return triggered
+
+    def sequence_state(self) -> dict[int, tuple[int, int, str]]:
+        """Autômatos SEQUENCE em andamento: ``(passo, candles restantes, versão da estratégia)``.
+
+        O prazo é relativo ao relógio da tabela, que recomeça em outro processo;
+        a versão (``updated_at``) evita restaurar o passo de uma estratégia editada.
+        """
+        state = {}
+        for strategy_id, program in self._programs.items():
+            if program.sequence < 0:
+                continue
+            step = self._steps[program.sequence]
+            remaining = self._deadlines[program.sequence] - self._bar
+            if step and remaining >= 0:
+                state[strategy_id] = (step, remaining, program.strategy.updated_at.isoformat())
+        return state
+
+    def restore_sequence_state(self, state: Mapping[int, Sequence]) -> int:
+        """Retoma os autômatos salvos por ``sequence_state``; retorna quantos foram restaurados."""
+        restored = 0
+        for strategy_id, (step, remaining, version) in state.items():
+            program = self._programs.get(strategy_id)
+            if program is None or program.sequence < 0 or program.strategy.updated_at.isoformat() != version:
+                continue
+            if not 0 < step < len(program.predicates) or remaining < 0:
+                continue
+            self._steps[program.sequence] = step
+            self._deadlines[program.sequence] = self._bar + min(remaining, program.strategy.sequence_window)
+            restored += 1
+        return restored
+
+    def _acquire_sequence(self) -> int:
+        if self._sequence_free:
+            position = self._sequence_free.pop()
+            self._steps[position] = 0
+            self._deadlines[position] = 0
+            return position
+        self._steps.append(0)
+        self._deadlines.append(0)
+        return len(self._steps) - 1
+
+    def _acquire(self, condition: StrategyCondition) -> int:
+        key = condition_key(condition)
+        index = self._index.get(key)
+        if index is None:
+            acquired: list[int] = []
+            predicate = _compile_condition(condition, self._slots, acquired)
+            entry = _SharedPredicate(key, predicate, tuple(acquired))
+            self._memory.track(entry.slots)
+            if self._free:
+                index = self._free.pop()
+                self._predicates[index] = entry
+            else:
+                index = len(self._predicates)
+                self._predicates.append(entry)
+            self._index[key] = index
+        self._predicates[index].refs += 1
+        return index
+
+    def _release(self, index: int) -> None:
+        entry = self._predicates[index]
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+        self._memory.untrack(entry.slots)
+        for slot in entry.slots:
+            self._slots.release(slot)
+        del self._index[entry.key]
+        self._predicates[index] = None
+        self._free.append(index)
@@ -1,103 +1,118 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable
+from typing import Any, Dict
 
-from app.schemas.strategy import LogicGate, Operator, StrategyRead, Operand, StrategyCondition
+from app.rules.compiler import CompiledStrategy, PredicateTable, SlotTable, compile_strategy
+from app.schemas.strategy import StrategyRead
 
 
 @dataclass
 class EvaluationContext:
     price: dict[str, float]
     indicators: dict[str, float]
+    # Chave do candle: separa a memória de cruzamento das estratégias avulsas por ativo
+    symbol: str = ""
+    timeframe: str = ""
 
 
 class ConfluenceEngine:
-    """Executa as condições declarativas das estratégias."""
+    """Executa as condições declarativas das estratégias.
+
+    Estratégias registradas entram na ``PredicateTable`` de cada chave
+    symbol:timeframe, onde condições repetidas são avaliadas uma única vez por
+    candle. ``process`` avalia uma estratégia avulsa a partir de um programa
+    compilado próprio para cada chave do contexto.
+    """
 
     def __init__(self) -> None:
-        self._previous: Dict[int, dict[str, float]] = {}
+        self._slots = SlotTable()
+        self._compiled: Dict[int, Dict[tuple[str, str], CompiledStrategy]] = {}
+        self._tables: Dict[tuple[str, str], PredicateTable] = {}
+        self._registered: Dict[int, StrategyRead] = {}
 
     def reset(self) -> None:
-        self._previous.clear()
+        for strategy_id in list(self._compiled):
+            self._discard(strategy_id)
+        for strategy_id in list(self._registered):
+            self.unregister(strategy_id)
+
+    def register(self, strategy: StrategyRead) -> None:
+        """Inclui (ou atualiza) a estratégia nas tabelas de predicados de seus ativos."""
+        self.unregister(strategy.id)
+        self._registered[strategy.id] = strategy
+        for symbol in strategy.symbols:
+            key = (symbol, strategy.timeframe)
+            table = self._tables.get(key)
+            if table is None:
+                table = self._tables[key] = PredicateTable(self._slots)
+            table.add(strategy)
+
+    def unregister(self, strategy_id: int) -> None:
+        """Retira a estratégia das tabelas e libera seus programas avulsos e memórias de cruzamento."""
+        self._discard(strategy_id)
+        strategy = self._registered.pop(strategy_id, None)
+        if strategy is None:
+            return
+        for symbol in strategy.symbols:
+            key = (symbol, strategy.timeframe)
+            table = self._tables.get(key)
+            if table is None:
+                continue
+            table.remove(strategy_id)
+            if not table.strategy_count:
+                del self._tables[key]
+
+    def predicate_table(self, symbol: str, timeframe: str) -> PredicateTable | None:
+        return self._tables.get((symbol, timeframe))
+
+    def evaluate_candle(self, symbol: str, timeframe: str, context: EvaluationContext) -> list[StrategyRead]:
+        """Estratégias registradas na chave cujas condições foram atendidas neste candle."""
+        table = self._tables.get((symbol, timeframe))
+        if table is None:
+            return []
+        return table.evaluate(self._slots.resolve(context.price, context.indicators))
+
+    def export_state(self) -> dict[str, Any]:
+        """Estado entre candles das estratégias registradas, serializável em JSON.
+
+        Hoje são os autômatos SEQUENCE em andamento, por chave ``symbol:timeframe``.
+        """
+        sequences = {}
+        for (symbol, timeframe), table in self._tables.items():
+            state = table.sequence_state()
+            if state:
+                sequences[f"{symbol}:{timeframe}"] = {str(strategy_id): list(entry) for strategy_id, entry in state.items()}
+        return {"sequences": sequences}
+
+    def import_state(self, state: dict[str, Any]) -> int:
+        """Restaura o que ``export_state`` salvou; chaves e estratégias ausentes são ignoradas."""
+        restored = 0
+        for key, entries in state.get("sequences", {}).items():
+            symbol, _, timeframe = key.rpartition(":")
+            table = self._tables.get((symbol, timeframe))
+            if table is not None:
+                restored += table.restore_sequence_state({int(strategy_id): entry for strategy_id, entry in entries.items()})
+        return restored
 
     def process(self, strategy: StrategyRead, context: EvaluationContext) -> bool:
-        resolved = []
-        for condition in strategy.conditions:
-            result = self._evaluate_condition(strategy.id, condition, context)
-            resolved.append(result)
-
-        if strategy.logic == LogicGate.ALL:
-            triggered = all(resolved)
-        elif strategy.logic == LogicGate.ANY:
-            triggered = any(resolved)
-        else:  # SEQUENCE - simplificado como ALL por enquanto
-            triggered = all(resolved)
-
-        return triggered
-
-    def _evaluate_condition(self, strategy_id: int, condition: StrategyCondition, context: EvaluationContext) -> bool:
-        left = self._resolve_operand(strategy_id, "left", condition.left, context)
-        right = self._resolve_operand(strategy_id, "right", condition.right, context)
-
-        if left is None or right is None:
-            return False
-
-        op = condition.operator
-
-        if op == Operator.GREATER_THAN:
-            return left > right
-        if op == Operator.LESS_THAN:
-            return left < right
-        if op == Operator.GREATER_OR_EQUAL:
-            return left >= right
-        if op == Operator.LESS_OR_EQUAL:
-            return left <= right
-        if op == Operator.EQUAL:
-            return left == right
-        if op == Operator.NOT_EQUAL:
-            return left != right
-        if op == Operator.CROSSES_ABOVE:
-            return self._crosses(strategy_id, condition.left, left, right, direction="above")
-        if op == Operator.CROSSES_BELOW:
-            return self._crosses(strategy_id, condition.left, left, right, direction="below")
-        return False
-
-    def _resolve_operand(
-        self, strategy_id: int, side: str, operand: Operand, context: EvaluationContext
-    ) -> float | None:
-        if operand.source == "number":
-            return operand.value
-        if operand.source == "price":
-            if operand.path is None:
-                return None
-            return context.price.get(operand.path)
-        if operand.source == "indicator":
-            if operand.path is None:
-                return None
-            return context.indicators.get(operand.path)
-        return None
-
-    def _crosses(
-        self,
-        strategy_id: int,
-        operand: Operand,
-        current_left: float,
-        right: float,
-        *,
-        direction: str,
-    ) -> bool:
-        key = operand.path or operand.source
-        previous_map = self._previous.setdefault(strategy_id, {})
-        previous_value = previous_map.get(key)
-        previous_map[key] = current_left
-
-        if previous_value is None:
-            return False
-
-        if direction == "above":
-            return previous_value <= right and current_left > right
-        return previous_value >= right and current_left < right
+        programs = self._compiled.get(strategy.id)
+        if programs and next(iter(programs.values())).strategy is not strategy:
+            # Estratégia alterada: os programas de todas as chaves recomeçam
+            self._discard(strategy.id)
+            programs = None
+        if programs is None:
+            programs = self._compiled[strategy.id] = {}
+        key = (context.symbol, context.timeframe)
+        compiled = programs.get(key)
+        if compiled is None:
+            compiled = programs[key] = compile_strategy(strategy, self._slots)
+        return compiled.evaluate(self._slots.resolve(context.price, context.indicators))
+
+    def _discard(self, strategy_id: int) -> None:
+        for compiled in self._compiled.pop(strategy_id, {}).values():
+            for slot in compiled.slots:
+                self._slots.release(slot)
 
 
 confluence_engine = ConfluenceEngine()
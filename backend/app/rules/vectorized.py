@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import operator
+from typing import Callable, Dict, Mapping
+
+import numpy as np
+
+from app.rules.compiler import advance_sequence, condition_key
+from app.schemas.strategy import LogicGate, Operand, Operator, Strategy, StrategyCondition
+
+Columns = Mapping[str, np.ndarray]
+
+_COMPARISONS: Dict[Operator, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    Operator.GREATER_THAN: operator.gt,
+    Operator.LESS_THAN: operator.lt,
+    Operator.GREATER_OR_EQUAL: operator.ge,
+    Operator.LESS_OR_EQUAL: operator.le,
+    Operator.EQUAL: operator.eq,
+    Operator.NOT_EQUAL: operator.ne,
+}
+
+
+def strategy_signal(
+    strategy: Strategy,
+    price: Columns,
+    indicators: Columns,
+    size: int,
+    cache: Dict[tuple, np.ndarray] | None = None,
+) -> np.ndarray:
+    """Booleano por candle: a estratégia dispararia naquele candle.
+
+    Mesma semântica de ``PredicateTable.evaluate`` em um replay candle a candle:
+    ``price`` traz as colunas OHLC e ``indicators`` as séries de
+    ``IndicatorPlan.frame``, com ``nan`` onde o contexto não teria o valor.
+    Com ``cache``, condições iguais entre estratégias avaliadas sobre as mesmas
+    colunas são calculadas uma única vez.
+    """
+    signals = []
+    for condition in strategy.conditions:
+        if cache is None:
+            signals.append(condition_signal(condition, price, indicators, size))
+            continue
+        key = condition_key(condition)
+        signal = cache.get(key)
+        if signal is None:
+            signal = cache[key] = condition_signal(condition, price, indicators, size)
+        signals.append(signal)
+    if strategy.logic == LogicGate.ANY:
+        return np.logical_or.reduce(signals) if signals else np.zeros(size, dtype=bool)
+    if strategy.logic == LogicGate.SEQUENCE and signals:
+        return sequence_signal(signals, strategy.sequence_window)
+    return np.logical_and.reduce(signals) if signals else np.ones(size, dtype=bool)
+
+
+def sequence_signal(signals: list[np.ndarray], window: int) -> np.ndarray:
+    """Disparos do autômato SEQUENCE sobre os sinais das condições, em ordem.
+
+    O autômato é o mesmo do caminho incremental, mas só muda de estado em
+    candles com alguma condição atendida: o laço percorre apenas esses, com
+    as condições do candle em uma máscara de bits.
+    """
+    masks: Dict[int, int] = {}
+    for index, signal in enumerate(signals):
+        bit = 1 << index
+        for position in np.flatnonzero(signal).tolist():
+            masks[position] = masks.get(position, 0) | bit
+    bits = [1 << index for index in range(len(signals))]
+    result = np.zeros(len(signals[0]), dtype=bool)
+    step = deadline = 0
+    for position in sorted(masks):
+        mask = masks[position]
+        step, deadline, hit = advance_sequence(step, deadline, position, window, bits, mask.__and__)
+        if hit:
+            result[position] = True
+    return result
+
+
+def condition_signal(condition: StrategyCondition, price: Columns, indicators: Columns, size: int) -> np.ndarray:
+    left = _operand(condition.left, price, indicators, size)
+    right = _operand(condition.right, price, indicators, size)
+    if left is None or right is None:
+        return np.zeros(size, dtype=bool)
+    # Valores ausentes nunca satisfazem a condição (inclusive ``neq``)
+    valid = ~np.isnan(left) & ~np.isnan(right)
+
+    op = condition.operator
+    if op in (Operator.CROSSES_ABOVE, Operator.CROSSES_BELOW):
+        return _crosses(left, right, valid, op == Operator.CROSSES_ABOVE)
+    compare = _COMPARISONS.get(op)
+    if compare is None:
+        return np.zeros(size, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        return valid & compare(left, right)
+
+
+def _operand(operand: Operand, price: Columns, indicators: Columns, size: int) -> np.ndarray | None:
+    if operand.source == "number":
+        return np.full(size, np.nan if operand.value is None else operand.value)
+    if operand.path is None:
+        return None
+    columns = indicators if operand.source == "indicator" else price
+    series = columns.get(operand.path)
+    return np.full(size, np.nan) if series is None else np.asarray(series, dtype=np.float64)
+
+
+def _crosses(left: np.ndarray, right: np.ndarray, valid: np.ndarray, above: bool) -> np.ndarray:
+    """O valor anterior é o do último candle em que o lado esquerdo existia,
+    como a memória de cruzamento do caminho incremental."""
+    known = ~np.isnan(left)
+    last = np.maximum.accumulate(np.where(known, np.arange(len(left)), -1))
+    before = np.full(len(left), np.nan)
+    before[1:] = np.where(last[:-1] >= 0, left[np.maximum(last[:-1], 0)], np.nan)
+    with np.errstate(invalid="ignore"):
+        if above:
+            return valid & (before <= right) & (left > right)
+        return valid & (before >= right) & (left < right)
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+from app.schemas.strategy import Strategy
+
+
+class BacktestRequest(BaseModel):
+    strategy: Strategy
+    dataset: str = Field(..., description="Arquivo CSV ou Parquet com OHLCV, relativo a BACKTEST_DATA_DIR.")
+    horizons: list[int] = Field(
+        default_factory=lambda: [1, 5, 15], description="Candles à frente usados para medir o retorno após cada disparo."
+    )
+
+
+class HorizonStats(BaseModel):
+    horizon: int
+    samples: int
+    mean_return: float | None = None
+    hit_rate: float | None = Field(default=None, description="Fração dos disparos seguidos de alta no fechamento.")
+
+
+class BacktestResult(BaseModel):
+    candles: int
+    start: datetime | None = None
+    end: datetime | None = None
+    triggers: list[datetime] = Field(default_factory=list)
+    trigger_rate: float = 0.0
+    stats: list[HorizonStats] = Field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class ParameterRange(BaseModel):
+    """Valores explícitos (``values``) ou o intervalo fechado ``start..stop`` com passo ``step``."""
+
+    values: list[float] | None = None
+    start: float | None = None
+    stop: float | None = None
+    step: float = Field(1.0, gt=0)
+
+
+class SweepRequest(BaseModel):
+    template: dict[str, Any] = Field(
+        ...,
+        description='Estratégia com marcadores: "ema.close.{fast}" em ``path`` ou "{nivel}" em ``value``.',
+    )
+    parameters: dict[str, ParameterRange]
+    dataset: str = Field(..., description="Arquivo CSV ou Parquet com OHLCV, relativo a BACKTEST_DATA_DIR.")
+    horizon: int = Field(5, gt=0, description="Candles à frente usados para medir o retorno.")
+    rank_by: Literal["mean_return", "hit_rate", "triggers"] = "mean_return"
+    min_triggers: int = Field(1, ge=0, description="Pontos com menos disparos vão para o fim do ranking.")
+    top: int = Field(20, ge=1)
+
+
+class SweepPoint(BaseModel):
+    params: dict[str, float]
+    triggers: int
+    samples: int
+    mean_return: float | None = None
+    hit_rate: float | None = None
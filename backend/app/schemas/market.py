@@ -1,10 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
-class CandleIn(BaseModel):
-    symbol: str
-    timeframe: str = Field(..., pattern="M[0-9]+")
+class BarIn(BaseModel):
     open: float = Field(..., gt=0)
     high: float = Field(..., gt=0)
     low: float = Field(..., gt=0)
@@ -12,3 +10,32 @@ class CandleIn(BaseModel):
     volume: float = Field(..., ge=0)
     timestamp: datetime
 
+
+class CandleIn(BarIn):
+    symbol: str
+    timeframe: str = Field(..., pattern="M[0-9]+")
+
+
+class CandleHistoryIn(BaseModel):
+    symbol: str
+    timeframe: str = Field(..., pattern="M[0-9]+")
+    candles: list[BarIn] = Field(default_factory=list, description="Candles em ordem cronológica.")
+
+
+class TickIn(BaseModel):
+    """Negócio (``price``) ou cotação (``bid``/``ask``, usa-se o preço médio) de um símbolo."""
+
+    symbol: str
+    timestamp: datetime
+    price: float | None = Field(None, gt=0)
+    bid: float | None = Field(None, gt=0)
+    ask: float | None = Field(None, gt=0)
+    volume: float = Field(0.0, ge=0)
+
+    @model_validator(mode="after")
+    def _require_price(self) -> "TickIn":
+        if self.price is None:
+            if self.bid is None or self.ask is None:
+                raise ValueError("Tick requer price ou bid e ask.")
+            self.price = (self.bid + self.ask) / 2
+        return self
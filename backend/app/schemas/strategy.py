@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Literal, Sequence
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, validator
 
@@ -43,7 +43,16 @@ class StrategyCondition(BaseModel):
 class Strategy(BaseModel):
     name: str
     logic: LogicGate = LogicGate.ALL
-    conditions: Sequence[StrategyCondition]
+    conditions: list[StrategyCondition]
+    sequence_window: int = Field(
+        default=5, ge=1, description="Em SEQUENCE, máximo de candles entre uma condição e a seguinte."
+    )
+    cooldown_seconds: int = Field(
+        default=0, ge=0, description="Tempo (s, pelos candles) sem novos alertas do mesmo ativo após um alerta; 0 desativa."
+    )
+    edge_trigger: bool = Field(
+        default=False, description="Alerta só quando a condição passa a valer, não a cada candle em que continua verdadeira."
+    )
     symbols: list[str] = Field(default_factory=list, description="Ativos monitorados.")
     timeframe: Literal["M1", "M5", "M15"] = "M1"
 
@@ -55,7 +64,10 @@ class StrategyCreate(Strategy):
 class StrategyUpdate(BaseModel):
     name: str | None = None
     logic: LogicGate | None = None
-    conditions: Sequence[StrategyCondition] | None = None
+    conditions: list[StrategyCondition] | None = None
+    sequence_window: int | None = Field(default=None, ge=1)
+    cooldown_seconds: int | None = Field(default=None, ge=0)
+    edge_trigger: bool | None = None
     symbols: list[str] | None = None
     timeframe: Literal["M1", "M5", "M15"] | None = None
     is_active: bool | None = None
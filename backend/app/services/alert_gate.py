@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict
+
+from app.indicators.buffer import timeframe_ns
+from app.schemas.strategy import StrategyRead
+
+# Timestamp "nunca": qualquer candle está a mais de um período e de um cooldown dele
+_NEVER = -(2**62)
+_LAST_HIT, _LAST_ALERT = range(2)
+
+
+@dataclass
+class GateMetrics:
+    passed: int = 0
+    # Disparos com a condição ainda verdadeira desde o candle anterior (modo borda)
+    repeated: int = 0
+    # Disparos dentro do cooldown do último alerta do par
+    cooldown: int = 0
+
+
+class AlertGate:
+    """Decide se o disparo de uma estratégia em um ativo vira alerta.
+
+    Roda antes de qualquer modelo Pydantic, mensagem ou evento: a decisão usa só
+    o timestamp do candle e dois inteiros por par estratégia×ativo (último
+    disparo e último alerta, em ns). Com ``edge_trigger`` só alerta quando a
+    condição passa a valer, isto é, quando não disparou no candle anterior; com
+    ``cooldown_seconds`` suprime disparos até o tempo passar desde o último
+    alerta do par. Estratégias sem nenhum dos dois não guardam estado.
+    """
+
+    def __init__(self) -> None:
+        self._pairs: Dict[int, Dict[str, list[int]]] = {}
+        self._periods: Dict[str, int] = {}
+        self.metrics = GateMetrics()
+        self.suppressed: Counter[int] = Counter()
+
+    def __len__(self) -> int:
+        return sum(len(symbols) for symbols in self._pairs.values())
+
+    def admit(self, strategy: StrategyRead, symbol: str, timeframe: str, timestamp: int) -> bool:
+        """Registra o disparo do candle ``timestamp`` (ns) e diz se ele deve gerar alerta."""
+        if not strategy.edge_trigger and not strategy.cooldown_seconds:
+            self.metrics.passed += 1
+            return True
+        symbols = self._pairs.get(strategy.id)
+        if symbols is None:
+            symbols = self._pairs[strategy.id] = {}
+        state = symbols.get(symbol)
+        if state is None:
+            state = symbols[symbol] = [_NEVER, _NEVER]
+
+        last_hit = state[_LAST_HIT]
+        state[_LAST_HIT] = timestamp
+        if strategy.edge_trigger and timestamp - last_hit <= self._period(timeframe):
+            self.metrics.repeated += 1
+            self.suppressed[strategy.id] += 1
+            return False
+        if timestamp - state[_LAST_ALERT] < strategy.cooldown_seconds * 1_000_000_000:
+            self.metrics.cooldown += 1
+            self.suppressed[strategy.id] += 1
+            return False
+        state[_LAST_ALERT] = timestamp
+        self.metrics.passed += 1
+        return True
+
+    def forget(self, strategy_id: int) -> None:
+        """Descarta o estado da estratégia (removida ou alterada)."""
+        self._pairs.pop(strategy_id, None)
+        self.suppressed.pop(strategy_id, None)
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            **self.metrics.__dict__,
+            "suppressed": self.metrics.repeated + self.metrics.cooldown,
+            "pairs": len(self),
+            "suppressed_by_strategy": {str(strategy_id): count for strategy_id, count in self.suppressed.most_common(20)},
+        }
+
+    def _period(self, timeframe: str) -> int:
+        period = self._periods.get(timeframe)
+        if period is None:
+            period = self._periods[timeframe] = timeframe_ns(timeframe)
+        return period
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.schemas.alert import AlertRead
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    strategy_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    price REAL NOT NULL,
+    indicator_snapshot TEXT NOT NULL,
+    triggered_at TEXT NOT NULL,
+    telegram_message_id TEXT
+)
+"""
+_INSERT = "INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_ATTACH = "UPDATE alerts SET telegram_message_id = ? WHERE id = ?"
+_COLUMNS = "id, strategy_id, symbol, timeframe, price, indicator_snapshot, triggered_at, telegram_message_id"
+
+# Máximo de operações agrupadas em uma transação
+_BATCH = 2048
+_STOP = object()
+
+
+class AlertLog:
+    """Log durável de alertas em SQLite (modo WAL).
+
+    Gravações são enfileiradas sem bloquear o event loop e aplicadas por uma
+    thread dedicada, que agrupa tudo o que estiver pendente em uma única
+    transação (group commit). A cada ``compact_every`` inserções os registros
+    além de ``retention`` são removidos e o WAL é reciclado.
+    """
+
+    def __init__(self, path: str | Path, retention: int = 1_000_000, compact_every: int = 10_000) -> None:
+        self.path = Path(path)
+        self.retention = retention
+        self.compact_every = compact_every
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._connection = self._connect()
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+        self._since_compaction = 0
+        self.written = 0
+        self.commits = 0
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name="alert-log-writer", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e encerra a thread; bloqueante."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        self._connection.close()
+
+    def append(self, alert: AlertRead) -> None:
+        self._queue.put(
+            (
+                _INSERT,
+                (
+                    alert.id,
+                    alert.strategy_id,
+                    alert.symbol,
+                    alert.timeframe,
+                    alert.price,
+                    json.dumps(alert.indicator_snapshot),
+                    alert.triggered_at.isoformat(),
+                    alert.telegram_message_id,
+                ),
+            )
+        )
+
+    def attach_telegram_message(self, alert_id: int, message_id: str) -> None:
+        self._queue.put((_ATTACH, (message_id, alert_id)))
+
+    def flush(self) -> Future:
+        """Future resolvido quando tudo o que foi enfileirado até aqui estiver gravado."""
+        future: Future = Future()
+        self._queue.put(future)
+        return future
+
+    def tail(self, limit: int) -> list[AlertRead]:
+        """Os ``limit`` alertas mais recentes, em ordem crescente de id.
+
+        Usa a conexão principal, portanto deve ser chamado antes de ``start``.
+        """
+        rows = self._connection.execute(
+            f"SELECT {_COLUMNS} FROM alerts ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._to_alert(row) for row in reversed(rows)]
+
+    def max_id(self) -> int:
+        return self._connection.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Com WAL, NORMAL só sincroniza no checkpoint: durável contra falhas do processo
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_loop(self) -> None:
+        connection = self._connection
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < _BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            waiters: list[Future] = []
+            operations: list[tuple[str, list[tuple]]] = []
+            for item in batch:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, Future):
+                    waiters.append(item)
+                elif operations and operations[-1][0] == item[0]:
+                    operations[-1][1].append(item[1])
+                else:
+                    operations.append((item[0], [item[1]]))
+
+            try:
+                if operations:
+                    connection.execute("BEGIN")
+                    for statement, rows in operations:
+                        connection.executemany(statement, rows)
+                        if statement == _INSERT:
+                            self.written += len(rows)
+                            self._since_compaction += len(rows)
+                    connection.execute("COMMIT")
+                    self.commits += 1
+                if self._since_compaction >= self.compact_every:
+                    self._compact()
+            except sqlite3.Error:
+                logger.exception("Falha ao gravar alertas no log")
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+            for waiter in waiters:
+                waiter.set_result(None)
+
+    def _compact(self) -> None:
+        self._since_compaction = 0
+        self._connection.execute(
+            "DELETE FROM alerts WHERE id <= (SELECT MAX(id) FROM alerts) - ?", (self.retention,)
+        )
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @staticmethod
+    def _to_alert(row: tuple) -> AlertRead:
+        alert_id, strategy_id, symbol, timeframe, price, snapshot, triggered_at, message_id = row
+        return AlertRead(
+            id=alert_id,
+            strategy_id=strategy_id,
+            symbol=symbol,
+            timeframe=timeframe,
+            price=price,
+            indicator_snapshot=json.loads(snapshot),
+            triggered_at=datetime.fromisoformat(triggered_at),
+            telegram_message_id=message_id,
+        )
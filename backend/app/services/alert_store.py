@@ -1,26 +1,95 @@
 from __future__ import annotations
 
-from collections import deque
+from bisect import bisect_left
 from datetime import datetime
 from itertools import count
-from typing import Deque, Iterable
+from typing import Dict, Iterable, Iterator
 
+from app.core.config import get_settings
 from app.schemas.alert import AlertCreate, AlertRead
+from app.services.alert_log import AlertLog
+
+
+class _IdIndex:
+    """Ids em ordem crescente sobre uma lista com cabeça móvel.
+
+    Como a retenção sempre remove o alerta mais antigo, remoções acontecem só no
+    início: avançar ``head`` é O(1) e a lista é compactada de forma amortizada.
+    """
+
+    __slots__ = ("ids", "head")
+
+    def __init__(self) -> None:
+        self.ids: list[int] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.ids) - self.head
+
+    def append(self, alert_id: int) -> None:
+        self.ids.append(alert_id)
+
+    def popleft(self) -> int:
+        alert_id = self.ids[self.head]
+        self.head += 1
+        if self.head >= 1024 and self.head * 2 >= len(self.ids):
+            del self.ids[: self.head]
+            self.head = 0
+        return alert_id
 
 
 class AlertStore:
-    """Armazenamento circular para logs de alertas."""
+    """Armazenamento circular para logs de alertas.
+
+    Mantém índices por estratégia e por ativo; dentro de cada índice os ids
+    (e portanto ``triggered_at``) são crescentes, o que permite paginar por
+    cursor e filtrar por ``since`` com busca binária, lendo apenas os alertas
+    que entram na página. Com um ``AlertLog`` anexado, cada alerta também é
+    gravado em disco, sem bloquear quem o criou.
+    """
 
     _id_counter = count(1)
 
     def __init__(self, maxlen: int = 500) -> None:
-        self._alerts: Deque[AlertRead] = deque(maxlen=maxlen)
+        self.maxlen = maxlen
+        self._alerts: Dict[int, AlertRead] = {}
+        self._order = _IdIndex()
+        self._by_strategy: Dict[int, _IdIndex] = {}
+        self._by_symbol: Dict[str, _IdIndex] = {}
+        self._last_triggered = datetime.min
+        self._log: AlertLog | None = None
+
+    def __len__(self) -> int:
+        return len(self._alerts)
 
     def list(self) -> Iterable[AlertRead]:
-        return list(self._alerts)
+        return [self._alerts[alert_id] for alert_id in self._newest(self._order)]
+
+    def get(self, alert_id: int) -> AlertRead | None:
+        return self._alerts.get(alert_id)
+
+    def attach_log(self, log: AlertLog) -> int:
+        """Recarrega do log apenas a janela retida e passa a gravar nele; retorna alertas lidos."""
+        alerts = log.tail(self.maxlen)
+        for alert in alerts:
+            if alert.id not in self._alerts:
+                self._insert(alert)
+        last_id = max(log.max_id(), max(self._alerts, default=0))
+        # Ids continuam de onde o log parou
+        self._id_counter = count(last_id + 1)
+        self._log = log
+        log.start()
+        return len(alerts)
+
+    def detach_log(self) -> AlertLog | None:
+        log, self._log = self._log, None
+        return log
 
     def create(self, payload: AlertCreate) -> AlertRead:
         alert_id = next(self._id_counter)
+        # ``triggered_at`` nunca retrocede, mantendo os índices ordenados no tempo
+        triggered_at = max(datetime.utcnow(), self._last_triggered)
+        self._last_triggered = triggered_at
         data = AlertRead(
             id=alert_id,
             strategy_id=payload.strategy_id,
@@ -28,11 +97,83 @@ class AlertStore:
             timeframe=payload.timeframe,
             price=payload.price,
             indicator_snapshot=payload.indicator_snapshot,
-            triggered_at=datetime.utcnow(),
+            triggered_at=triggered_at,
             telegram_message_id=payload.telegram_message_id,
         )
-        self._alerts.appendleft(data)
+        self._insert(data)
+        if self._log is not None:
+            self._log.append(data)
         return data
 
+    def attach_telegram_message(self, alert_id: int, message_id: str) -> AlertRead | None:
+        alert = self._alerts.get(alert_id)
+        if alert is not None:
+            alert.telegram_message_id = message_id
+        if self._log is not None:
+            self._log.attach_telegram_message(alert_id, message_id)
+        return alert
+
+    def query(
+        self,
+        symbol: str | None = None,
+        strategy_id: int | None = None,
+        since: datetime | None = None,
+        cursor: int | None = None,
+        limit: int = 50,
+    ) -> tuple[list[AlertRead], int | None]:
+        """Alertas mais recentes primeiro; retorna a página e o cursor da próxima.
+
+        ``cursor`` é o id do último alerta da página anterior.
+        """
+        candidates = [self._order]
+        if symbol is not None:
+            candidates.append(self._by_symbol.get(symbol, _IdIndex()))
+        if strategy_id is not None:
+            candidates.append(self._by_strategy.get(strategy_id, _IdIndex()))
+        index = min(candidates, key=len)
+
+        page: list[AlertRead] = []
+        for alert_id in self._newest(index, since, cursor):
+            alert = self._alerts[alert_id]
+            if symbol is not None and alert.symbol != symbol:
+                continue
+            if strategy_id is not None and alert.strategy_id != strategy_id:
+                continue
+            if len(page) == limit:
+                return page, page[-1].id
+            page.append(alert)
+        return page, None
+
+    def _newest(
+        self, index: _IdIndex, since: datetime | None = None, cursor: int | None = None
+    ) -> Iterator[int]:
+        ids, head = index.ids, index.head
+        end = len(ids) if cursor is None else bisect_left(ids, cursor, lo=head)
+        start = head
+        if since is not None:
+            alerts = self._alerts
+            start = bisect_left(ids, since, lo=head, hi=end, key=lambda alert_id: alerts[alert_id].triggered_at)
+        for position in range(end - 1, start - 1, -1):
+            yield ids[position]
+
+    def _insert(self, data: AlertRead) -> None:
+        alert_id = data.id
+        self._alerts[alert_id] = data
+        self._order.append(alert_id)
+        self._by_strategy.setdefault(data.strategy_id, _IdIndex()).append(alert_id)
+        self._by_symbol.setdefault(data.symbol, _IdIndex()).append(alert_id)
+        self._last_triggered = max(self._last_triggered, data.triggered_at)
+        while len(self._alerts) > self.maxlen:
+            self._evict()
+
+    def _evict(self) -> None:
+        alert_id = self._order.popleft()
+        alert = self._alerts.pop(alert_id)
+        for indexes, key in ((self._by_strategy, alert.strategy_id), (self._by_symbol, alert.symbol)):
+            index = indexes[key]
+            index.popleft()
+            if not index:
+                del indexes[key]
+
 
-alert_store = AlertStore()
+alert_store = AlertStore(maxlen=get_settings().alert_retention)
@@ -0,0 +1,149 @@
+"""Backtest vetorizado de estratégias sobre histórico OHLCV.
+
+Uso pela linha de comando, a partir de ``backend/``::
+
+    python -m app.services.backtest estrategia.json historico.csv [--horizons 1 5 15]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.indicators.registry import SOURCES, IndicatorPlan, registry
+from app.rules.vectorized import strategy_signal
+from app.schemas.backtest import BacktestResult, HorizonStats
+from app.schemas.strategy import Strategy
+from app.services.market_shard import indicator_paths
+
+TIMESTAMP_COLUMNS = ("timestamp", "time", "date", "datetime")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def load_history(path: str | Path) -> pd.DataFrame:
+    """Lê OHLCV de CSV ou Parquet em um DataFrame indexado pelo tempo, em ordem cronológica.
+
+    ``volume`` é opcional (zero quando ausente); a coluna de tempo pode se
+    chamar ``timestamp``, ``time``, ``date`` ou ``datetime``.
+    """
+    path = Path(path)
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        try:
+            frame = pd.read_parquet(path)
+        except ImportError as exc:
+            raise ValueError("Leitura de Parquet requer pyarrow ou fastparquet.") from exc
+    else:
+        frame = pd.read_csv(path)
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+
+    timestamp = next((column for column in TIMESTAMP_COLUMNS if column in frame.columns), None)
+    if timestamp is not None:
+        frame = frame.set_index(timestamp)
+    if not isinstance(frame.index, pd.DatetimeIndex):
+        try:
+            frame.index = pd.to_datetime(frame.index)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Coluna de tempo inválida em {path.name}: {exc}") from exc
+    if frame.index.tz is not None:
+        frame.index = frame.index.tz_convert("UTC").tz_localize(None)
+    frame.index.name = "timestamp"
+
+    if "volume" not in frame.columns:
+        frame["volume"] = 0.0
+    missing = [column for column in SOURCES if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Colunas ausentes em {path.name}: {', '.join(missing)}")
+    return frame.loc[:, list(SOURCES)].astype(np.float64).sort_index(kind="stable")
+
+
+def run_backtest(strategy: Strategy, history: pd.DataFrame, horizons: Sequence[int] = (1, 5, 15)) -> BacktestResult:
+    """Avalia a estratégia em todo o histórico de uma vez.
+
+    Os indicadores são calculados como colunas por ``IndicatorPlan.frame`` e as
+    condições como vetores booleanos; os disparos coincidem com os de um
+    replay candle a candle pelo ``ConfluenceEngine`` a partir de um estado vazio.
+    """
+    if any(horizon <= 0 for horizon in horizons):
+        raise ValueError("Horizontes devem ser positivos.")
+    started = time.perf_counter()
+    paths = indicator_paths(strategy)
+    registry.validate(paths)
+
+    size = len(history)
+    columns = [history[name].to_numpy(dtype=np.float64) for name in SOURCES]
+    indicators = IndicatorPlan(paths).frame(columns) if size else {}
+    positions = signal_positions(strategy, columns, indicators)
+    stats = horizon_stats(positions, columns[3], horizons)
+
+    index = history.index
+    return BacktestResult(
+        candles=size,
+        start=index[0].to_pydatetime() if size else None,
+        end=index[-1].to_pydatetime() if size else None,
+        triggers=list(index[positions].to_pydatetime()),
+        trigger_rate=len(positions) / size if size else 0.0,
+        stats=stats,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def signal_positions(
+    strategy: Strategy,
+    columns: Sequence[np.ndarray],
+    indicators: Mapping[str, np.ndarray],
+    cache: dict[tuple, np.ndarray] | None = None,
+) -> np.ndarray:
+    """Índices dos candles em que a estratégia dispara, dadas as colunas OHLCV e as séries de indicadores."""
+    # O contexto de preço do stream só expõe OHLC
+    price = dict(zip(("open", "high", "low", "close"), columns))
+    return np.flatnonzero(strategy_signal(strategy, price, indicators, len(columns[0]), cache))
+
+
+def horizon_stats(positions: np.ndarray, closes: np.ndarray, horizons: Sequence[int]) -> list[HorizonStats]:
+    """Retorno do fechamento ``horizon`` candles após cada disparo."""
+    size = len(closes)
+    stats = []
+    for horizon in horizons:
+        entries = positions[positions + horizon < size]
+        if len(entries):
+            returns = closes[entries + horizon] / closes[entries] - 1
+            stats.append(
+                HorizonStats(
+                    horizon=horizon,
+                    samples=len(entries),
+                    mean_return=float(returns.mean()),
+                    hit_rate=float((returns > 0).mean()),
+                )
+            )
+        else:
+            stats.append(HorizonStats(horizon=horizon, samples=0))
+    return stats
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest vetorizado de uma estratégia sobre histórico OHLCV.")
+    parser.add_argument("strategy", type=Path, help="JSON da estratégia (mesmo formato do POST /strategies).")
+    parser.add_argument("history", type=Path, help="Arquivo CSV ou Parquet com OHLCV.")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 5, 15])
+    parser.add_argument("--triggers", action="store_true", help="Inclui os horários de cada disparo na saída.")
+    args = parser.parse_args(argv)
+
+    try:
+        strategy = Strategy.model_validate(json.loads(args.strategy.read_text()))
+        result = run_backtest(strategy, load_history(args.history), args.horizons)
+    except (OSError, ValueError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    exclude = None if args.triggers else {"triggers"}
+    print(result.model_dump_json(indent=2, exclude=exclude))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
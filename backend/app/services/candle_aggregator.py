@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import Dict, Iterable, Sequence
+
+from app.indicators.buffer import timeframe_ns, to_epoch_ns
+from app.indicators.engine import Candle
+
+
+@dataclass(slots=True)
+class _Bar:
+    """Barra em formação de um timeframe derivado; ``bucket`` é o início em ns."""
+
+    bucket: int
+    candle: Candle
+
+
+@dataclass
+class AggregatorMetrics:
+    closed: int = 0
+    # Barras fechadas por um candle de outro período antes de receber o último candle do seu
+    incomplete: int = 0
+    # Contado por timeframe de destino
+    stale: int = 0
+
+
+class CandleAggregator:
+    """Consolida candles de um timeframe menor em timeframes maiores, incrementalmente.
+
+    Cada chave symbol:timeframe de destino guarda apenas a barra em formação.
+    Os períodos são alinhados à época (M5 começa em :00, :05...) e o timestamp
+    da barra é o início do período. Uma barra é emitida quando chega o candle
+    que completa o período ou, havendo lacuna, quando chega um candle de um
+    período seguinte; períodos sem nenhum candle não geram barras. Candles com
+    timestamp não posterior ao último consolidado na chave são ignorados.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = ("M5", "M15")) -> None:
+        self.timeframes = tuple(sorted(dict.fromkeys(timeframes), key=timeframe_ns))
+        self._sizes = {timeframe: timeframe_ns(timeframe) for timeframe in self.timeframes}
+        self._bars: Dict[tuple[str, str], _Bar] = {}
+        self._last: Dict[tuple[str, str], int] = {}
+        self.metrics = AggregatorMetrics()
+
+    def targets(self, timeframe: str) -> tuple[str, ...]:
+        """Timeframes derivados de ``timeframe``: maiores e múltiplos da sua duração."""
+        try:
+            source = timeframe_ns(timeframe)
+        except ValueError:
+            return ()
+        return tuple(target for target, size in self._sizes.items() if size > source and size % source == 0)
+
+    def update(self, symbol: str, timeframe: str, candles: Sequence[Candle]) -> dict[str, list[Candle]]:
+        """Incorpora um lote ordenado da chave de origem; retorna as barras fechadas por destino."""
+        targets = self.targets(timeframe)
+        if not targets or not candles:
+            return {}
+        source = timeframe_ns(timeframe)
+        timestamps = [to_epoch_ns(candle.timestamp) for candle in candles]
+        return {target: self._roll(symbol, target, source, candles, timestamps) for target in targets}
+
+    def partial(self, symbol: str, timeframe: str) -> Candle | None:
+        """Barra ainda em formação da chave de destino, se houver."""
+        bar = self._bars.get((symbol, timeframe))
+        return None if bar is None else replace(bar.candle)
+
+    def snapshot(self) -> dict[str, object]:
+        return {"timeframes": list(self.timeframes), "open_bars": len(self._bars), **self.metrics.__dict__}
+
+    def reset(self, symbol: str | None = None) -> None:
+        for key in [key for key in self._bars if symbol is None or key[0] == symbol]:
+            del self._bars[key]
+        for key in [key for key in self._last if symbol is None or key[0] == symbol]:
+            del self._last[key]
+
+    def _roll(
+        self, symbol: str, target: str, source: int, candles: Sequence[Candle], timestamps: list[int]
+    ) -> list[Candle]:
+        key = (symbol, target)
+        size = self._sizes[target]
+        bar = self._bars.pop(key, None)
+        last = self._last.get(key)
+        closed: list[Candle] = []
+        for candle, timestamp in zip(candles, timestamps):
+            if last is not None and timestamp <= last:
+                self.metrics.stale += 1
+                continue
+            last = timestamp
+            bucket = timestamp - timestamp % size
+            if bar is not None and bar.bucket != bucket:
+                # Lacuna: o período anterior termina sem o seu último candle
+                closed.append(bar.candle)
+                self.metrics.incomplete += 1
+                bar = None
+            if bar is None:
+                start = candle.timestamp - timedelta(microseconds=(timestamp - bucket) // 1000)
+                bar = _Bar(bucket, Candle(start, candle.open, candle.high, candle.low, candle.close, candle.volume))
+            else:
+                merged = bar.candle
+                merged.high = max(merged.high, candle.high)
+                merged.low = min(merged.low, candle.low)
+                merged.close = candle.close
+                merged.volume += candle.volume
+            if timestamp + source >= bucket + size:
+                closed.append(bar.candle)
+                bar = None
+        if bar is not None:
+            self._bars[key] = bar
+        if last is not None:
+            self._last[key] = last
+        self.metrics.closed += len(closed)
+        return closed
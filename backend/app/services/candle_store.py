@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Sequence
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from app.indicators.buffer import COLUMNS, CandleWindow, to_epoch_ns
+from app.indicators.engine import Candle
+
+# Arquivo de cada coluna dentro do diretório da chave, com o tipo gravado
+_FILES = (("timestamps", np.dtype("<i8")), *((name, np.dtype("<f8")) for name in COLUMNS))
+_ROW_BYTES = 8
+
+
+@dataclass
+class _Series:
+    """Arquivos colunares de uma chave symbol:timeframe e seus mapeamentos de leitura."""
+
+    directory: Path
+    fds: list[int]
+    count: int
+    last: int
+    maps: list[np.ndarray] = field(default_factory=list)
+
+    @property
+    def mapped(self) -> int:
+        return len(self.maps[0]) if self.maps else 0
+
+
+class CandleStore:
+    """Histórico de candles em disco, um arquivo binário por coluna e por chave.
+
+    Candles são acrescentados ao fim dos arquivos (``timestamps`` int64 em ns e
+    OHLCV float64, a mesma disposição do ``CandleBuffer``); leituras mapeiam os
+    arquivos em memória e devolvem visões sem cópia. Como os timestamps de uma
+    chave são estritamente crescentes, a própria coluna de tempo é o índice:
+    consultas por intervalo são duas buscas binárias.
+
+    Candles atrasados seguem as mesmas regras do ``IndicatorEngine``: duplicatas
+    exatas são ignoradas, e uma versão nova de um horário gravado ou um horário
+    ausente entre os últimos ``correction_window`` candles reescreve a linha ou o
+    sufixo no lugar, para que o aquecimento após um reinício use as barras
+    corrigidas. Correções mais antigas são ignoradas.
+
+    As gravações vão para o page cache sem ``fsync``: sobrevivem a uma queda do
+    processo, não necessariamente à do sistema.
+    """
+
+    def __init__(self, root: str | Path, correction_window: int = 64) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.correction_window = max(correction_window, 0)
+        self._series: Dict[tuple[str, str], _Series] = {}
+        self.appended = 0
+        self.corrected = 0
+        self.skipped = 0
+
+    def keys(self) -> list[tuple[str, str]]:
+        keys = set(self._series)
+        for directory in self.root.glob("*/*"):
+            if directory.is_dir():
+                keys.add((unquote(directory.parent.name), unquote(directory.name)))
+        return sorted(keys)
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        series = self._open(symbol, timeframe)
+        return 0 if series is None else series.count
+
+    def append(self, symbol: str, timeframe: str, candle: Candle) -> bool:
+        return self.append_many(symbol, timeframe, [candle]) == 1
+
+    def append_many(self, symbol: str, timeframe: str, candles: Sequence[Candle]) -> int:
+        """Grava os candles da chave, os novos com uma escrita por coluna; retorna quantos entraram.
+
+        Candles não posteriores ao último gravado são tratados como duplicata ou
+        correção, na ordem em que chegam no lote.
+        """
+        if not candles:
+            return 0
+        series = self._open(symbol, timeframe, create=True)
+        timestamps = np.fromiter((to_epoch_ns(c.timestamp) for c in candles), dtype=np.int64, count=len(candles))
+        late = timestamps <= np.maximum.accumulate(np.concatenate(([series.last], timestamps[:-1])))
+        accepted = 0
+        run = 0
+        for index in np.flatnonzero(late).tolist():
+            # Grava antes os novos que o precedem: a correção pode ser de um deles
+            accepted += self._append(series, candles[run:index], timestamps[run:index])
+            accepted += self._correct(series, int(timestamps[index]), candles[index])
+            run = index + 1
+        return accepted + self._append(series, candles[run:], timestamps[run:])
+
+    def range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int | None = None,
+    ) -> CandleWindow:
+        """Candles com ``start <= timestamp <= end`` como visões somente leitura do mapeamento.
+
+        Com ``limit``, ficam os primeiros a partir de ``start`` ou, sem ``start``,
+        os mais recentes até ``end``.
+        """
+        window = self._window(symbol, timeframe)
+        timestamps = window.timestamps
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_epoch_ns(start), side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, to_epoch_ns(end), side="right"))
+        if limit is not None and hi - lo > limit:
+            if start is None:
+                lo = hi - limit
+            else:
+                hi = lo + limit
+        return _slice(window, lo, max(lo, hi))
+
+    def tail(self, symbol: str, timeframe: str, size: int) -> CandleWindow:
+        window = self._window(symbol, timeframe)
+        return _slice(window, max(len(window) - size, 0), len(window))
+
+    def close(self) -> None:
+        for series in self._series.values():
+            for fd in series.fds:
+                os.close(fd)
+        self._series.clear()
+
+    def _open(self, symbol: str, timeframe: str, create: bool = False) -> _Series | None:
+        """Abre os arquivos da chave; sem ``create``, uma chave nunca gravada dá ``None`` sem tocar o disco."""
+        key = (symbol, timeframe)
+        series = self._series.get(key)
+        if series is not None:
+            return series
+        directory = self.root / quote(symbol, safe="") / quote(timeframe, safe="")
+        if not create and not directory.is_dir():
+            return None
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = [directory / f"{name}.bin" for name, _ in _FILES]
+        fds = [os.open(path, os.O_RDWR | os.O_CREAT, 0o644) for path in paths]
+        # Uma gravação interrompida pode deixar colunas mais longas: vale a menor
+        count = min(os.fstat(fd).st_size for fd in fds) // _ROW_BYTES
+        for fd in fds:
+            if os.fstat(fd).st_size != count * _ROW_BYTES:
+                os.ftruncate(fd, count * _ROW_BYTES)
+        last = np.iinfo(np.int64).min
+        if count:
+            last = int(np.fromfile(paths[0], dtype="<i8", offset=(count - 1) * _ROW_BYTES, count=1)[0])
+        series = self._series[key] = _Series(directory, fds, count, last)
+        return series
+
+    def _append(self, series: _Series, candles: Sequence[Candle], timestamps: np.ndarray) -> int:
+        if not candles:
+            return 0
+        values = np.array([(c.open, c.high, c.low, c.close, c.volume) for c in candles], dtype="<f8").reshape(-1, 5)
+        offset = series.count * _ROW_BYTES
+        for fd, column in zip(series.fds, [timestamps.astype("<i8"), *values.T]):
+            os.pwrite(fd, np.ascontiguousarray(column).tobytes(), offset)
+        series.count += len(candles)
+        series.last = int(timestamps[-1])
+        self.appended += len(candles)
+        return len(candles)
+
+    def _correct(self, series: _Series, timestamp: int, candle: Candle) -> int:
+        """Substitui a linha do horário ou insere o candle, se estiver na janela de correção."""
+        size = min(series.count, self.correction_window)
+        start = series.count - size
+        recent = np.frombuffer(os.pread(series.fds[0], size * _ROW_BYTES, start * _ROW_BYTES), dtype="<i8")
+        position = int(np.searchsorted(recent, timestamp))
+        exists = position < size and int(recent[position]) == timestamp
+        if not exists and position == 0 and start > 0:
+            self.skipped += 1
+            return 0
+        index = start + position
+        row = np.array([timestamp], dtype="<i8").tobytes() + np.array(
+            [candle.open, candle.high, candle.low, candle.close, candle.volume], dtype="<f8"
+        ).tobytes()
+        offset = index * _ROW_BYTES
+        if exists:
+            stored = b"".join(os.pread(fd, _ROW_BYTES, offset) for fd in series.fds)
+            if stored == row:
+                self.skipped += 1
+                return 0
+            for column, fd in enumerate(series.fds):
+                os.pwrite(fd, row[column * _ROW_BYTES : (column + 1) * _ROW_BYTES], offset)
+        else:
+            # Desloca o sufixo (no máximo ``correction_window`` linhas) uma posição adiante
+            length = (series.count - index) * _ROW_BYTES
+            for column, fd in enumerate(series.fds):
+                suffix = os.pread(fd, length, offset)
+                os.pwrite(fd, row[column * _ROW_BYTES : (column + 1) * _ROW_BYTES] + suffix, offset)
+            series.count += 1
+        self.corrected += 1
+        return 1
+
+    def _window(self, symbol: str, timeframe: str) -> CandleWindow:
+        series = self._open(symbol, timeframe)
+        if series is None or series.count == 0:
+            return CandleWindow(np.empty(0, np.int64), *(np.empty(0) for _ in COLUMNS))
+        if series.mapped != series.count:
+            # O arquivo cresceu desde o último mapeamento
+            series.maps = [
+                np.memmap(series.directory / f"{name}.bin", dtype=dtype, mode="r", shape=(series.count,))
+                for name, dtype in _FILES
+            ]
+        return CandleWindow(*series.maps)
+
+
+def _slice(window: CandleWindow, lo: int, hi: int) -> CandleWindow:
+    return CandleWindow(*(getattr(window, name)[lo:hi] for name in ("timestamps", *COLUMNS)))
+
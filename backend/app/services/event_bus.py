@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Dict, List
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable
 
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
 
 Subscriber = Callable[[dict[str, Any]], Awaitable[None]]
 
@@ -14,28 +21,235 @@ class Event:
     payload: dict[str, Any]
 
 
+class DeliveryMode(str, Enum):
+    # Nunca descarta: com a fila cheia o publicador aguarda espaço
+    RELIABLE = "reliable"
+    DROP_OLDEST = "drop_oldest"
+    # Mantém apenas o valor mais recente pendente por chave
+    CONFLATE = "conflate"
+
+
+@dataclass(frozen=True)
+class EventPolicy:
+    mode: DeliveryMode = DeliveryMode.DROP_OLDEST
+    key: Callable[[dict[str, Any]], Hashable] | None = None
+
+
+def _tick_key(payload: dict[str, Any]) -> Hashable:
+    return payload.get("symbol"), payload.get("timeframe")
+
+
+DEFAULT_POLICIES: Dict[str, EventPolicy] = {
+    "market.tick": EventPolicy(DeliveryMode.CONFLATE, key=_tick_key),
+    "alert.triggered": EventPolicy(DeliveryMode.RELIABLE),
+}
+
+
+@dataclass
+class SubscriberMetrics:
+    delivered: int = 0
+    dropped: int = 0
+    conflated: int = 0
+    errors: int = 0
+    blocked: int = 0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+
+
+@dataclass(slots=True)
+class _Pending:
+    payload: dict[str, Any]
+    enqueued_at: float
+    key: Hashable | None = None
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Fila limitada e tarefa consumidora de um assinante.
+
+    O publicador só enfileira; a entrega (e a lentidão do assinante) fica
+    isolada na tarefa consumidora.
+    """
+
+    event_type: str
+    callback: Subscriber
+    policy: EventPolicy
+    maxsize: int
+    metrics: SubscriberMetrics = field(default_factory=SubscriberMetrics)
+
+    def __post_init__(self) -> None:
+        self._items: Deque[_Pending] = deque()
+        self._by_key: Dict[Hashable, _Pending] = {}
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._task is None or self._task.done()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._consume(), name=f"event-bus-{self.event_type}")
+
+    def offer(self, payload: dict[str, Any]) -> bool:
+        """Enfileira sem bloquear; ``False`` apenas para RELIABLE com a fila cheia."""
+        mode = self.policy.mode
+        key = None
+        if mode is DeliveryMode.CONFLATE and self.policy.key is not None:
+            key = self.policy.key(payload)
+            pending = self._by_key.get(key)
+            if pending is not None:
+                pending.payload = payload
+                self.metrics.conflated += 1
+                return True
+
+        if len(self._items) >= self.maxsize:
+            if mode is DeliveryMode.RELIABLE:
+                return False
+            dropped = self._items.popleft()
+            if dropped.key is not None:
+                del self._by_key[dropped.key]
+            self.metrics.dropped += 1
+
+        entry = _Pending(payload, time.monotonic(), key)
+        self._items.append(entry)
+        if key is not None:
+            self._by_key[key] = entry
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    async def put(self, payload: dict[str, Any]) -> None:
+        if self.offer(payload):
+            return
+        self.metrics.blocked += 1
+        while not self.closed:
+            self._space.clear()
+            await self._space.wait()
+            if self.offer(payload):
+                return
+
+    async def join(self) -> None:
+        """Aguarda a entrega de tudo que já foi enfileirado."""
+        if not self.closed:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._items.clear()
+        self._by_key.clear()
+        self._space.set()
+        self._idle.set()
+
+    def lag_ms(self) -> float:
+        if not self._items:
+            return 0.0
+        return (time.monotonic() - self._items[0].enqueued_at) * 1000
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "event_type": self.event_type,
+            "subscriber": getattr(self.callback, "__qualname__", repr(self.callback)),
+            "mode": self.policy.mode.value,
+            "depth": self.depth,
+            "lag_ms": self.lag_ms(),
+            **self.metrics.__dict__,
+        }
+
+    async def _consume(self) -> None:
+        items = self._items
+        metrics = self.metrics
+        while True:
+            if not items:
+                self._idle.set()
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            entry = items.popleft()
+            if entry.key is not None:
+                del self._by_key[entry.key]
+            self._space.set()
+            lag_ms = (time.monotonic() - entry.enqueued_at) * 1000
+            metrics.last_lag_ms = lag_ms
+            metrics.max_lag_ms = max(metrics.max_lag_ms, lag_ms)
+            try:
+                await self.callback(entry.payload)
+            except Exception:
+                metrics.errors += 1
+                logger.exception("Falha ao entregar evento %s", self.event_type)
+            metrics.delivered += 1
+
+
 class EventBus:
-    def __init__(self) -> None:
-        self._subscribers: Dict[str, List[Subscriber]] = {}
-        self._lock = asyncio.Lock()
+    """Distribui eventos para assinantes, cada um com fila e tarefa próprias.
 
-    async def publish(self, event: Event) -> None:
-        async with self._lock:
-            subscribers = list(self._subscribers.get(event.type, []))
+    A lista de assinantes de cada tipo é uma tupla substituída a cada
+    (des)inscrição, então ``publish`` apenas a lê, sem lock. A política do tipo
+    de evento decide o que acontece quando um assinante não acompanha: ticks são
+    conflacionados por símbolo e alertas nunca são descartados.
+    """
 
-        for subscriber in subscribers:
-            await subscriber(event.payload)
+    def __init__(self, queue_size: int = 1000, policies: Dict[str, EventPolicy] | None = None) -> None:
+        self.queue_size = queue_size
+        self._policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self._subscribers: Dict[str, tuple[Subscription, ...]] = {}
 
-    async def subscribe(self, event_type: str, callback: Subscriber) -> None:
-        async with self._lock:
-            self._subscribers.setdefault(event_type, []).append(callback)
+    def set_policy(self, event_type: str, policy: EventPolicy) -> None:
+        """Vale para inscrições feitas a partir de agora."""
+        self._policies[event_type] = policy
+
+    async def publish(self, event: Event) -> None:
+        for subscription in self._subscribers.get(event.type, ()):
+            if not subscription.offer(event.payload):
+                await subscription.put(event.payload)
+
+    async def subscribe(self, event_type: str, callback: Subscriber) -> Subscription:
+        subscription = Subscription(
+            event_type, callback, self._policies.get(event_type, EventPolicy()), self.queue_size
+        )
+        subscription.start()
+        self._subscribers[event_type] = (*self._subscribers.get(event_type, ()), subscription)
+        return subscription
 
     async def unsubscribe(self, event_type: str, callback: Subscriber) -> None:
-        async with self._lock:
-            if event_type in self._subscribers:
-                self._subscribers[event_type] = [
-                    cb for cb in self._subscribers[event_type] if cb != callback
-                ]
+        subscriptions = self._subscribers.get(event_type, ())
+        removed = [s for s in subscriptions if s.callback == callback]
+        if not removed:
+            return
+        remaining = tuple(s for s in subscriptions if s.callback != callback)
+        if remaining:
+            self._subscribers[event_type] = remaining
+        else:
+            del self._subscribers[event_type]
+        for subscription in removed:
+            await subscription.close()
+
+    async def join(self) -> None:
+        """Aguarda todos os assinantes esvaziarem suas filas."""
+        subscriptions = [s for group in self._subscribers.values() for s in group]
+        await asyncio.gather(*(s.join() for s in subscriptions))
+
+    async def close(self) -> None:
+        subscriptions = [s for group in self._subscribers.values() for s in group]
+        self._subscribers = {}
+        await asyncio.gather(*(s.close() for s in subscriptions))
+
+    def metrics(self) -> dict[str, Any]:
+        subscribers = [s.snapshot() for group in self._subscribers.values() for s in group]
+        return {
+            "queue_size": self.queue_size,
+            "subscribers": subscribers,
+            "dropped": sum(item["dropped"] for item in subscribers),
+            "conflated": sum(item["conflated"] for item in subscribers),
+        }
 
 
-event_bus = EventBus()
+event_bus = EventBus(queue_size=get_settings().event_bus_queue_size)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from app.indicators.buffer import CandleWindow
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine, EvaluationContext
+from app.schemas.strategy import Strategy, StrategyRead
+
+
+def indicator_paths(strategy: Strategy) -> tuple[str, ...]:
+    """Caminhos de indicadores lidos pelas condições da estratégia."""
+    paths = []
+    for condition in strategy.conditions:
+        for operand in (condition.left, condition.right):
+            if operand.source == "indicator" and operand.path:
+                paths.append(operand.path)
+    return tuple(dict.fromkeys(paths))
+
+
+@dataclass(slots=True)
+class Trigger:
+    """Estratégia acionada pelo candle ``index`` de um lote, com os indicadores do candle."""
+
+    strategy_id: int
+    index: int
+    indicators: dict[str, float]
+
+
+@dataclass(slots=True)
+class Processed:
+    """Resultado de um lote: disparos e posição do último candle que avançou a chave.
+
+    ``last`` é -1 quando o lote só trouxe duplicatas ou correções de candles passados.
+    """
+
+    triggers: list[Trigger]
+    last: int
+
+
+class MarketShard:
+    """Parte computacional do stream de mercado: indicadores e regras de um conjunto de símbolos.
+
+    Não publica eventos nem cria alertas; devolve apenas os disparos, o que
+    permite executá-la no processo da API ou em um processo worker.
+    """
+
+    def __init__(self, indicators: IndicatorEngine, rules: ConfluenceEngine) -> None:
+        self.indicators = indicators
+        self.rules = rules
+        self._indicator_paths: Dict[int, tuple[str, ...]] = {}
+
+    def register(self, strategy: StrategyRead) -> None:
+        self.unregister(strategy)
+        self.rules.register(strategy)
+        paths = indicator_paths(strategy)
+        self._indicator_paths[strategy.id] = paths
+        for symbol in strategy.symbols:
+            self.indicators.require(symbol, strategy.timeframe, paths)
+
+    def unregister(self, strategy: StrategyRead) -> None:
+        self.rules.unregister(strategy.id)
+        paths = self._indicator_paths.pop(strategy.id, None)
+        if paths is not None:
+            for symbol in strategy.symbols:
+                self.indicators.release(symbol, strategy.timeframe, paths)
+
+    def process(self, symbol: str, timeframe: str, candles: list[Candle]) -> Processed:
+        # Apenas os indicadores referenciados por estratégias ativas na chave são calculados
+        snapshots = self.indicators.update_many(symbol, timeframe, candles)
+        triggers: list[Trigger] = []
+        last = -1
+        for index, (candle, indicators) in enumerate(zip(candles, snapshots)):
+            # Duplicatas e correções de candles passados só ajustam os indicadores
+            if indicators is None:
+                continue
+            last = index
+            price_context = {
+                "close": candle.close,
+                "open": candle.open,
+                "high": candle.high,
+                "low": candle.low,
+            }
+            # Estratégias inativas não são registradas no motor de regras
+            context = EvaluationContext(price=price_context, indicators=indicators, symbol=symbol, timeframe=timeframe)
+            for strategy in self.rules.evaluate_candle(symbol, timeframe, context):
+                triggers.append(Trigger(strategy.id, index, indicators))
+        return Processed(triggers, last)
+
+    def warm_up(self, symbol: str, timeframe: str, candles: list[Candle]) -> dict[str, float]:
+        return self.indicators.warm_up(symbol, timeframe, candles).to_mapping()
+
+    def warm_up_window(self, symbol: str, timeframe: str, window: CandleWindow) -> dict[str, float]:
+        return self.indicators.warm_up_window(symbol, timeframe, window).to_mapping()
+
+    def preview(self, symbol: str, timeframe: str, candle: Candle) -> dict[str, float]:
+        return self.indicators.preview(symbol, timeframe, candle)
+
+    def ingest_metrics(self) -> dict[str, object]:
+        return self.indicators.ingest_metrics()
+
+    def export_state(self) -> dict[str, Any]:
+        return self.rules.export_state()
+
+    def import_state(self, state: dict[str, Any]) -> int:
+        return self.rules.import_state(state)
@@ -1,97 +1,265 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
-from typing import Callable, Awaitable, Dict
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable
 
+from app.core.config import get_settings
+from app.indicators.buffer import CandleWindow, to_epoch_ns
 from app.indicators.engine import Candle, indicator_engine
-from app.rules.engine import confluence_engine, EvaluationContext
+from app.rules.engine import confluence_engine
 from app.schemas.strategy import StrategyRead
+from app.services.alert_gate import AlertGate
 from app.services.alert_store import alert_store
 from app.schemas.alert import AlertCreate
 from app.services.telegram import telegram_notifier
 from app.services.event_bus import event_bus, Event
-
-
-StrategyCallback = Callable[[StrategyRead, dict], Awaitable[None]]
+from app.services.candle_aggregator import CandleAggregator
+from app.services.candle_store import CandleStore
+from app.services.market_shard import MarketShard, Processed
+from app.services.process_shards import ProcessShards
 
 
 class MarketStreamService:
-    """Simula assinaturas de mercado e integração com motor de regras."""
+    """Simula assinaturas de mercado e integração com motor de regras.
+
+    Por padrão indicadores e regras rodam no próprio processo; com
+    ``start_processes`` os símbolos são particionados entre processos worker e
+    apenas a publicação de eventos e alertas permanece aqui. Com um
+    ``CandleAggregator``, candles M1 recebidos também fecham as barras dos
+    timeframes maiores, processadas como se tivessem chegado pelo feed. Cada
+    disparo passa pelo ``AlertGate`` (cooldown e modo borda) antes de virar alerta.
+    """
 
-    def __init__(self) -> None:
-        self._strategies_by_symbol: Dict[str, list[StrategyRead]] = defaultdict(list)
+    def __init__(self, shard: MarketShard | None = None, aggregator: CandleAggregator | None = None) -> None:
+        self._active: Dict[int, StrategyRead] = {}
+        self._local = shard or MarketShard(indicator_engine, confluence_engine)
+        self._processes: ProcessShards | None = None
+        self._history: CandleStore | None = None
+        self.aggregator = aggregator
+        self.gate = AlertGate()
         self._lock = asyncio.Lock()
 
+    @property
+    def processes(self) -> ProcessShards | None:
+        return self._processes
+
+    @property
+    def history(self) -> CandleStore | None:
+        return self._history
+
+    def attach_history(self, store: CandleStore) -> None:
+        """Passa a gravar cada candle ingerido no histórico em disco."""
+        self._history = store
+
+    def detach_history(self) -> CandleStore | None:
+        store, self._history = self._history, None
+        return store
+
+    async def start_processes(self, count: int) -> None:
+        """Passa a calcular em ``count`` processos, reenviando as estratégias ativas."""
+        async with self._lock:
+            if self._processes is not None:
+                return
+            shards = ProcessShards(count)
+            shards.start()
+            for strategy in self._active.values():
+                await shards.register(strategy)
+            self._processes = shards
+
+    async def stop_processes(self) -> None:
+        async with self._lock:
+            shards, self._processes = self._processes, None
+            if shards is not None:
+                await shards.stop()
+
     async def register_strategy(self, strategy: StrategyRead) -> None:
+        await self.register_many([strategy])
+
+    async def register_many(self, strategies: Iterable[StrategyRead]) -> int:
+        """Registra várias estratégias adquirindo o lock uma vez; retorna quantas ficaram ativas."""
+        registered = 0
         async with self._lock:
-            for symbol in strategy.symbols:
-                self._strategies_by_symbol[symbol].append(strategy)
+            for strategy in strategies:
+                if not strategy.is_active:
+                    continue
+                self._active[strategy.id] = strategy
+                if self._processes is not None:
+                    await self._processes.register(strategy)
+                else:
+                    self._local.register(strategy)
+                registered += 1
+        return registered
 
-    async def unregister_strategy(self, strategy: StrategyRead) -> None:
+    async def unregister_strategy(self, strategy: StrategyRead, keep_gate: bool = False) -> None:
+        """Desliga a estratégia; com ``keep_gate`` preserva o cooldown e a borda do portão."""
         async with self._lock:
-            for symbol in strategy.symbols:
-                if symbol in self._strategies_by_symbol:
-                    self._strategies_by_symbol[symbol] = [
-                        s for s in self._strategies_by_symbol[symbol] if s.id != strategy.id
-                    ]
+            registered = self._active.pop(strategy.id, None)
+            if not keep_gate:
+                self.gate.forget(strategy.id)
+            if registered is None:
+                return
+            if self._processes is not None:
+                await self._processes.unregister(registered)
+            else:
+                self._local.unregister(registered)
+
+    async def warm_up(self, symbol: str, timeframe: str, candles: list[Candle]) -> dict[str, float]:
+        """Aquece os indicadores da chave no processo que a possui."""
+        if self._processes is not None:
+            return await self._processes.warm_up(symbol, timeframe, candles)
+        return self._local.warm_up(symbol, timeframe, candles)
+
+    async def warm_up_window(self, symbol: str, timeframe: str, window: CandleWindow) -> dict[str, float]:
+        if self._processes is not None:
+            return await self._processes.warm_up_window(symbol, timeframe, window)
+        return self._local.warm_up_window(symbol, timeframe, window)
+
+    async def preview(self, symbol: str, timeframe: str, candle: Candle) -> dict[str, float]:
+        """Indicadores da barra em formação, calculados sem avançar o estado da chave."""
+        if self._processes is not None:
+            return await self._processes.preview(symbol, timeframe, candle)
+        return self._local.preview(symbol, timeframe, candle)
+
+    async def ingest_metrics(self) -> dict[str, object]:
+        """Duplicatas, correções e lacunas dos candles recebidos, somadas entre os processos."""
+        if self._processes is None:
+            return self._local.ingest_metrics()
+        totals: dict[str, object] = {}
+        missing: Counter[str] = Counter()
+        for metrics in await self._processes.ingest_metrics():
+            missing.update(metrics.pop("missing_by_key"))
+            for name, value in metrics.items():
+                totals[name] = totals.get(name, 0) + value
+        return {**totals, "missing_by_key": dict(missing.most_common(20))}
+
+    async def export_rule_state(self) -> dict[str, Any]:
+        """Estado entre candles do motor de regras (autômatos SEQUENCE), reunido dos processos."""
+        if self._processes is None:
+            return self._local.export_state()
+        sequences: dict[str, Any] = {}
+        for state in await self._processes.export_state():
+            sequences.update(state["sequences"])
+        return {"sequences": sequences}
+
+    async def import_rule_state(self, state: dict[str, Any]) -> int:
+        if self._processes is not None:
+            return await self._processes.import_state(state)
+        return self._local.import_state(state)
+
+    async def save_rule_state(self, path: str | Path) -> int:
+        """Grava o estado do motor de regras em JSON; retorna quantos autômatos estavam em andamento."""
+        state = await self.export_rule_state()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Grava ao lado e renomeia: um encerramento no meio não deixa o arquivo truncado
+        partial = path.with_suffix(path.suffix + ".tmp")
+        partial.write_text(json.dumps(state))
+        partial.replace(path)
+        return sum(len(entries) for entries in state["sequences"].values())
+
+    async def load_rule_state(self, path: str | Path) -> int:
+        """Restaura o estado salvo por ``save_rule_state``, se o arquivo existir; retorna quantos autômatos retomou."""
+        path = Path(path)
+        if not path.exists():
+            return 0
+        return await self.import_rule_state(json.loads(path.read_text()))
+
+    async def warm_up_from_history(self, size: int) -> int:
+        """Aquece pelo histórico em disco as chaves com estratégias ativas; retorna quantas tinham dados."""
+        if self._history is None or size <= 0:
+            return 0
+        keys = {(symbol, strategy.timeframe) for strategy in self._active.values() for symbol in strategy.symbols}
+        warmed = 0
+        for symbol, timeframe in sorted(keys):
+            window = self._history.tail(symbol, timeframe, size)
+            if len(window):
+                await self.warm_up_window(symbol, timeframe, window)
+                warmed += 1
+        return warmed
 
     async def on_candle(self, symbol: str, timeframe: str, candle: Candle) -> None:
-        snapshot = indicator_engine.update(symbol, timeframe, candle)
-        indicators = snapshot.to_mapping()
-        price_context = {
-            "close": candle.close,
-            "open": candle.open,
-            "high": candle.high,
-            "low": candle.low,
-        }
+        await self.on_candles(symbol, timeframe, [candle])
 
-        async with self._lock:
-            strategies = list(self._strategies_by_symbol.get(symbol, []))
+    async def on_candles(self, symbol: str, timeframe: str, candles: list[Candle]) -> None:
+        """Processa um lote ordenado de candles da mesma chave symbol:timeframe.
+
+        Indicadores e regras avançam candle a candle; apenas o último candle do
+        lote é publicado como ``market.tick``, já que os anteriores ficam obsoletos.
+        Barras dos timeframes derivados fechadas pelo lote são processadas em seguida.
+        """
+        if not candles:
+            return
+        await self._process(symbol, timeframe, candles)
+        if self.aggregator is None:
+            return
+        for target, bars in self.aggregator.update(symbol, timeframe, candles).items():
+            if bars:
+                await self._process(symbol, target, bars)
+
+    async def _process(self, symbol: str, timeframe: str, candles: list[Candle]) -> None:
+        if self._history is not None:
+            self._history.append_many(symbol, timeframe, candles)
+        processed: Processed
+        if self._processes is not None:
+            processed = await self._processes.process(symbol, timeframe, candles)
+        else:
+            processed = self._local.process(symbol, timeframe, candles)
+
+        # Duplicatas (ex.: POST repetido) e correções de candles passados não são republicadas
+        if processed.last >= 0:
+            last = candles[processed.last]
+            await event_bus.publish(
+                Event(
+                    type="market.tick",
+                    payload={
+                        "symbol": symbol,
+                        "timeframe": timeframe,
+                        "price": last.close,
+                        "timestamp": last.timestamp.isoformat(),
+                    },
+                )
+            )
 
+        admit = self.gate.admit
+        for trigger in processed.triggers:
+            strategy = self._active.get(trigger.strategy_id)
+            if strategy is None:
+                continue
+            candle = candles[trigger.index]
+            if admit(strategy, symbol, timeframe, to_epoch_ns(candle.timestamp)):
+                await self._notify(strategy, symbol, timeframe, candle, trigger.indicators)
+
+    async def _notify(
+        self, strategy: StrategyRead, symbol: str, timeframe: str, candle: Candle, indicators: dict[str, float]
+    ) -> None:
+        alert = alert_store.create(
+            AlertCreate(
+                strategy_id=strategy.id,
+                symbol=symbol,
+                timeframe=timeframe,
+                price=candle.close,
+                indicator_snapshot=indicators,
+            )
+        )
+        # Apenas enfileira: a entrega ao Telegram roda em segundo plano
+        telegram_notifier.notify_alert(alert)
         await event_bus.publish(
             Event(
-                type="market.tick",
+                type="alert.triggered",
                 payload={
-                    "symbol": symbol,
-                    "timeframe": timeframe,
-                    "price": candle.close,
-                    "timestamp": candle.timestamp.isoformat(),
+                    "alert": alert.model_dump(),
+                    "strategy": strategy.model_dump(),
                 },
             )
         )
 
-        for strategy in strategies:
-            if strategy.timeframe != timeframe or not strategy.is_active:
-                continue
 
-            context = EvaluationContext(price=price_context, indicators=indicators)
-            triggered = confluence_engine.process(strategy, context)
-            if triggered:
-                alert = alert_store.create(
-                    AlertCreate(
-                        strategy_id=strategy.id,
-                        symbol=symbol,
-                        timeframe=timeframe,
-                        price=candle.close,
-                        indicator_snapshot=indicators,
-                    )
-                )
-                message = (
-                    f"🚨 Estratégia #{alert.strategy_id} acionada\n"
-                    f"Ativo: {alert.symbol} ({alert.timeframe})\n"
-                    f"Preço: {alert.price:.2f}"
-                )
-                await telegram_notifier.send_message(message)
-                await event_bus.publish(
-                    Event(
-                        type="alert.triggered",
-                        payload={
-                            "alert": alert.model_dump(),
-                            "strategy": strategy.model_dump(),
-                        },
-                    )
-                )
+def _build_service() -> MarketStreamService:
+    timeframes = get_settings().aggregate_timeframes
+    return MarketStreamService(aggregator=CandleAggregator(timeframes) if timeframes else None)
 
 
-market_stream_service = MarketStreamService()
+market_stream_service = _build_service()
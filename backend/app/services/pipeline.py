@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict
+
+from app.core.config import get_settings
+from app.indicators.engine import Candle
+from app.services.market_stream import market_stream_service
+
+logger = logging.getLogger(__name__)
+
+CandleHandler = Callable[[str, str, Candle], Awaitable[None]]
+BatchHandler = Callable[[str, str, list[Candle]], Awaitable[None]]
+
+
+class OverflowPolicy(str, Enum):
+    """O que ``submit_many`` faz quando a fila do shard está cheia.
+
+    ``BLOCK`` aguarda espaço; ``DROP_OLDEST`` descarta o item mais antigo da
+    fila; ``COALESCE`` substitui o item pendente da mesma chave pelo candle mais
+    recente e, sem item pendente da chave, descarta o mais antigo como
+    ``DROP_OLDEST``. Só ``BLOCK`` segura o produtor.
+    """
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+@dataclass(slots=True)
+class _Item:
+    symbol: str
+    timeframe: str
+    candles: list[Candle]
+    enqueued_at: float
+
+
+@dataclass
+class ShardMetrics:
+    enqueued: int = 0
+    processed: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+
+
+@dataclass
+class _Shard:
+    queue: asyncio.Queue[_Item]
+    # Último item pendente por chave, usado pela política COALESCE
+    pending: Dict[tuple[str, str], _Item] = field(default_factory=dict)
+    metrics: ShardMetrics = field(default_factory=ShardMetrics)
+    worker: asyncio.Task | None = None
+
+
+class IngestionPipeline:
+    """Desacopla a ingestão HTTP do processamento de candles.
+
+    Candles são distribuídos por hash do símbolo entre filas ``asyncio.Queue``
+    limitadas, cada uma consumida por um worker próprio; assim a ordem por
+    símbolo é preservada e um símbolo lento não bloqueia os demais shards.
+    Lotes enviados por ``submit_many`` ocupam uma única posição na fila e, com
+    ``batch_handler``, são processados em uma só chamada.
+    """
+
+    def __init__(
+        self,
+        handler: CandleHandler,
+        shards: int = 4,
+        queue_size: int = 1000,
+        policy: OverflowPolicy | str = OverflowPolicy.BLOCK,
+        batch_handler: BatchHandler | None = None,
+    ) -> None:
+        if shards <= 0 or queue_size <= 0:
+            raise ValueError("Pipeline requer ao menos um shard e filas com capacidade positiva.")
+        self._handler = handler
+        self._batch_handler = batch_handler
+        self.shard_count = shards
+        self.queue_size = queue_size
+        self.policy = OverflowPolicy(policy)
+        self._shards: list[_Shard] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._shards)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._shards = [_Shard(queue=asyncio.Queue(maxsize=self.queue_size)) for _ in range(self.shard_count)]
+        for index, shard in enumerate(self._shards):
+            shard.worker = asyncio.create_task(self._worker(shard), name=f"pipeline-shard-{index}")
+
+    async def stop(self, drain: bool = True) -> None:
+        shards, self._shards = self._shards, []
+        if drain:
+            await asyncio.gather(*(shard.queue.join() for shard in shards))
+        for shard in shards:
+            if shard.worker is not None:
+                shard.worker.cancel()
+        await asyncio.gather(*(shard.worker for shard in shards if shard.worker), return_exceptions=True)
+
+    def shard_for(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) % self.shard_count
+
+    async def submit(self, symbol: str, timeframe: str, candle: Candle) -> None:
+        """Enfileira o candle e retorna; com BLOCK aguarda espaço na fila do shard."""
+        await self.submit_many(symbol, timeframe, [candle])
+
+    async def submit_many(self, symbol: str, timeframe: str, candles: list[Candle]) -> None:
+        """Enfileira candles ordenados de uma mesma chave como um único item."""
+        if not candles:
+            return
+        shard = self._shards[self.shard_for(symbol)]
+        queue = shard.queue
+        key = (symbol, timeframe)
+        item = _Item(symbol, timeframe, candles, time.monotonic())
+
+        if queue.full() and self.policy is not OverflowPolicy.BLOCK:
+            pending = shard.pending.get(key) if self.policy is OverflowPolicy.COALESCE else None
+            if pending is not None:
+                # Mantém a posição na fila e substitui pelo candle mais recente
+                shard.metrics.coalesced += len(pending.candles) + len(candles) - 1
+                pending.candles = candles[-1:]
+                return
+            # Chave sem item pendente: COALESCE também descarta o mais antigo em vez de bloquear
+            dropped = queue.get_nowait()
+            queue.task_done()
+            self._forget(shard, dropped)
+            shard.metrics.dropped += len(dropped.candles)
+
+        await queue.put(item)
+        shard.pending[key] = item
+        shard.metrics.enqueued += len(candles)
+
+    def metrics(self) -> dict[str, object]:
+        shards = []
+        for index, shard in enumerate(self._shards):
+            shards.append(
+                {
+                    "shard": index,
+                    "depth": shard.queue.qsize(),
+                    "oldest_lag_ms": self._oldest_lag_ms(shard),
+                    **shard.metrics.__dict__,
+                }
+            )
+        return {
+            "running": self.running,
+            "policy": self.policy.value,
+            "queue_size": self.queue_size,
+            "depth": sum(item["depth"] for item in shards),
+            "shards": shards,
+        }
+
+    async def _worker(self, shard: _Shard) -> None:
+        queue = shard.queue
+        metrics = shard.metrics
+        while True:
+            item = await queue.get()
+            self._forget(shard, item)
+            lag_ms = (time.monotonic() - item.enqueued_at) * 1000
+            metrics.last_lag_ms = lag_ms
+            metrics.max_lag_ms = max(metrics.max_lag_ms, lag_ms)
+            try:
+                if self._batch_handler is not None:
+                    await self._batch_handler(item.symbol, item.timeframe, item.candles)
+                else:
+                    for candle in item.candles:
+                        await self._handler(item.symbol, item.timeframe, candle)
+            except Exception:
+                metrics.errors += 1
+                logger.exception("Falha ao processar candle %s:%s", item.symbol, item.timeframe)
+            finally:
+                metrics.processed += len(item.candles)
+                queue.task_done()
+
+    @staticmethod
+    def _forget(shard: _Shard, item: _Item) -> None:
+        key = (item.symbol, item.timeframe)
+        if shard.pending.get(key) is item:
+            del shard.pending[key]
+
+    @staticmethod
+    def _oldest_lag_ms(shard: _Shard) -> float:
+        # asyncio.Queue não expõe o primeiro item; ``_queue`` é o deque interno
+        items = shard.queue._queue  # type: ignore[attr-defined]
+        if not items:
+            return 0.0
+        return (time.monotonic() - items[0].enqueued_at) * 1000
+
+
+def _build_pipeline() -> IngestionPipeline:
+    settings = get_settings()
+    return IngestionPipeline(
+        market_stream_service.on_candle,
+        shards=settings.pipeline_shards,
+        queue_size=settings.pipeline_queue_size,
+        policy=settings.pipeline_overflow_policy,
+        batch_handler=market_stream_service.on_candles,
+    )
+
+
+ingestion_pipeline = _build_pipeline()
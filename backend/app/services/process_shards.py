@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from app.indicators.buffer import CandleWindow
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import StrategyRead
+from app.services.market_shard import MarketShard, Processed
+
+# Shard do processo worker, criado pelo initializer do executor
+_worker_shard: MarketShard | None = None
+
+
+def _init_worker() -> None:
+    global _worker_shard
+    _worker_shard = MarketShard(IndicatorEngine(default_paths=()), ConfluenceEngine())
+
+
+def _dispatch(method: str, args: tuple[Any, ...]) -> Any:
+    return getattr(_worker_shard, method)(*args)
+
+
+class ProcessShards:
+    """Particiona símbolos entre processos worker, cada um com seu próprio ``MarketShard``.
+
+    Cada processo é um ``ProcessPoolExecutor`` de um único worker, então as
+    chamadas de um símbolo são executadas na ordem em que foram enviadas. O
+    símbolo é roteado por crc32, o mesmo critério do pipeline de ingestão.
+    """
+
+    def __init__(self, processes: int, start_method: str = "spawn") -> None:
+        if processes <= 0:
+            raise ValueError("É necessário ao menos um processo worker.")
+        self.count = processes
+        self.start_method = start_method
+        self._executors: list[ProcessPoolExecutor] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._executors)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker)
+            for _ in range(self.count)
+        ]
+
+    async def stop(self) -> None:
+        executors, self._executors = self._executors, []
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, executor.shutdown) for executor in executors))
+
+    def shard_for(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) % self.count
+
+    async def register(self, strategy: StrategyRead) -> None:
+        await asyncio.gather(
+            *(self._call(index, "register", part) for index, part in self._partition(strategy))
+        )
+
+    async def unregister(self, strategy: StrategyRead) -> None:
+        await asyncio.gather(
+            *(self._call(index, "unregister", part) for index, part in self._partition(strategy))
+        )
+
+    async def process(self, symbol: str, timeframe: str, candles: list[Candle]) -> Processed:
+        return await self._call(self.shard_for(symbol), "process", symbol, timeframe, candles)
+
+    async def warm_up(self, symbol: str, timeframe: str, candles: list[Candle]) -> dict[str, float]:
+        return await self._call(self.shard_for(symbol), "warm_up", symbol, timeframe, candles)
+
+    async def warm_up_window(self, symbol: str, timeframe: str, window: CandleWindow) -> dict[str, float]:
+        # Visões mapeadas não atravessam processos: o worker recebe uma cópia das colunas
+        return await self._call(self.shard_for(symbol), "warm_up_window", symbol, timeframe, window.copy())
+
+    async def preview(self, symbol: str, timeframe: str, candle: Candle) -> dict[str, float]:
+        return await self._call(self.shard_for(symbol), "preview", symbol, timeframe, candle)
+
+    async def ingest_metrics(self) -> list[dict[str, Any]]:
+        return list(await asyncio.gather(*(self._call(index, "ingest_metrics") for index in range(self.count))))
+
+    async def export_state(self) -> list[dict[str, Any]]:
+        return list(await asyncio.gather(*(self._call(index, "export_state") for index in range(self.count))))
+
+    async def import_state(self, state: dict[str, Any]) -> int:
+        # Cada processo restaura só as chaves dos símbolos que possui
+        restored = await asyncio.gather(*(self._call(index, "import_state", state) for index in range(self.count)))
+        return sum(restored)
+
+    def _partition(self, strategy: StrategyRead) -> list[tuple[int, StrategyRead]]:
+        # Cada processo recebe a estratégia restrita aos símbolos que ele possui
+        symbols: dict[int, list[str]] = defaultdict(list)
+        for symbol in strategy.symbols:
+            symbols[self.shard_for(symbol)].append(symbol)
+        return [(index, strategy.model_copy(update={"symbols": owned})) for index, owned in symbols.items()]
+
+    async def _call(self, index: int, method: str, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executors[index], _dispatch, method, args)
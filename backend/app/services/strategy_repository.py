@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable
+
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Connection,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    false,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import Settings
+from app.schemas.strategy import StrategyRead
+
+metadata = MetaData()
+
+strategies = Table(
+    "strategies",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(200), nullable=False),
+    Column("logic", String(16), nullable=False),
+    Column("conditions", JSON, nullable=False),
+    Column("sequence_window", Integer, nullable=False, server_default="5"),
+    Column("cooldown_seconds", Integer, nullable=False, server_default="0"),
+    Column("edge_trigger", Boolean, nullable=False, server_default=false()),
+    Column("symbols", JSON, nullable=False),
+    Column("timeframe", String(8), nullable=False),
+    Column("is_active", Boolean, nullable=False, index=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    # Ids de estratégias removidas não são reutilizados: alertas antigos apontam para eles
+    sqlite_autoincrement=True,
+)
+
+_STRATEGY_LIST = TypeAdapter(list[StrategyRead])
+
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def database_url(settings: Settings) -> str:
+    """URL assíncrona do banco: ``database_url`` (ex.: Postgres) ou o SQLite local."""
+    if settings.database_url is None:
+        path = Path(settings.strategy_db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return f"sqlite+aiosqlite:///{path}"
+    url = str(settings.database_url)
+    scheme, _, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def _row(strategy: StrategyRead) -> dict[str, Any]:
+    data = strategy.model_dump(mode="json")
+    data["created_at"] = strategy.created_at
+    data["updated_at"] = strategy.updated_at
+    return data
+
+
+def _add_missing_columns(connection: Connection) -> None:
+    # ``create_all`` não altera tabelas existentes: colunas novas entram com o valor padrão
+    existing = {column["name"] for column in inspect(connection).get_columns("strategies")}
+    for column in strategies.columns:
+        if column.name in existing:
+            continue
+        ddl = column.type.compile(dialect=connection.dialect)
+        default = column.server_default.arg
+        if not isinstance(default, str):
+            default = default.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE strategies ADD COLUMN {column.name} {ddl} NOT NULL DEFAULT {default}"))
+
+
+class StrategyRepository:
+    """Persistência das estratégias via SQLAlchemy assíncrono (SQLite ou Postgres)."""
+
+    def __init__(self, url: str, **engine_options: Any) -> None:
+        self.url = url
+        self._engine: AsyncEngine = create_async_engine(url, **engine_options)
+
+    async def create_schema(self) -> None:
+        async with self._engine.begin() as connection:
+            await connection.run_sync(metadata.create_all)
+            await connection.run_sync(_add_missing_columns)
+
+    async def close(self) -> None:
+        await self._engine.dispose()
+
+    async def load_all(self) -> list[StrategyRead]:
+        async with self._engine.connect() as connection:
+            result = await connection.execute(select(strategies).order_by(strategies.c.id))
+            return _STRATEGY_LIST.validate_python(result.mappings().all())
+
+    async def insert(self, values: dict[str, Any]) -> int:
+        async with self._engine.begin() as connection:
+            result = await connection.execute(insert(strategies).values(values))
+            return result.inserted_primary_key[0]
+
+    async def insert_many(self, rows: Iterable[dict[str, Any]]) -> None:
+        async with self._engine.begin() as connection:
+            await connection.execute(insert(strategies), list(rows))
+
+    async def update(self, strategy: StrategyRead) -> None:
+        values = _row(strategy)
+        del values["id"]
+        async with self._engine.begin() as connection:
+            await connection.execute(update(strategies).where(strategies.c.id == strategy.id).values(values))
+
+    async def delete(self, strategy_id: int) -> None:
+        async with self._engine.begin() as connection:
+            await connection.execute(delete(strategies).where(strategies.c.id == strategy_id))
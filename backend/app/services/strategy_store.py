@@ -6,51 +6,70 @@ from itertools import count
 from typing import Dict
 
 from app.schemas.strategy import StrategyCreate, StrategyRead, StrategyUpdate, Strategy
+from app.services.strategy_repository import StrategyRepository
 
 
 class StrategyStore:
-    """Armazém em memória para prototipagem até integração com banco."""
+    """Estratégias em memória para leitura rápida.
+
+    Com um ``StrategyRepository`` aberto (ver ``open``) as escritas também são
+    gravadas no banco e os ids passam a ser gerados por ele.
+    """
 
     _id_counter = count(1)
 
     def __init__(self) -> None:
         self._strategies: Dict[int, StrategyRead] = {}
+        self._repository: StrategyRepository | None = None
+
+    async def open(self, repository: StrategyRepository) -> list[StrategyRead]:
+        """Carrega todas as estratégias do banco em lote e passa a persistir nele."""
+        await repository.create_schema()
+        loaded = await repository.load_all()
+        self._strategies = {strategy.id: strategy for strategy in loaded}
+        self._repository = repository
+        return loaded
+
+    async def close(self) -> None:
+        repository, self._repository = self._repository, None
+        if repository is not None:
+            await repository.close()
 
     def list(self) -> Iterable[StrategyRead]:
         return self._strategies.values()
 
-    def create(self, payload: StrategyCreate) -> StrategyRead:
-        strategy_id = next(self._id_counter)
+    async def create(self, payload: StrategyCreate) -> StrategyRead:
         now = datetime.utcnow()
-        data = StrategyRead(
-            id=strategy_id,
-            name=payload.name,
-            logic=payload.logic,
-            conditions=payload.conditions,
-            symbols=payload.symbols,
-            timeframe=payload.timeframe,
-            is_active=payload.is_active,
-            created_at=now,
-            updated_at=now,
-        )
+        values = {**payload.model_dump(mode="json"), "created_at": now, "updated_at": now}
+        if self._repository is not None:
+            strategy_id = await self._repository.insert(values)
+        else:
+            strategy_id = next(self._id_counter)
+        data = StrategyRead(id=strategy_id, **payload.model_dump(), created_at=now, updated_at=now)
         self._strategies[strategy_id] = data
         return data
 
     def get(self, strategy_id: int) -> StrategyRead | None:
         return self._strategies.get(strategy_id)
 
-    def update(self, strategy_id: int, payload: StrategyUpdate) -> StrategyRead | None:
+    async def update(self, strategy_id: int, payload: StrategyUpdate) -> StrategyRead | None:
         existed = self._strategies.get(strategy_id)
         if not existed:
             return None
 
-        update_data = payload.model_dump(exclude_unset=True)
-        data = existed.model_copy(update=update_data)
-        data = data.model_copy(update={"updated_at": datetime.utcnow()})
+        # Revalida o resultado: ``model_copy`` guardaria as condições como dicts
+        update_data = payload.model_dump(exclude_unset=True, exclude_none=True)
+        data = StrategyRead.model_validate({**existed.model_dump(), **update_data, "updated_at": datetime.utcnow()})
+        if self._repository is not None:
+            await self._repository.update(data)
         self._strategies[strategy_id] = data
         return data
 
-    def delete(self, strategy_id: int) -> bool:
+    async def delete(self, strategy_id: int) -> bool:
+        if strategy_id not in self._strategies:
+            return False
+        if self._repository is not None:
+            await self._repository.delete(strategy_id)
         return self._strategies.pop(strategy_id, None) is not None
 
 
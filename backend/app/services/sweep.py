@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.indicators.registry import SOURCES, IndicatorPlan, registry
+from app.schemas.backtest import ParameterRange, SweepPoint
+from app.schemas.strategy import Strategy
+from app.services.backtest import horizon_stats, signal_positions
+from app.services.market_shard import indicator_paths
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# Séries de indicadores mantidas por worker (cada uma ocupa 8 bytes por candle)
+SERIES_CACHE_SIZE = 64
+
+Batch = list[tuple[dict[str, float], Strategy]]
+
+
+def expand_range(spec: ParameterRange) -> list[float]:
+    if spec.values is not None:
+        return list(dict.fromkeys(spec.values))
+    if spec.start is None or spec.stop is None:
+        raise ValueError("Intervalo de parâmetro requer values ou start/stop.")
+    count = math.floor((spec.stop - spec.start) / spec.step + 1e-9) + 1
+    return [round(spec.start + index * spec.step, 10) for index in range(max(count, 0))]
+
+
+def expand_grid(parameters: Mapping[str, ParameterRange]) -> list[dict[str, float]]:
+    names = list(parameters)
+    ranges = [expand_range(parameters[name]) for name in names]
+    return [dict(zip(names, values)) for values in itertools.product(*ranges)]
+
+
+def render(template: Any, params: Mapping[str, float]) -> Any:
+    """Substitui os marcadores ``{nome}`` do template pelos valores do ponto da grade.
+
+    Um texto que é só o marcador vira o número (``value``); dentro de um texto
+    maior o valor é formatado, com inteiros sem casas decimais (``path``).
+    """
+    if isinstance(template, str):
+        match = _PLACEHOLDER.fullmatch(template)
+        if match is not None:
+            return params[_name(match, params)]
+        return _PLACEHOLDER.sub(lambda found: _format(params[_name(found, params)]), template)
+    if isinstance(template, dict):
+        return {key: render(value, params) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render(value, params) for value in template]
+    return template
+
+
+def _name(match: re.Match, params: Mapping[str, float]) -> str:
+    name = match.group(1)
+    if name not in params:
+        raise ValueError(f"Parâmetro não definido no template: {name}")
+    return name
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def rank(points: Sequence[SweepPoint], rank_by: str = "mean_return", min_triggers: int = 1) -> list[SweepPoint]:
+    """Melhores primeiro; pontos sem métrica ou com poucos disparos ficam no fim."""
+
+    def key(point: SweepPoint) -> tuple[bool, float]:
+        metric = point.triggers if rank_by == "triggers" else getattr(point, rank_by)
+        eligible = metric is not None and point.triggers >= min_triggers
+        return eligible, metric if eligible else -math.inf
+
+    return sorted(points, key=key, reverse=True)
+
+
+# Estado do processo worker, criado pelo initializer do executor
+_columns: list[np.ndarray] = []
+_series: OrderedDict[str, np.ndarray] = OrderedDict()
+
+
+def _init_worker(path: str) -> None:
+    global _columns
+    # As colunas são lidas do arquivo mapeado, sem cópia nem pickling do histórico
+    _columns = list(np.load(path, mmap_mode="r"))
+    _series.clear()
+
+
+def _indicator(path: str) -> np.ndarray:
+    series = _series.get(path)
+    if series is None:
+        series = _series[path] = IndicatorPlan((path,)).frame(_columns)[path]
+        if len(_series) > SERIES_CACHE_SIZE:
+            _series.popitem(last=False)
+    else:
+        _series.move_to_end(path)
+    return series
+
+
+def _evaluate(batch: Batch, horizon: int) -> list[SweepPoint]:
+    results = []
+    # Pontos do lote usam as mesmas séries: condições repetidas são avaliadas uma vez
+    signals: dict[tuple, np.ndarray] = {}
+    for params, strategy in batch:
+        indicators = {path: _indicator(path) for path in indicator_paths(strategy)}
+        positions = signal_positions(strategy, _columns, indicators, signals)
+        (stats,) = horizon_stats(positions, _columns[3], (horizon,))
+        results.append(
+            SweepPoint(
+                params=params,
+                triggers=len(positions),
+                samples=stats.samples,
+                mean_return=stats.mean_return,
+                hit_rate=stats.hit_rate,
+            )
+        )
+    return results
+
+
+class ParameterSweep:
+    """Avalia uma grade de parâmetros de um template de estratégia sobre o histórico.
+
+    Os pontos são agrupados pelos caminhos de indicadores que usam e cada lote
+    vai a um ``ProcessPoolExecutor``; o worker calcula cada série uma vez e a
+    reaproveita entre os pontos. O OHLCV é gravado uma vez em um ``.npy``
+    mapeado em memória por todos os workers. Resultados são entregues à medida
+    que os lotes terminam.
+    """
+
+    def __init__(
+        self,
+        template: Mapping[str, Any],
+        parameters: Mapping[str, ParameterRange],
+        horizon: int = 5,
+        processes: int | None = None,
+        max_points: int = 10_000,
+        start_method: str = "spawn",
+    ) -> None:
+        if horizon <= 0:
+            raise ValueError("Horizonte deve ser positivo.")
+        grid = expand_grid(parameters)
+        if len(grid) > max_points:
+            raise ValueError(f"Grade com {len(grid)} pontos excede o limite de {max_points}.")
+        self.horizon = horizon
+        self.processes = processes or os.cpu_count() or 1
+        self.start_method = start_method
+
+        groups: dict[tuple[str, ...], Batch] = defaultdict(list)
+        for params in grid:
+            strategy = Strategy.model_validate(render(template, params))
+            paths = indicator_paths(strategy)
+            registry.validate(paths)
+            groups[paths].append((params, strategy))
+        self.size = len(grid)
+        # Lotes pequenos o bastante para ocupar todos os workers, sem separar pontos que compartilham séries
+        chunk = max(1, math.ceil(self.size / (self.processes * 4)))
+        self.batches: list[Batch] = [
+            points[start : start + chunk] for points in groups.values() for start in range(0, len(points), chunk)
+        ]
+
+    def run(self, history: pd.DataFrame) -> Iterator[SweepPoint]:
+        with tempfile.TemporaryDirectory(prefix="sweep-") as directory:
+            executor = self._executor(self._share(history, Path(directory)))
+            try:
+                futures = [executor.submit(_evaluate, batch, self.horizon) for batch in self.batches]
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    async def stream(self, history: pd.DataFrame) -> AsyncIterator[SweepPoint]:
+        loop = asyncio.get_running_loop()
+        with tempfile.TemporaryDirectory(prefix="sweep-") as directory:
+            path = await loop.run_in_executor(None, self._share, history, Path(directory))
+            executor = self._executor(path)
+            try:
+                futures: list[Future] = [executor.submit(_evaluate, batch, self.horizon) for batch in self.batches]
+                for completed in asyncio.as_completed([asyncio.wrap_future(future) for future in futures]):
+                    for point in await completed:
+                        yield point
+            finally:
+                await loop.run_in_executor(None, partial(executor.shutdown, wait=True, cancel_futures=True))
+
+    @staticmethod
+    def _share(history: pd.DataFrame, directory: Path) -> str:
+        path = directory / "candles.npy"
+        data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(len(SOURCES), len(history)))
+        for row, name in enumerate(SOURCES):
+            data[row] = history[name].to_numpy(dtype=np.float64)
+        data.flush()
+        del data
+        return str(path)
+
+    def _executor(self, path: str) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context(self.start_method)
+        return ProcessPoolExecutor(
+            max_workers=min(self.processes, len(self.batches)) or 1,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(path,),
+        )
@@ -2,29 +2,277 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Iterable
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict
 
-from app.core.config import get_settings
+import httpx
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from app.core.config import Settings, get_settings
+from app.schemas.alert import AlertRead
+from app.services.alert_store import alert_store
 
 logger = logging.getLogger(__name__)
 
+# Limite de caracteres de uma mensagem do Telegram
+MESSAGE_LIMIT = 4096
+
+
+class TokenBucket:
+    """Limitador de taxa: ``rate`` fichas por segundo, acumulando até ``capacity``.
+
+    Cada chamada reserva uma ficha (o saldo pode ficar negativo) e dorme o
+    necessário, então chamadas concorrentes não precisam de lock.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0:
+            raise ValueError("Taxa do limitador deve ser positiva.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Consome uma ficha e retorna quantos segundos esperar até poder usá-la."""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class TelegramError(Exception):
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryableTelegramError(TelegramError):
+    """Falha temporária (429, 5xx): a entrega é repetida com backoff."""
+
+
+@dataclass
+class TelegramMetrics:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    digests: int = 0
+
+
+@dataclass(slots=True)
+class _Delivery:
+    text: str | None = None
+    alert: AlertRead | None = None
+
+
+def format_alert(alert: AlertRead) -> str:
+    return (
+        f"🚨 Estratégia #{alert.strategy_id} acionada\n"
+        f"Ativo: {alert.symbol} ({alert.timeframe})\n"
+        f"Preço: {alert.price:.2f}"
+    )
+
+
+def format_digest(alerts: list[AlertRead]) -> str:
+    lines = [f"🚨 {len(alerts)} alertas acionados"]
+    lines.extend(
+        f"• Estratégia #{alert.strategy_id}: {alert.symbol} ({alert.timeframe}) @ {alert.price:.2f}"
+        for alert in alerts
+    )
+    return "\n".join(lines)
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Quebra em linhas inteiras respeitando o limite do Telegram."""
+    chunks: list[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
 
 class TelegramNotifier:
-    """Serviço assíncrono simplificado para envio de alertas ao Telegram."""
+    """Entrega alertas ao Telegram a partir de uma fila em segundo plano.
+
+    ``notify_alert`` apenas enfileira. O worker usa um único ``httpx.AsyncClient``
+    (conexões keep-alive), respeita limites global e por chat com token buckets
+    e repete falhas temporárias com backoff. Alertas acumulados enquanto o
+    worker aguarda os limites são enviados juntos em uma mensagem de resumo, e
+    o ``message_id`` retornado é gravado no alerta.
+    """
+
+    def __init__(self, settings: Settings | None = None, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._settings = settings or get_settings()
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._queue: asyncio.Queue[_Delivery] | None = None
+        self._worker: asyncio.Task | None = None
+        self._global = TokenBucket(self._settings.telegram_global_rate)
+        self._chats: Dict[str, TokenBucket] = {}
+        self.metrics = TelegramMetrics()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self._settings.telegram_token and self._settings.telegram_chat_ids)
 
-    def __init__(self) -> None:
-        self._settings = get_settings()
-        self._lock = asyncio.Lock()
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self) -> None:
+        if self.running or not self.configured:
+            return
+        settings = self._settings
+        self._client = httpx.AsyncClient(
+            base_url=f"{settings.telegram_api_url.rstrip('/')}/bot{settings.telegram_token}",
+            limits=httpx.Limits(max_connections=settings.telegram_pool_size, max_keepalive_connections=settings.telegram_pool_size),
+            timeout=httpx.Timeout(10.0),
+            transport=self._transport,
+        )
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run(), name="telegram-delivery")
+
+    async def stop(self, drain: bool = True) -> None:
+        worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        if drain and self._queue is not None:
+            await self._queue.join()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def send_message(self, message: str) -> None:
-        if not self._settings.telegram_token or not self._settings.telegram_chat_ids:
-            logger.warning("Telegram não configurado. Mensagem ignorada: %s", message)
+        self._enqueue(_Delivery(text=message))
+
+    def notify_alert(self, alert: AlertRead) -> None:
+        self._enqueue(_Delivery(alert=alert))
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "configured": self.configured,
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            **self.metrics.__dict__,
+        }
+
+    def _enqueue(self, delivery: _Delivery) -> None:
+        if not self.configured:
+            text = delivery.text if delivery.text is not None else format_alert(delivery.alert)
+            logger.warning("Telegram não configurado. Mensagem ignorada: %s", text)
+            return
+        if self._queue is None:
+            logger.warning("Entrega do Telegram não iniciada. Mensagem ignorada.")
             return
+        self._queue.put_nowait(delivery)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            # O que chegou enquanto o envio anterior aguardava os limites vira um resumo
+            while len(batch) < self._settings.telegram_digest_max and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Falha ao entregar mensagens ao Telegram")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver(self, batch: list[_Delivery]) -> None:
+        alerts = [delivery.alert for delivery in batch if delivery.alert is not None]
+        parts = [delivery.text for delivery in batch if delivery.text is not None]
+        if len(alerts) == 1:
+            parts.append(format_alert(alerts[0]))
+        elif alerts:
+            parts.append(format_digest(alerts))
+            self.metrics.digests += 1
+        chunks = split_message("\n\n".join(parts))
+
+        chat_ids = self._settings.telegram_chat_ids
+        results = await asyncio.gather(
+            *(self._send_chunks(chat_id, chunks) for chat_id in chat_ids), return_exceptions=True
+        )
+        references = []
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, BaseException):
+                self.metrics.failed += 1
+                logger.error("Falha ao enviar ao chat %s: %s", chat_id, result)
+            else:
+                references.append(f"{chat_id}:{result}")
+        if references:
+            reference = ",".join(references)
+            for alert in alerts:
+                alert_store.attach_telegram_message(alert.id, reference)
+
+    async def _send_chunks(self, chat_id: str, chunks: list[str]) -> int:
+        message_ids = [await self._send(chat_id, chunk) for chunk in chunks]
+        return message_ids[0]
+
+    async def _send(self, chat_id: str, text: str) -> int:
+        settings = self._settings
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(settings.telegram_chat_rate, capacity=1.0)
+        backoff = wait_exponential(multiplier=settings.telegram_retry_base, max=30)
+
+        def wait(state: RetryCallState) -> float:
+            self.metrics.retried += 1
+            retry_after = getattr(state.outcome.exception(), "retry_after", None)
+            return retry_after if retry_after is not None else backoff(state)
+
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(settings.telegram_max_attempts),
+            wait=wait,
+            retry=retry_if_exception_type((RetryableTelegramError, httpx.TransportError)),
+            reraise=True,
+        ):
+            with attempt:
+                await self._global.acquire()
+                await bucket.acquire()
+                response = await self._client.post("/sendMessage", json={"chat_id": chat_id, "text": text})
+                message_id = self._parse(response)
+        self.metrics.sent += 1
+        return message_id
 
-        # TODO: integrar com python-telegram-bot (ApplicationBuilder) ou httpx
-        async with self._lock:
-            for chat_id in self._settings.telegram_chat_ids:
-                logger.info("[Telegram:%s] %s", chat_id, message)
+    @staticmethod
+    def _parse(response: httpx.Response) -> int:
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code == 200 and data.get("ok"):
+            return int(data["result"]["message_id"])
+        description = data.get("description") or f"HTTP {response.status_code}"
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = (data.get("parameters") or {}).get("retry_after")
+            raise RetryableTelegramError(description, float(retry_after) if retry_after is not None else None)
+        raise TelegramError(description)
 
 
 telegram_notifier = TelegramNotifier()
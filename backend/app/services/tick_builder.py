@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Sequence
+
+from pydantic import TypeAdapter
+
+from app.core.config import get_settings
+from app.indicators.buffer import from_epoch_ns, timeframe_ns, to_epoch_ns
+from app.indicators.engine import Candle
+from app.schemas.market import TickIn
+from app.services.event_bus import Event, event_bus
+from app.services.market_stream import market_stream_service
+from app.services.pipeline import ingestion_pipeline
+
+Tick = tuple[str, int, float, float]
+TICK_LIST = TypeAdapter(list[TickIn])
+
+# Posições da barra em formação (lista mutável, sem objeto por tick)
+_BUCKET, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _FIRST, _LAST = range(8)
+
+
+@dataclass
+class TickMetrics:
+    ticks: int = 0
+    bars: int = 0
+    # Ticks de um período cuja barra já foi fechada
+    late: int = 0
+    # Barras fechadas pelo relógio dos ticks, sem tick do período seguinte no símbolo
+    expired: int = 0
+
+
+class TickCandleBuilder:
+    """Monta candles OHLCV a partir de ticks, mantendo só a barra em formação de cada símbolo.
+
+    Um tick de um período posterior fecha a barra do símbolo. Símbolos pouco
+    negociados são fechados pelo relógio dos próprios ticks: quando o maior
+    timestamp visto em qualquer símbolo passa do fim da barra mais ``grace``
+    segundos. Com isso o replay de ticks antigos fecha barras como o feed ao vivo.
+    """
+
+    def __init__(self, timeframe: str = "M1", grace: float = 2.0) -> None:
+        self.timeframe = timeframe
+        self._size = timeframe_ns(timeframe)
+        self._grace = int(grace * 1e9)
+        self._bars: Dict[str, list] = {}
+        # Fim da última barra fechada por expiração, para reconhecer ticks atrasados
+        self._closed_until: Dict[str, int] = {}
+        self.clock = 0
+        self._next_expiry = 0
+        self.metrics = TickMetrics()
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    def add(self, symbol: str, timestamp: int, price: float, volume: float = 0.0) -> Candle | None:
+        """Incorpora um tick (timestamp em ns); retorna a barra anterior do símbolo se ele a fechou."""
+        self.metrics.ticks += 1
+        if timestamp > self.clock:
+            self.clock = timestamp
+        bucket = timestamp - timestamp % self._size
+        bar = self._bars.get(symbol)
+        if bar is not None:
+            if bucket == bar[_BUCKET]:
+                if price > bar[_HIGH]:
+                    bar[_HIGH] = price
+                elif price < bar[_LOW]:
+                    bar[_LOW] = price
+                bar[_VOLUME] += volume
+                if timestamp >= bar[_LAST]:
+                    bar[_CLOSE] = price
+                    bar[_LAST] = timestamp
+                elif timestamp < bar[_FIRST]:
+                    bar[_OPEN] = price
+                    bar[_FIRST] = timestamp
+                return None
+            if bucket < bar[_BUCKET]:
+                self.metrics.late += 1
+                return None
+        elif bucket < self._closed_until.get(symbol, bucket):
+            self.metrics.late += 1
+            return None
+        self._bars[symbol] = [bucket, price, price, price, price, volume, timestamp, timestamp]
+        if bar is None:
+            return None
+        self.metrics.bars += 1
+        return self._candle(bar)
+
+    def add_many(self, ticks: Iterable[Tick]) -> list[tuple[str, Candle]]:
+        """Incorpora ticks ``(symbol, timestamp_ns, price, volume)``; retorna as barras fechadas, em ordem."""
+        closed = []
+        add = self.add
+        for symbol, timestamp, price, volume in ticks:
+            candle = add(symbol, timestamp, price, volume)
+            if candle is not None:
+                closed.append((symbol, candle))
+        if self.clock >= self._next_expiry:
+            closed.extend(self.expire())
+        return closed
+
+    def expire(self) -> list[tuple[str, Candle]]:
+        """Fecha as barras cujo período terminou há mais de ``grace`` no relógio dos ticks."""
+        limit = self.clock - self._grace
+        closed = []
+        for symbol, bar in list(self._bars.items()):
+            end = bar[_BUCKET] + self._size
+            if end <= limit:
+                del self._bars[symbol]
+                self._closed_until[symbol] = end
+                closed.append((symbol, self._candle(bar)))
+        self.metrics.bars += len(closed)
+        self.metrics.expired += len(closed)
+        # Nenhuma barra aberta vence antes do fim do período corrente mais a tolerância
+        self._next_expiry = self.clock - self.clock % self._size + self._size + self._grace
+        return closed
+
+    def partial(self, symbol: str) -> Candle | None:
+        bar = self._bars.get(symbol)
+        return None if bar is None else self._candle(bar)
+
+    def snapshot(self) -> dict[str, object]:
+        return {"timeframe": self.timeframe, "open_bars": len(self._bars), **self.metrics.__dict__}
+
+    @staticmethod
+    def _candle(bar: list) -> Candle:
+        return Candle(from_epoch_ns(bar[_BUCKET]), bar[_OPEN], bar[_HIGH], bar[_LOW], bar[_CLOSE], bar[_VOLUME])
+
+
+class TickIngestion:
+    """Recebe ticks do WebSocket e do endpoint HTTP e entrega as barras fechadas ao stream de mercado.
+
+    As barras seguem pelo ``ingestion_pipeline`` quando ele está rodando (ou
+    direto para ``MarketStreamService.on_candles``) e, com o agregador,
+    também fecham os timeframes maiores. Com ``preview_interval`` positivo, a
+    barra em formação de cada símbolo e seus indicadores são publicados como
+    ``market.preview`` no máximo uma vez por intervalo.
+    """
+
+    def __init__(self, builder: TickCandleBuilder, preview_interval: float = 1.0) -> None:
+        self.builder = builder
+        self.preview_interval = preview_interval
+        self._previewed: Dict[str, float] = {}
+        self.previews = 0
+
+    async def ingest(self, ticks: Sequence[TickIn]) -> int:
+        """Processa um lote de ticks; retorna quantas barras foram fechadas."""
+        closed = self.builder.add_many(
+            (tick.symbol, to_epoch_ns(tick.timestamp), tick.price, tick.volume) for tick in ticks
+        )
+        groups: Dict[str, list[Candle]] = {}
+        for symbol, candle in closed:
+            groups.setdefault(symbol, []).append(candle)
+        timeframe = self.builder.timeframe
+        for symbol, candles in groups.items():
+            if ingestion_pipeline.running:
+                await ingestion_pipeline.submit_many(symbol, timeframe, candles)
+            else:
+                await market_stream_service.on_candles(symbol, timeframe, candles)
+        if self.preview_interval > 0:
+            await self._preview(dict.fromkeys(tick.symbol for tick in ticks))
+        return len(closed)
+
+    def snapshot(self) -> dict[str, object]:
+        return {**self.builder.snapshot(), "previews": self.previews}
+
+    async def _preview(self, symbols: Iterable[str]) -> None:
+        now = time.monotonic()
+        for symbol in symbols:
+            if now - self._previewed.get(symbol, float("-inf")) < self.preview_interval:
+                continue
+            candle = self.builder.partial(symbol)
+            if candle is None:
+                continue
+            self._previewed[symbol] = now
+            timeframe = self.builder.timeframe
+            indicators = await market_stream_service.preview(symbol, timeframe, candle)
+            self.previews += 1
+            await event_bus.publish(
+                Event(
+                    type="market.preview",
+                    payload={
+                        "symbol": symbol,
+                        "timeframe": timeframe,
+                        "timestamp": candle.timestamp.isoformat(),
+                        "open": candle.open,
+                        "high": candle.high,
+                        "low": candle.low,
+                        "close": candle.close,
+                        "volume": candle.volume,
+                        "indicators": indicators,
+                    },
+                )
+            )
+
+
+def _build_ingestion() -> TickIngestion:
+    settings = get_settings()
+    builder = TickCandleBuilder(settings.tick_timeframe, grace=settings.tick_close_grace)
+    return TickIngestion(builder, preview_interval=settings.tick_preview_interval)
+
+
+tick_ingestion = _build_ingestion()
@@ -2,46 +2,296 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Dict, Iterable
 
 from fastapi import WebSocket
 
-from app.services.event_bus import event_bus
+from app.core.config import get_settings
+from app.services.event_bus import Subscriber, event_bus
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("alert.triggered", "market.tick", "market.preview")
+ANY = "*"
+
+Topic = tuple[str, str, str]
+TickKey = tuple[str, str]
+
+
+def event_topic(event_type: str, payload: dict[str, Any]) -> Topic:
+    """Tópico (evento, símbolo, timeframe) de um payload publicado no barramento."""
+    source = payload.get("alert", payload) if event_type == "alert.triggered" else payload
+    return event_type, str(source.get("symbol", ANY)), str(source.get("timeframe", ANY))
+
+
+@dataclass(eq=False)
+class _Client:
+    """Estado de entrega de ticks conflacionados de uma conexão."""
+
+    websocket: WebSocket
+    interval: float
+    next_flush: float = 0.0
+    # Último tick pendente por symbol:timeframe, já serializado
+    pending: Dict[TickKey, str] = field(default_factory=dict)
+    inflight: asyncio.Future | None = None
+    inflight_since: float = 0.0
+    on_time: int = 0
 
 
 class WebSocketManager:
-    def __init__(self) -> None:
-        self._connections: set[WebSocket] = set()
+    """Encaminha eventos do barramento para os sockets inscritos em cada tópico.
+
+    O gerenciador mantém uma única inscrição por tipo de evento no barramento,
+    criada na primeira conexão e encerrada em ``close``.
+    Cada frame é serializado uma vez e enviado em paralelo, com timeout por
+    socket, apenas às conexões cujo índice de tópicos casa com o evento.
+    Conexões novas recebem tudo até enviarem a primeira mensagem ``subscribe``.
+
+    Com ``tick_interval`` positivo os ticks não são enviados um a um: o último
+    tick de cada symbol:timeframe fica pendente por cliente e é entregue em um
+    frame ``market.ticks`` a cada intervalo. Clientes que ainda não terminaram
+    o envio anterior têm o intervalo dobrado (até ``max_tick_interval``) e
+    voltam ao ritmo normal depois de acompanharem por alguns ciclos.
+    """
+
+    # Ciclos consecutivos sem atraso para reduzir o intervalo pela metade
+    RECOVERY_FLUSHES = 10
+
+    def __init__(
+        self,
+        send_timeout: float | None = None,
+        tick_interval: float | None = None,
+        max_tick_interval: float | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.send_timeout = send_timeout if send_timeout is not None else settings.websocket_send_timeout
+        self.tick_interval = tick_interval if tick_interval is not None else settings.websocket_tick_interval
+        self.max_tick_interval = (
+            max_tick_interval if max_tick_interval is not None else settings.websocket_max_tick_interval
+        )
+        self._clients: Dict[WebSocket, _Client] = {}
+        self._dirty: Dict[TickKey, dict[str, Any]] = {}
+        self._flusher: asyncio.Task | None = None
+        self._topics: Dict[WebSocket, set[Topic]] = {}
+        self._index: Dict[Topic, set[WebSocket]] = {}
+        # Conexões que ainda não enviaram ``subscribe`` e recebem todos os eventos
+        self._defaults: set[WebSocket] = set()
+        self._forwarders = {event_type: self._forwarder(event_type) for event_type in EVENT_TYPES}
         self._lock = asyncio.Lock()
+        self._subscribed = False
+
+    @property
+    def connections(self) -> int:
+        return len(self._topics)
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
         async with self._lock:
-            self._connections.add(websocket)
-        await event_bus.subscribe("alert.triggered", self._send_alert)
-        await event_bus.subscribe("market.tick", self._send_tick)
+            self._topics[websocket] = set()
+            self._clients[websocket] = _Client(websocket, self.tick_interval)
+            self._defaults.add(websocket)
+            self._add(websocket, self._expand(None, None, None))
+            if not self._subscribed:
+                for event_type, forward in self._forwarders.items():
+                    await event_bus.subscribe(event_type, forward)
+                self._subscribed = True
+                if self.tick_interval > 0:
+                    self._flusher = asyncio.create_task(self._flush_loop(), name="websocket-tick-flush")
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            self._connections.discard(websocket)
-        await event_bus.unsubscribe("alert.triggered", self._send_alert)
-        await event_bus.unsubscribe("market.tick", self._send_tick)
+            topics = self._topics.pop(websocket, None)
+            client = self._clients.pop(websocket, None)
+            if client is not None and client.inflight is not None:
+                client.inflight.cancel()
+            self._defaults.discard(websocket)
+            if topics is not None:
+                self._remove(websocket, topics)
 
-    async def _broadcast(self, message: dict[str, Any]) -> None:
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
         async with self._lock:
-            connections = list(self._connections)
+            if self._subscribed:
+                for event_type, forward in self._forwarders.items():
+                    await event_bus.unsubscribe(event_type, forward)
+                self._subscribed = False
+
+    async def handle_message(self, websocket: WebSocket, text: str) -> None:
+        """Processa ``{"action": "subscribe"|"unsubscribe", "events", "symbols", "timeframes"}``.
+
+        Campos omitidos valem para qualquer valor; o primeiro ``subscribe``
+        substitui a inscrição padrão em todos os eventos.
+        """
+        try:
+            message = json.loads(text)
+            action = message["action"]
+            topics = self._expand(message.get("events"), message.get("symbols"), message.get("timeframes"))
+            if action not in ("subscribe", "unsubscribe"):
+                raise ValueError(f"Ação desconhecida: {action}")
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            await websocket.send_text(json.dumps({"type": "error", "detail": f"Mensagem inválida: {exc}"}))
+            return
 
+        async with self._lock:
+            current = self._topics.get(websocket)
+            if current is None:
+                return
+            if action == "subscribe":
+                if websocket in self._defaults:
+                    self._defaults.discard(websocket)
+                    self._remove(websocket, set(current))
+                self._add(websocket, topics)
+            else:
+                self._remove(websocket, topics & current)
+            subscribed = sorted(":".join(topic) for topic in self._topics[websocket])
+        await websocket.send_text(json.dumps({"type": "subscriptions", "topics": subscribed}))
+
+    def targets(self, topic: Topic) -> set[WebSocket]:
+        event_type, symbol, timeframe = topic
+        index = self._index
+        matched: set[WebSocket] = set()
+        for key in (
+            (event_type, symbol, timeframe),
+            (event_type, symbol, ANY),
+            (event_type, ANY, timeframe),
+            (event_type, ANY, ANY),
+        ):
+            connections = index.get(key)
+            if connections:
+                matched |= connections
+        return matched
+
+    async def broadcast(self, event_type: str, payload: dict[str, Any]) -> None:
+        targets = list(self.targets(event_topic(event_type, payload)))
+        if not targets:
+            return
+        frame = json.dumps({"type": event_type, **payload}, default=str)
+        # Os envios começam juntos, então um prazo comum equivale ao timeout por socket
+        sends = {asyncio.ensure_future(connection.send_text(frame)): connection for connection in targets}
+        done, pending = await asyncio.wait(sends, timeout=self.send_timeout)
+        for task in pending:
+            task.cancel()
+        failed = [sends[task] for task in pending]
+        failed.extend(sends[task] for task in done if task.exception() is not None)
+        await self._drop(failed)
+
+    async def flush(self, now: float | None = None) -> int:
+        """Entrega os ticks pendentes aos clientes cujo intervalo venceu; retorna frames enviados."""
+        now = time.monotonic() if now is None else now
+        if self._dirty:
+            changed, self._dirty = self._dirty, {}
+            for key, payload in changed.items():
+                fragment = json.dumps(payload, separators=(",", ":"), default=str)
+                for websocket in self.targets(("market.tick", *key)):
+                    client = self._clients.get(websocket)
+                    if client is not None:
+                        client.pending[key] = fragment
+
+        # Clientes com as mesmas chaves pendentes recebem o mesmo frame
+        frames: Dict[tuple[TickKey, ...], str] = {}
+        failed: list[WebSocket] = []
+        sent = 0
+        # Tolerância de meio ciclo para que o jitter do timer não pule um flush inteiro
+        horizon = now + self.tick_interval / 2
+        for client in list(self._clients.values()):
+            if not client.pending or horizon < client.next_flush:
+                continue
+            inflight = client.inflight
+            if inflight is not None:
+                if not inflight.done():
+                    if now - client.inflight_since >= self.send_timeout:
+                        inflight.cancel()
+                        failed.append(client.websocket)
+                    else:
+                        client.interval = min(client.interval * 2, self.max_tick_interval)
+                        client.on_time = 0
+                        client.next_flush = now + client.interval
+                    continue
+                if inflight.cancelled() or inflight.exception() is not None:
+                    failed.append(client.websocket)
+                    continue
+                client.on_time += 1
+                if client.on_time >= self.RECOVERY_FLUSHES and client.interval > self.tick_interval:
+                    client.interval = max(client.interval / 2, self.tick_interval)
+                    client.on_time = 0
+
+            keys = tuple(client.pending)
+            frame = frames.get(keys)
+            if frame is None:
+                frame = frames[keys] = '{"type":"market.ticks","ticks":[' + ",".join(client.pending.values()) + "]}"
+            client.pending = {}
+            client.inflight = asyncio.ensure_future(client.websocket.send_text(frame))
+            client.inflight_since = now
+            client.next_flush = now + client.interval
+            sent += 1
+        await self._drop(failed)
+        return sent
+
+    def client_interval(self, websocket: WebSocket) -> float | None:
+        client = self._clients.get(websocket)
+        return client.interval if client is not None else None
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Falha ao enviar ticks conflacionados")
+
+    async def _drop(self, connections: list[WebSocket]) -> None:
         for connection in connections:
+            logger.info("Desconectando WebSocket lento ou encerrado")
+            await self.disconnect(connection)
             try:
-                await connection.send_text(json.dumps(message))
+                await asyncio.wait_for(connection.close(), self.send_timeout)
             except Exception:
-                await self.disconnect(connection)
+                pass
+
+    def _forwarder(self, event_type: str) -> Subscriber:
+        async def forward(payload: dict[str, Any]) -> None:
+            if event_type == "market.tick" and self.tick_interval > 0:
+                _, symbol, timeframe = event_topic(event_type, payload)
+                self._dirty[(symbol, timeframe)] = payload
+                return
+            await self.broadcast(event_type, payload)
+
+        return forward
+
+    def _add(self, websocket: WebSocket, topics: Iterable[Topic]) -> None:
+        current = self._topics[websocket]
+        for topic in topics:
+            current.add(topic)
+            self._index.setdefault(topic, set()).add(websocket)
 
-    async def _send_alert(self, payload: dict[str, Any]) -> None:
-        await self._broadcast({"type": "alert.triggered", **payload})
+    def _remove(self, websocket: WebSocket, topics: Iterable[Topic]) -> None:
+        current = self._topics.get(websocket, set())
+        for topic in topics:
+            current.discard(topic)
+            connections = self._index.get(topic)
+            if connections is not None:
+                connections.discard(websocket)
+                if not connections:
+                    del self._index[topic]
 
-    async def _send_tick(self, payload: dict[str, Any]) -> None:
-        await self._broadcast({"type": "market.tick", **payload})
+    @staticmethod
+    def _expand(
+        events: list[str] | None, symbols: list[str] | None, timeframes: list[str] | None
+    ) -> set[Topic]:
+        events = list(EVENT_TYPES) if events is None or ANY in events else events
+        unknown = set(events) - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(f"Eventos desconhecidos: {', '.join(sorted(unknown))}")
+        symbols = [ANY] if not symbols or ANY in symbols else [str(symbol) for symbol in symbols]
+        timeframes = [ANY] if not timeframes or ANY in timeframes else [str(tf) for tf in timeframes]
+        return set(product(events, symbols, timeframes))
 
 
 ws_manager = WebSocketManager()
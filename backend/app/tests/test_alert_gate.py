@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.indicators.buffer import to_epoch_ns
+from app.indicators.engine import Candle, IndicatorEngine
+from app.main import app
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.alert_gate import AlertGate
+from app.services.alert_store import AlertStore
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+
+START = datetime(2024, 3, 1, 9, 0)
+
+
+def _strategy(strategy_id: int, symbols: list[str], **options) -> StrategyRead:
+    # Condição de nível sempre verdadeira: dispara em todo candle
+    condition = StrategyCondition(
+        left=Operand(source="price", path="close"), operator=Operator.GREATER_THAN, right=Operand(source="number", value=0)
+    )
+    now = datetime.utcnow()
+    return StrategyRead(
+        id=strategy_id, name=f"s{strategy_id}", conditions=[condition], symbols=symbols, is_active=True, created_at=now, updated_at=now, **options
+    )
+
+
+def _minute(index: int) -> int:
+    return to_epoch_ns(START + timedelta(minutes=index))
+
+
+def test_edge_trigger_alerts_only_when_the_condition_starts_to_hold() -> None:
+    gate = AlertGate()
+    strategy = _strategy(1, ["EURUSD"], edge_trigger=True)
+    # Disparos nos minutos 0-3, 6-7 e 9; GBPUSD tem estado próprio
+    admitted = [minute for minute in (0, 1, 2, 3, 6, 7, 9) if gate.admit(strategy, "EURUSD", "M1", _minute(minute))]
+
+    assert admitted == [0, 6, 9]
+    assert gate.admit(strategy, "GBPUSD", "M1", _minute(1))
+    assert (gate.metrics.passed, gate.metrics.repeated, gate.metrics.cooldown) == (4, 4, 0)
+
+
+def test_cooldown_is_measured_by_candle_time_and_forgotten_with_the_strategy() -> None:
+    gate = AlertGate()
+    strategy = _strategy(2, ["EURUSD"], cooldown_seconds=300)
+    admitted = [minute for minute in range(12) if gate.admit(strategy, "EURUSD", "M1", _minute(minute))]
+
+    assert admitted == [0, 5, 10]
+    assert gate.snapshot()["suppressed_by_strategy"] == {"2": 9}
+    gate.forget(2)
+    assert len(gate) == 0 and gate.admit(strategy, "EURUSD", "M1", _minute(11))
+
+    # Sem cooldown nem modo borda nada é guardado
+    plain = _strategy(3, ["EURUSD"])
+    assert all(gate.admit(plain, "EURUSD", "M1", _minute(minute)) for minute in range(3))
+    assert len(gate) == 1
+
+
+@pytest.mark.asyncio
+async def test_suppressed_triggers_do_not_create_alerts(monkeypatch) -> None:
+    # Store próprio: outros testes também gravam alertas para estes ids no global
+    alert_store = AlertStore()
+    monkeypatch.setattr("app.services.market_stream.alert_store", alert_store)
+    service = MarketStreamService(shard=MarketShard(IndicatorEngine(), ConfluenceEngine()))
+    await service.register_many([_strategy(9001, ["GATEEDGE"], edge_trigger=True), _strategy(9002, ["GATECOOL"], cooldown_seconds=600)])
+    for symbol in ("GATEEDGE", "GATECOOL"):
+        candles = [Candle(START + timedelta(minutes=i), 1.0, 1.0, 1.0, 1.0, 1.0) for i in range(30)]
+        await service.on_candles(symbol, "M1", candles)
+
+    edge, _ = alert_store.query(strategy_id=9001)
+    cool, _ = alert_store.query(strategy_id=9002)
+    assert len(edge) == 1 and len(cool) == 3
+    assert service.gate.snapshot()["suppressed"] == 29 + 27
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/v1/v1/metrics/alerts")
+    assert {"passed", "repeated", "cooldown", "suppressed_by_strategy"} <= response.json().keys()
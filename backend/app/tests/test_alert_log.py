@@ -0,0 +1,53 @@
+from app.schemas.alert import AlertCreate
+from app.services.alert_log import AlertLog
+from app.services.alert_store import AlertStore
+
+
+def _create(store: AlertStore, count: int, symbol: str = "EURUSD") -> list:
+    return [
+        store.create(
+            AlertCreate(strategy_id=i % 3, symbol=symbol, timeframe="M1", price=1.0 + i, indicator_snapshot={"rsi.close.14": 55.0})
+        )
+        for i in range(count)
+    ]
+
+
+def test_restart_replays_only_retained_tail_and_continues_ids(tmp_path) -> None:
+    path = tmp_path / "alerts.sqlite3"
+    store = AlertStore(maxlen=50)
+    store.attach_log(AlertLog(path))
+    alerts = _create(store, 500)
+    store.attach_telegram_message(alerts[-1].id, "100:9")
+    log = store.detach_log()
+    log.close()
+    assert log.written == 500
+    assert log.commits < 500  # gravações agrupadas em poucas transações
+
+    restarted = AlertStore(maxlen=50)
+    assert restarted.attach_log(AlertLog(path)) == 50
+    replayed = list(restarted.list())
+    assert [alert.id for alert in replayed] == [alert.id for alert in reversed(alerts[-50:])]
+    assert replayed[0].telegram_message_id == "100:9"
+    assert replayed[0].indicator_snapshot == {"rsi.close.14": 55.0}
+    page, _ = restarted.query(strategy_id=alerts[-1].strategy_id, limit=5)
+    assert page[0].id == alerts[-1].id
+
+    (new,) = _create(restarted, 1, symbol="GBPUSD")
+    assert new.id == alerts[-1].id + 1
+    restarted.detach_log().close()
+
+
+def test_compaction_keeps_retention(tmp_path) -> None:
+    path = tmp_path / "alerts.sqlite3"
+    store = AlertStore(maxlen=10)
+    log = AlertLog(path, retention=100, compact_every=200)
+    store.attach_log(log)
+    for _ in range(5):
+        _create(store, 100)
+        log.flush().result(timeout=5)
+    store.detach_log().close()
+
+    reopened = AlertLog(path)
+    assert len(reopened.tail(1_000)) <= 300
+    assert reopened.tail(1)[0].id == reopened.max_id()
+    reopened.close()
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.main import app
+from app.schemas.alert import AlertCreate
+from app.services.alert_store import AlertStore
+
+
+def _fill(store: AlertStore, count: int) -> list:
+    symbols = ["EURUSD", "GBPUSD", "USDJPY"]
+    return [
+        store.create(AlertCreate(strategy_id=i % 4, symbol=symbols[i % 3], timeframe="M1", price=1.0 + i))
+        for i in range(count)
+    ]
+
+
+def test_retention_evicts_oldest_and_keeps_indexes_consistent() -> None:
+    store = AlertStore(maxlen=100)
+    alerts = _fill(store, 3_000)
+    kept = alerts[-100:]
+
+    assert len(store) == 100
+    assert [alert.id for alert in store.list()] == [alert.id for alert in reversed(kept)]
+    page, cursor = store.query(symbol="GBPUSD", limit=1_000)
+    assert [alert.id for alert in page] == [alert.id for alert in reversed(kept) if alert.symbol == "GBPUSD"]
+    assert cursor is None
+    assert store.get(alerts[0].id) is None
+
+
+def test_cursor_pagination_with_filters_and_since() -> None:
+    store = AlertStore(maxlen=1_000)
+    alerts = _fill(store, 240)
+    expected = [alert.id for alert in reversed(alerts) if alert.symbol == "EURUSD" and alert.strategy_id == 0]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(symbol="EURUSD", strategy_id=0, cursor=cursor, limit=7)
+        seen.extend(alert.id for alert in page)
+        if cursor is None:
+            break
+    assert seen == expected
+
+    since = alerts[200].triggered_at
+    page, _ = store.query(since=since, limit=500)
+    assert all(alert.triggered_at >= since for alert in page)
+    assert store.query(since=datetime.utcnow() + timedelta(days=1))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_alerts_endpoint_pages_with_next_cursor_header() -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for price in (1.0, 2.0, 3.0):
+            await client.post("/api/v1/v1/alerts/", json={"strategy_id": 77, "symbol": "NZDUSD", "timeframe": "M1", "price": price})
+        first = await client.get("/api/v1/v1/alerts/", params={"symbol": "NZDUSD", "limit": 2})
+        second = await client.get(
+            "/api/v1/v1/alerts/", params={"symbol": "NZDUSD", "limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+        )
+        invalid = await client.get("/api/v1/v1/alerts/", params={"cursor": "abc"})
+
+    assert [alert["price"] for alert in first.json()] == [3.0, 2.0]
+    assert [alert["price"] for alert in second.json()] == [1.0]
+    assert "X-Next-Cursor" not in second.headers
+    assert invalid.status_code == 400
@@ -0,0 +1,142 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.backtest import ParameterRange
+from app.schemas.strategy import LogicGate, Operand, Operator, Strategy, StrategyCondition, StrategyRead
+from app.services.backtest import load_history, main, run_backtest
+from app.services.market_shard import MarketShard, indicator_paths
+from app.services.sweep import ParameterSweep, rank, render
+
+
+def _candles(count: int, seed: int = 11) -> list[Candle]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    price = 1.0850
+    candles = []
+    for i in range(count):
+        close = max(price + rng.gauss(0, 0.0008), 0.5)
+        candles.append(
+            Candle(start + timedelta(minutes=i), price, max(price, close) + 0.0002, min(price, close) - 0.0002, close, rng.uniform(10, 100))
+        )
+        price = close
+    return candles
+
+
+def _history(candles: list[Candle]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "open": [c.open for c in candles],
+            "high": [c.high for c in candles],
+            "low": [c.low for c in candles],
+            "close": [c.close for c in candles],
+            "volume": [c.volume for c in candles],
+        },
+        index=pd.DatetimeIndex([c.timestamp for c in candles], name="timestamp"),
+    )
+
+
+def _condition(left: Operand, operator: Operator, right: Operand) -> StrategyCondition:
+    return StrategyCondition(left=left, operator=operator, right=right)
+
+
+def _strategies() -> list[StrategyRead]:
+    ema_fast = Operand(source="indicator", path="ema.close.9")
+    ema_slow = Operand(source="indicator", path="ema.close.21")
+    rsi = Operand(source="indicator", path="rsi.close.14")
+    close = Operand(source="price", path="close")
+    now = datetime.utcnow()
+    specs = [
+        (LogicGate.ALL, [_condition(ema_fast, Operator.CROSSES_ABOVE, ema_slow)]),
+        (LogicGate.ALL, [_condition(ema_fast, Operator.CROSSES_BELOW, ema_slow), _condition(rsi, Operator.LESS_THAN, Operand(source="number", value=50))]),
+        (LogicGate.ANY, [_condition(rsi, Operator.GREATER_THAN, Operand(source="number", value=70)), _condition(close, Operator.CROSSES_BELOW, Operand(source="indicator", path="bb.lower.20"))]),
+        (LogicGate.ALL, [_condition(Operand(source="indicator", path="macd.line"), Operator.CROSSES_ABOVE, Operand(source="indicator", path="macd.signal"))]),
+        (LogicGate.ALL, [_condition(Operand(source="price", path="volume"), Operator.NOT_EQUAL, Operand(source="number", value=0))]),
+        (LogicGate.ANY, [_condition(Operand(source="number", value=60), Operator.LESS_OR_EQUAL, rsi), _condition(close, Operator.GREATER_THAN, ema_slow)]),
+        (LogicGate.SEQUENCE, [_condition(rsi, Operator.LESS_THAN, Operand(source="number", value=40)), _condition(ema_fast, Operator.CROSSES_ABOVE, ema_slow), _condition(rsi, Operator.GREATER_THAN, Operand(source="number", value=55))]),
+    ]
+    return [
+        StrategyRead(id=index, name=f"s{index}", logic=logic, conditions=conditions, symbols=["EURUSD"], is_active=True, created_at=now, updated_at=now)
+        for index, (logic, conditions) in enumerate(specs, start=1)
+    ]
+
+
+def test_backtest_matches_candle_by_candle_replay() -> None:
+    candles = _candles(3000)
+    strategies = _strategies()
+    shard = MarketShard(IndicatorEngine(), ConfluenceEngine())
+    for strategy in strategies:
+        shard.register(strategy)
+    expected: dict[int, list[datetime]] = {strategy.id: [] for strategy in strategies}
+    for candle in candles:
+        for trigger in shard.process("EURUSD", "M1", [candle]).triggers:
+            expected[trigger.strategy_id].append(candle.timestamp)
+
+    history = _history(candles)
+    for strategy in strategies:
+        result = run_backtest(strategy, history)
+        assert result.triggers == expected[strategy.id], strategy.name
+    # Volume não faz parte do contexto de preço: a condição nunca é atendida
+    assert expected[5] == []
+    assert all(expected[strategy_id] for strategy_id in (1, 2, 3, 4, 6, 7))
+
+
+def test_stats_and_loading_from_csv(tmp_path, capsys) -> None:
+    history = _history(_candles(200))
+    path = tmp_path / "eurusd.csv"
+    history.reset_index().rename(columns={"timestamp": "Time", "close": "Close"}).drop(columns="volume").iloc[::-1].to_csv(path, index=False)
+
+    loaded = load_history(path)
+    assert loaded.index.is_monotonic_increasing
+    assert (loaded["volume"] == 0).all()
+    pd.testing.assert_series_equal(loaded["close"], history["close"], check_freq=False)
+
+    strategy = _strategies()[0]
+    result = run_backtest(strategy, loaded, horizons=(1, 500))
+    assert result.candles == 200 and result.start == history.index[0]
+    assert result.stats[0].samples == len(result.triggers)
+    assert result.stats[1].samples == 0 and result.stats[1].hit_rate is None
+    with pytest.raises(ValueError):
+        run_backtest(strategy, loaded, horizons=(0,))
+
+    strategy_path = tmp_path / "strategy.json"
+    strategy_path.write_text(strategy.model_dump_json())
+    assert main([str(strategy_path), str(path)]) == 0
+    assert '"candles": 200' in capsys.readouterr().out
+
+
+def test_sweep_matches_individual_backtests() -> None:
+    template = {
+        "name": "cruzamento {fast}/{slow}",
+        "conditions": [
+            {"left": {"source": "indicator", "path": "ema.close.{fast}"}, "operator": "crosses_above", "right": {"source": "indicator", "path": "ema.close.{slow}"}},
+            {"left": {"source": "indicator", "path": "rsi.close.14"}, "operator": "lt", "right": {"source": "number", "value": "{level}"}},
+        ],
+    }
+    parameters = {
+        "fast": ParameterRange(values=[5, 9]),
+        "slow": ParameterRange(start=20, stop=30, step=10),
+        "level": ParameterRange(start=50, stop=70, step=10),
+    }
+    history = _history(_candles(1500))
+    sweep = ParameterSweep(template, parameters, horizon=5, processes=2)
+    assert sweep.size == 12
+    # Pontos que diferem só no nível do RSI usam as mesmas séries e ficam no mesmo lote
+    assert all(len({indicator_paths(strategy) for _, strategy in batch}) == 1 for batch in sweep.batches)
+
+    points = list(sweep.run(history))
+    assert len(points) == 12
+    for point in points:
+        strategy = Strategy.model_validate(render(template, point.params))
+        (expected,) = run_backtest(strategy, history, horizons=(5,)).stats
+        assert (point.samples, point.mean_return) == (expected.samples, expected.mean_return)
+
+    ranked = rank(points, "hit_rate")
+    rates = [point.hit_rate for point in ranked if point.triggers]
+    assert rates == sorted(rates, reverse=True)
+    with pytest.raises(ValueError):
+        ParameterSweep({**template, "name": "{missing}"}, parameters)
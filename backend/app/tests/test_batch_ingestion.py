@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.main import app
+from app.services.pipeline import IngestionPipeline
+
+BATCH_URL = "/api/v1/v1/simulations/candles/batch"
+
+
+def _bar(symbol: str, minute: int, close: float | None = None) -> dict:
+    price = close if close is not None else 100.0 + minute % 7
+    return {
+        "symbol": symbol,
+        "timeframe": "M1",
+        "open": price,
+        "high": price + 1,
+        "low": price - 1,
+        "close": price,
+        "volume": 10.0,
+        "timestamp": (datetime(2024, 1, 1) + timedelta(minutes=minute)).isoformat(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_status_per_item() -> None:
+    bars = [_bar("BATCHA", 0), _bar("BATCHA", 1, close=-1.0), {"symbol": "BATCHB"}, _bar("BATCHB", 0)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(BATCH_URL, json=bars)
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "partial"
+    assert (body["accepted"], body["rejected"], body["groups"]) == (2, 2, 2)
+    assert [item["status"] for item in body["items"]] == ["accepted", "rejected", "rejected", "accepted"]
+    assert ["close"] in [error["loc"] for error in body["items"][1]["errors"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_accepts_ndjson_stream() -> None:
+    lines = [json.dumps(_bar("NDJSON", minute)) for minute in range(5)]
+    payload = ("\n".join(lines[:2]) + "\n\nnão é json\n" + "\n".join(lines[2:])).encode()
+
+    async def chunks():
+        # Quebra o corpo no meio das linhas para exercitar a remontagem
+        for start in range(0, len(payload), 17):
+            yield payload[start : start + 17]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            BATCH_URL, content=chunks(), headers={"content-type": "application/x-ndjson"}
+        )
+
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (5, 1)
+    assert body["items"][2]["status"] == "rejected"
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_non_array_body() -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(BATCH_URL, json=_bar("BATCHA", 0))
+    assert response.status_code == 422
+
+
+def test_update_many_matches_single_updates() -> None:
+    candles = [
+        Candle(datetime(2024, 1, 1) + timedelta(minutes=i), 1.0, 2.0, 0.5, 1.0 + (i * 37 % 11) / 10, 5.0)
+        for i in range(120)
+    ]
+    single = IndicatorEngine(window=50)
+    batched = IndicatorEngine(window=50)
+    expected = [single.update_mapping("EURUSD", "M1", candle) for candle in candles]
+
+    assert batched.update_many("EURUSD", "M1", candles[:70]) + batched.update_many(
+        "EURUSD", "M1", candles[70:]
+    ) == expected
+    assert batched.candle_window("EURUSD", "M1").close.tolist() == [c.close for c in candles[-50:]]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_hands_batches_to_batch_handler() -> None:
+    batches: list[tuple[str, int]] = []
+
+    async def on_candles(symbol: str, timeframe: str, candles: list[Candle]) -> None:
+        batches.append((symbol, len(candles)))
+
+    async def on_candle(symbol: str, timeframe: str, candle: Candle) -> None:
+        raise AssertionError("lotes devem ir para o batch_handler")
+
+    pipeline = IngestionPipeline(on_candle, shards=2, batch_handler=on_candles)
+    await pipeline.start()
+    candle = Candle(datetime(2024, 1, 1), 1.0, 1.0, 1.0, 1.0, 1.0)
+    await pipeline.submit_many("EURUSD", "M1", [candle] * 3)
+    await pipeline.submit("EURUSD", "M1", candle)
+    metrics = pipeline.metrics()
+    await pipeline.stop()
+
+    assert batches == [("EURUSD", 3), ("EURUSD", 1)]
+    assert sum(shard["enqueued"] for shard in metrics["shards"]) == 4
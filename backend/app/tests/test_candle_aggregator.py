@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.services.candle_aggregator import CandleAggregator
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+
+
+def _minutes(count: int, start: datetime = datetime(2024, 1, 1, 9, 0), gaps: float = 0.0, seed: int = 3) -> list[Candle]:
+    rng = random.Random(seed)
+    price = 1.1
+    candles = []
+    for i in range(count):
+        close = price + rng.gauss(0, 0.001)
+        if rng.random() >= gaps:
+            candles.append(
+                Candle(start + timedelta(minutes=i), price, max(price, close) + 0.0001, min(price, close) - 0.0001, close, rng.uniform(1, 5))
+            )
+        price = close
+    return candles
+
+
+def _resample(candles: list[Candle], rule: str) -> list[tuple]:
+    frame = pd.DataFrame([c.__dict__ for c in candles]).set_index("timestamp")
+    bars = frame.resample(rule).agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna()
+    return [(ts.to_pydatetime(), *(pytest.approx(value) for value in row)) for ts, row in zip(bars.index, bars.to_numpy())]
+
+
+def _rows(candles: list[Candle]) -> list[tuple]:
+    return [(c.timestamp, c.open, c.high, c.low, c.close, c.volume) for c in candles]
+
+
+def test_rolls_up_m1_into_m5_and_m15_with_gaps_and_any_batching() -> None:
+    candles = _minutes(600, gaps=0.2)
+    aggregator = CandleAggregator(["M15", "M5"])
+    closed: dict[str, list[Candle]] = {"M5": [], "M15": []}
+    rng = random.Random(9)
+    start = 0
+    while start < len(candles):
+        size = rng.randint(1, 40)
+        for target, bars in aggregator.update("EURUSD", "M1", candles[start : start + size]).items():
+            closed[target].extend(bars)
+        start += size
+
+    # A última barra só fecha com o seu último minuto ou com um candle do período seguinte
+    partial = aggregator.partial("EURUSD", "M5")
+    emitted_m5 = closed["M5"] + ([partial] if partial else [])
+    assert _rows(emitted_m5) == _resample(candles, "5min")
+    assert _rows(closed["M15"]) == _resample(candles, "15min")[: len(closed["M15"])]
+    assert aggregator.metrics.incomplete > 0
+
+
+def test_bar_closes_on_its_last_minute_and_ignores_stale_candles() -> None:
+    aggregator = CandleAggregator(["M5"])
+    candles = _minutes(7)
+
+    assert aggregator.update("EURUSD", "M1", candles[:4]) == {"M5": []}
+    assert aggregator.partial("EURUSD", "M5").close == candles[3].close
+    (bar,) = aggregator.update("EURUSD", "M1", [candles[4]])["M5"]
+    assert (bar.timestamp, bar.open, bar.close) == (candles[0].timestamp, candles[0].open, candles[4].close)
+    assert aggregator.partial("EURUSD", "M5") is None
+
+    assert aggregator.update("EURUSD", "M1", [candles[2], candles[4]]) == {"M5": []}
+    assert aggregator.metrics.stale == 2
+    assert aggregator.update("EURUSD", "M5", [bar]) == {}
+    assert aggregator.targets("M1") == ("M5",)
+
+
+@pytest.mark.asyncio
+async def test_service_feeds_closed_bars_to_the_derived_timeframe() -> None:
+    engine = IndicatorEngine()
+    service = MarketStreamService(shard=MarketShard(engine, ConfluenceEngine()), aggregator=CandleAggregator(["M5", "M15"]))
+    candles = _minutes(60)
+
+    await service.on_candles("EURUSD", "M1", candles[:32])
+    await service.on_candles("EURUSD", "M1", candles[32:])
+
+    assert len(engine.candle_window("EURUSD", "M1")) == 60
+    assert engine.candle_window("EURUSD", "M5").close.tolist() == [c.close for c in candles[4::5]]
+    assert len(engine.candle_window("EURUSD", "M15")) == 4
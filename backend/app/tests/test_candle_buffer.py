@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.indicators.buffer import CandleBuffer, from_epoch_ns, to_epoch_ns
+from app.indicators.engine import Candle, IndicatorEngine
+
+
+def _fill(buffer: CandleBuffer, count: int) -> None:
+    for i in range(count):
+        buffer.append(i, i + 0.1, i + 0.2, i + 0.3, float(i), 1.0)
+
+
+@pytest.mark.parametrize("count", [3, 10, 11, 57])
+def test_window_returns_last_rows_in_order(count: int) -> None:
+    buffer = CandleBuffer(10, slack=3)
+    _fill(buffer, count)
+
+    window = buffer.window()
+    expected = np.arange(max(count - 10, 0), count)
+    assert len(buffer) == len(window) == min(count, 10)
+    np.testing.assert_array_equal(window.timestamps, expected)
+    np.testing.assert_array_equal(window.close, expected.astype(float))
+    np.testing.assert_array_equal(buffer.window(4).close, expected[-4:].astype(float))
+
+
+def test_window_is_zero_copy_and_read_only() -> None:
+    buffer = CandleBuffer(10)
+    _fill(buffer, 6)
+    window = buffer.window()
+
+    assert np.shares_memory(window.close, buffer.closes())
+    with pytest.raises(ValueError):
+        window.close[0] = 1.0
+
+
+def test_extend_keeps_capacity() -> None:
+    buffer = CandleBuffer(5, slack=2)
+    _fill(buffer, 4)
+    buffer.extend(np.arange(10, 17), np.tile(np.arange(10, 17, dtype=float), (5, 1)))
+
+    np.testing.assert_array_equal(buffer.window().timestamps, np.arange(12, 17))
+
+
+def test_epoch_roundtrip() -> None:
+    moment = datetime(2024, 5, 12, 12, 34, 56, 123456)
+    assert from_epoch_ns(to_epoch_ns(moment)) == moment
+
+
+def test_engine_exposes_window() -> None:
+    engine = IndicatorEngine(window=3)
+    for i in range(5):
+        engine.update("EURUSD", "M1", Candle(datetime(2024, 1, 1, 0, i), 1.0, 1.0, 1.0, 1.0 + i, 2.0))
+
+    window = engine.candle_window("EURUSD", "M1")
+    np.testing.assert_array_equal(window.close, [3.0, 4.0, 5.0])
+    assert len(engine.candle_window("GBPUSD", "M1")) == 0
@@ -0,0 +1,174 @@
+import random
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.indicators.buffer import CandleBuffer
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.services.candle_store import CandleStore
+from app.services.event_bus import event_bus
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+
+
+def _candles(count: int, step: timedelta = timedelta(minutes=1), seed: int = 7) -> list[Candle]:
+    rng = random.Random(seed)
+    price = 1.0850
+    candles = []
+    for i in range(count):
+        close = max(price + rng.gauss(0, 0.0008), 0.5)
+        high, low = max(price, close) + 0.0002, min(price, close) - 0.0002
+        candles.append(Candle(datetime(2024, 1, 1) + i * step, price, high, low, close, rng.uniform(10, 100)))
+        price = close
+    return candles
+
+
+def _assert_same(engine: IndicatorEngine, reference: IndicatorEngine, candles) -> None:
+    # O próximo candle avança os dois a partir do estado corrigido
+    for candle in candles:
+        assert engine.update_mapping("EURUSD", "M1", candle) == pytest.approx(reference.update_mapping("EURUSD", "M1", candle))
+
+
+def test_retried_batch_is_dropped_without_touching_state() -> None:
+    candles = _candles(200)
+    engine = IndicatorEngine()
+    first = engine.update_many("EURUSD", "M1", candles[:150])
+
+    assert engine.update_many("EURUSD", "M1", candles[140:150]) == [None] * 10
+    assert engine.update_mapping("EURUSD", "M1", candles[149]) == first[-1]
+    assert engine.metrics.duplicates == 11 and engine.metrics.replayed == 0
+    assert len(engine.candle_window("EURUSD", "M1")) == 150
+
+
+def test_replacing_the_last_bar_matches_a_clean_feed() -> None:
+    candles = _candles(300)
+    reference = IndicatorEngine()
+    reference.update_many("EURUSD", "M1", candles[:250])
+
+    engine = IndicatorEngine()
+    engine.update_many("EURUSD", "M1", candles[:249])
+    # A barra em formação chega várias vezes antes da versão final
+    for close in (1.2, 1.0, 1.15):
+        engine.update_many("EURUSD", "M1", [replace(candles[249], close=close)])
+    replayed = engine.metrics.replayed
+    engine.update_many("EURUSD", "M1", [candles[249]])
+
+    assert engine.metrics.replaced == 3
+    # Depois da primeira substituição há checkpoint logo antes do último candle
+    assert engine.metrics.replayed - replayed == 1
+    assert engine.candle_window("EURUSD", "M1").close[-1] == candles[249].close
+    _assert_same(engine, reference, candles[250:])
+
+
+def test_late_corrections_recompute_only_the_suffix_within_the_window() -> None:
+    candles = _candles(400)
+    reference = IndicatorEngine()
+    reference.update_many("EURUSD", "M1", candles[:300])
+
+    engine = IndicatorEngine(correction_window=64, checkpoint_interval=16)
+    missing = candles[290]
+    engine.update_many("EURUSD", "M1", [*candles[:280], replace(candles[280], close=9.9), *candles[281:290], *candles[291:300]])
+    assert engine.metrics.gaps == 1 and engine.metrics.missing == 1
+
+    # Correção de um candle antigo e inserção do que faltava, fora de ordem no mesmo lote
+    assert engine.update_many("EURUSD", "M1", [missing, candles[280]]) == [None, None]
+    assert (engine.metrics.inserted, engine.metrics.corrected) == (1, 1)
+    assert engine.metrics.replayed <= 2 * (20 + 16)
+    window = engine.candle_window("EURUSD", "M1")
+    assert np.array_equal(window.close, reference.candle_window("EURUSD", "M1").close)
+    _assert_same(engine, reference, candles[300:])
+
+    engine.update_many("EURUSD", "M1", [replace(candles[100], close=1.0)])
+    assert engine.metrics.rejected == 1
+
+
+def test_gaps_are_measured_in_periods_of_the_timeframe() -> None:
+    candles = _candles(20, step=timedelta(minutes=5))
+    feed = candles[:5] + candles[8:12] + candles[13:]
+
+    engine = IndicatorEngine()
+    engine.update_many("EURUSD", "M5", feed[:6])
+    for candle in feed[6:]:
+        engine.update("EURUSD", "M5", candle)
+
+    assert (engine.metrics.gaps, engine.metrics.missing) == (2, 4)
+    assert engine.ingest_metrics()["missing_by_key"] == {"EURUSD:M5": 4}
+
+
+def test_buffer_insert_keeps_order_and_capacity() -> None:
+    buffer = CandleBuffer(4, slack=0)
+    for index in (0, 1, 3, 4):
+        buffer.append(index * 10, index, index, index, index, index)
+
+    position, exists = buffer.locate(20)
+    assert (position, exists) == (2, False)
+    buffer.insert(position, 20, (2.0, 2.0, 2.0, 2.0, 2.0))
+
+    window = buffer.window()
+    assert window.timestamps.tolist() == [10, 20, 30, 40]
+    assert window.close.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert buffer.locate(30) == (2, True)
+
+
+def test_unordered_warm_up_is_sorted_and_deduplicated_before_corrections() -> None:
+    candles = _candles(300)
+    reference = IndicatorEngine()
+    reference.warm_up("EURUSD", "M1", candles[:250])
+
+    history = candles[:250]
+    # Um candle repetido com valor antigo seguido da versão final, e dois trocados de lugar
+    shuffled = [*history[:100], replace(history[100], close=9.9), *history[100:200], history[201], history[200], *history[202:]]
+    engine = IndicatorEngine()
+    engine.warm_up("EURUSD", "M1", shuffled)
+
+    window = engine.candle_window("EURUSD", "M1")
+    assert np.all(np.diff(window.timestamps) > 0)
+    assert np.array_equal(window.close, reference.candle_window("EURUSD", "M1").close)
+
+    # A correção cai na posição certa e o streaming segue igual ao histórico limpo
+    _assert_same(engine, reference, candles[250:260])
+    corrected = replace(candles[255], close=candles[255].close + 0.001)
+    engine.update_many("EURUSD", "M1", [corrected])
+    reference.update_many("EURUSD", "M1", [corrected])
+    assert engine.metrics.corrected == 1 and engine.metrics.inserted == 0
+    _assert_same(engine, reference, candles[260:])
+
+
+@pytest.mark.asyncio
+async def test_retried_candles_are_not_republished_as_ticks(monkeypatch) -> None:
+    published = []
+
+    async def record(event) -> None:
+        published.append(event)
+
+    monkeypatch.setattr(event_bus, "publish", record)
+    service = MarketStreamService(shard=MarketShard(IndicatorEngine(), ConfluenceEngine()))
+    candles = _candles(30)
+    await service.on_candles("EURUSD", "M1", candles[:20])
+    await service.on_candles("EURUSD", "M1", candles[15:20])
+    await service.on_candles("EURUSD", "M1", [replace(candles[10], close=1.0)])
+    await service.on_candles("EURUSD", "M1", [candles[18], candles[20]])
+
+    ticks = [event.payload["timestamp"] for event in published if event.type == "market.tick"]
+    assert ticks == [candles[19].timestamp.isoformat(), candles[20].timestamp.isoformat()]
+
+
+@pytest.mark.asyncio
+async def test_corrections_reach_the_history_used_after_a_restart(tmp_path) -> None:
+    candles = _candles(120)
+    store = CandleStore(tmp_path)
+    service = MarketStreamService(shard=MarketShard(IndicatorEngine(), ConfluenceEngine()))
+    service.attach_history(store)
+    await service.on_candles("EURUSD", "M1", [*candles[:100], *candles[101:110]])
+    fixed = replace(candles[105], close=1.2)
+    await service.on_candles("EURUSD", "M1", [candles[100], fixed, *candles[110:]])
+    service.detach_history()
+
+    # O aquecimento pelo disco enxerga as barras corrigidas, não as recebidas primeiro
+    expected = [*candles[:105], fixed, *candles[106:]]
+    restarted = IndicatorEngine().warm_up_window("EURUSD", "M1", store.tail("EURUSD", "M1", 120))
+    assert restarted == IndicatorEngine().warm_up("EURUSD", "M1", expected)
+    store.close()
@@ -0,0 +1,189 @@
+import random
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import httpx
+import numpy as np
+import pytest
+
+from app.indicators.buffer import to_epoch_ns
+from app.indicators.engine import Candle, IndicatorEngine
+from app.main import app
+from app.services.candle_store import CandleStore
+from app.services.market_stream import market_stream_service
+
+
+def _candles(count: int, start: datetime = datetime(2024, 1, 1), seed: int = 5) -> list[Candle]:
+    rng = random.Random(seed)
+    price = 1.1
+    candles = []
+    for i in range(count):
+        close = price + rng.gauss(0, 0.001)
+        candles.append(Candle(start + timedelta(minutes=i), price, max(price, close), min(price, close), close, rng.uniform(1, 10)))
+        price = close
+    return candles
+
+
+def test_append_skips_stale_candles_and_survives_reopen(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+    candles = _candles(10)
+
+    assert store.append_many("EUR/USD", "M1", candles[:6]) == 6
+    # Repetidos e anteriores ao último gravado são ignorados
+    assert store.append_many("EUR/USD", "M1", [candles[2], candles[5], *candles[6:]]) == 4
+    assert (store.appended, store.skipped) == (10, 2)
+    store.close()
+
+    reopened = CandleStore(tmp_path)
+    assert reopened.keys() == [("EUR/USD", "M1")]
+    window = reopened.tail("EUR/USD", "M1", 3)
+    assert window.close.tolist() == [c.close for c in candles[-3:]]
+    assert not reopened.append("EUR/USD", "M1", candles[-1])
+    reopened.close()
+
+
+def test_reopen_truncates_partially_written_columns(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+    store.append_many("EURUSD", "M1", _candles(5))
+    store.close()
+    # Simula uma queda no meio da gravação de um lote: só parte das colunas recebeu a linha
+    with open(tmp_path / "EURUSD" / "M1" / "timestamps.bin", "ab") as handle:
+        handle.write(np.int64(0).tobytes())
+
+    reopened = CandleStore(tmp_path)
+    assert reopened.count("EURUSD", "M1") == 5
+    assert reopened.append_many("EURUSD", "M1", _candles(2, start=datetime(2024, 2, 1))) == 2
+    assert len(reopened.range("EURUSD", "M1").timestamps) == 7
+    reopened.close()
+
+
+def test_range_uses_inclusive_bounds_and_limit_direction(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+    candles = _candles(100)
+    store.append_many("EURUSD", "M1", candles)
+    start, end = candles[10].timestamp, candles[19].timestamp
+
+    window = store.range("EURUSD", "M1", start, end)
+    assert window.close.tolist() == [c.close for c in candles[10:20]]
+    assert store.range("EURUSD", "M1", start, end, limit=3).close.tolist() == [c.close for c in candles[10:13]]
+    assert store.range("EURUSD", "M1", end=end, limit=3).close.tolist() == [c.close for c in candles[17:20]]
+    assert len(store.range("EURUSD", "M1", end, start)) == 0
+    assert len(store.range("GBPUSD", "M1")) == 0
+
+    # Visões sobre o mapeamento, sem cópia e somente leitura
+    assert isinstance(window.close.base, np.memmap) or isinstance(window.close, np.memmap)
+    assert not window.close.flags.writeable
+
+    store.append_many("EURUSD", "M1", _candles(5, start=candles[-1].timestamp + timedelta(minutes=1)))
+    assert len(store.range("EURUSD", "M1")) == 105
+    store.close()
+
+
+def test_late_candles_rewrite_the_stored_history_within_the_window(tmp_path) -> None:
+    store = CandleStore(tmp_path, correction_window=10)
+    candles = _candles(30)
+    store.append_many("EURUSD", "M1", [*candles[:20], *candles[21:25]])
+    assert store.tail("EURUSD", "M1", 1).close.tolist() == [candles[24].close]
+
+    fixed = replace(candles[24], close=9.9)
+    # Substitui a última, insere a ausente, ignora a duplicata e a velha demais; os novos entram na ordem
+    batch = [fixed, candles[20], candles[22], replace(candles[3], close=9.9), *candles[25:]]
+    assert store.append_many("EURUSD", "M1", batch) == 7
+    assert (store.appended, store.corrected, store.skipped) == (29, 2, 2)
+    assert store.tail("EURUSD", "M1", 6).close.tolist()[0] == 9.9
+    store.close()
+
+    expected = [*candles[:24], fixed, *candles[25:]]
+    reopened = CandleStore(tmp_path)
+    window = reopened.range("EURUSD", "M1")
+    assert window.timestamps.tolist() == [to_epoch_ns(c.timestamp) for c in expected]
+    assert window.close.tolist() == [c.close for c in expected]
+    reopened.close()
+
+
+def test_reads_of_unknown_keys_do_not_touch_disk(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+
+    assert store.count("NOPE", "M1") == 0
+    assert len(store.range("NOPE", "M1")) == 0
+    assert len(store.tail("NOPE", "M5", 10)) == 0
+    assert list(tmp_path.iterdir()) == []
+    assert store.keys() == []
+    # Nenhum descritor fica aberto para chaves só lidas
+    assert store._series == {}
+
+    store.append_many("NOPE", "M1", _candles(3))
+    assert store.count("NOPE", "M1") == 3
+    store.close()
+
+
+def test_warm_up_from_store_matches_warm_up_from_candles(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+    candles = _candles(800)
+    store.append_many("EURUSD", "M5", candles)
+
+    expected = IndicatorEngine(window=300).warm_up("EURUSD", "M5", candles)
+    engine = IndicatorEngine(window=300)
+    snapshot = engine.warm_up_window("EURUSD", "M5", store.tail("EURUSD", "M5", 800))
+
+    assert snapshot == expected
+    assert len(engine.candle_window("EURUSD", "M5")) == 300
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_candles_endpoint_returns_columns_from_attached_store(tmp_path) -> None:
+    store = CandleStore(tmp_path)
+    candles = _candles(30)
+    store.append_many("EURUSD", "M1", candles)
+    transport = httpx.ASGITransport(app=app)
+    previous = market_stream_service.detach_history()
+    market_stream_service.attach_history(store)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/v1/candles/",
+                params={
+                    "symbol": "EURUSD",
+                    "timeframe": "M1",
+                    "from": candles[5].timestamp.isoformat(),
+                    "to": candles[9].timestamp.isoformat(),
+                },
+            )
+            latest = await client.get("/api/v1/v1/candles/", params={"symbol": "EURUSD", "timeframe": "M1", "limit": 2})
+            market_stream_service.detach_history()
+            disabled = await client.get("/api/v1/v1/candles/", params={"symbol": "EURUSD", "timeframe": "M1"})
+    finally:
+        market_stream_service.detach_history()
+        if previous is not None:
+            market_stream_service.attach_history(previous)
+        store.close()
+
+    body = response.json()
+    assert body["count"] == 5
+    assert body["close"] == [c.close for c in candles[5:10]]
+    assert body["timestamps"][0] == "2024-01-01T00:05"
+    assert latest.json()["close"] == [c.close for c in candles[-2:]]
+    assert disabled.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_candles_endpoint_rejects_unsafe_keys(tmp_path) -> None:
+    store = CandleStore(tmp_path / "history")
+    transport = httpx.ASGITransport(app=app)
+    previous = market_stream_service.detach_history()
+    market_stream_service.attach_history(store)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            traversal = await client.get("/api/v1/v1/candles/", params={"symbol": "..", "timeframe": "M1"})
+            bad_timeframe = await client.get("/api/v1/v1/candles/", params={"symbol": "EURUSD", "timeframe": "H1/../x"})
+            unknown = await client.get("/api/v1/v1/candles/", params={"symbol": "MADEUP", "timeframe": "M1"})
+    finally:
+        market_stream_service.detach_history()
+        if previous is not None:
+            market_stream_service.attach_history(previous)
+        store.close()
+
+    assert traversal.status_code == bad_timeframe.status_code == 422
+    assert unknown.json()["count"] == 0
+    assert list((tmp_path / "history").iterdir()) == []
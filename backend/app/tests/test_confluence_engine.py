@@ -1,6 +1,7 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 
-from app.rules.engine import confluence_engine, EvaluationContext
+from app.rules.engine import ConfluenceEngine, confluence_engine, EvaluationContext
 from app.schemas.strategy import StrategyRead, StrategyCondition, Operand, Operator, LogicGate
 
 
@@ -36,3 +37,201 @@ def test_simple_confluence_engine():
         indicators={"ema.close.9": 1.18, "ema.close.21": 1.20},
     )
     assert confluence_engine.process(strategy, context_down) is False
+
+
+def _strategy(strategy_id, logic, conditions):
+    return StrategyRead(
+        id=strategy_id,
+        name="Compilada",
+        logic=logic,
+        conditions=conditions,
+        symbols=["EURUSD"],
+        timeframe="M1",
+        is_active=True,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+
+
+def _condition(left, operator, right):
+    return StrategyCondition(left=left, operator=operator, right=right)
+
+
+def test_short_circuit_still_tracks_crossovers():
+    engine = ConfluenceEngine()
+    rsi_low = _condition(
+        Operand(source="indicator", path="rsi.close.14"), Operator.LESS_THAN, Operand(source="number", value=30)
+    )
+    ema_cross = _condition(
+        Operand(source="indicator", path="ema.close.9"),
+        Operator.CROSSES_ABOVE,
+        Operand(source="indicator", path="ema.close.21"),
+    )
+    strategy = _strategy(10, LogicGate.ANY, [rsi_low, ema_cross])
+
+    def context(rsi, fast):
+        return EvaluationContext(price={"close": 1.0}, indicators={"rsi.close.14": rsi, "ema.close.9": fast, "ema.close.21": 1.0})
+
+    assert engine.process(strategy, context(20, 0.9)) is True
+    assert engine.process(strategy, context(50, 1.1)) is True
+    assert engine.process(strategy, context(50, 1.2)) is False
+
+
+def test_predicate_table_shares_conditions_between_strategies():
+    engine = ConfluenceEngine()
+    ema_up = _condition(
+        Operand(source="indicator", path="ema.close.9"),
+        Operator.GREATER_THAN,
+        Operand(source="indicator", path="ema.close.21"),
+    )
+    rsi_low = _condition(
+        Operand(source="indicator", path="rsi.close.14"), Operator.LESS_THAN, Operand(source="number", value=30)
+    )
+    first = _strategy(1, LogicGate.ALL, [ema_up, rsi_low])
+    second = _strategy(2, LogicGate.ANY, [rsi_low, ema_up])
+    engine.register(first)
+    engine.register(second)
+
+    table = engine.predicate_table("EURUSD", "M1")
+    assert len(table) == 2
+
+    context = EvaluationContext(
+        price={"close": 1.0}, indicators={"ema.close.9": 1.2, "ema.close.21": 1.1, "rsi.close.14": 45}
+    )
+    assert [s.id for s in engine.evaluate_candle("EURUSD", "M1", context)] == [2]
+    assert engine.evaluate_candle("EURUSD", "M5", context) == []
+
+    engine.unregister(2)
+    assert len(table) == 2
+    engine.register(_strategy(1, LogicGate.ALL, [ema_up]))
+    assert len(engine.predicate_table("EURUSD", "M1")) == 1
+    engine.unregister(1)
+    assert engine.predicate_table("EURUSD", "M1") is None
+    assert len(engine._slots) == 0
+
+
+def _rsi_then_cross(strategy_id, window):
+    rsi_low = _condition(
+        Operand(source="indicator", path="rsi.close.14"), Operator.LESS_THAN, Operand(source="number", value=30)
+    )
+    ema_cross = _condition(
+        Operand(source="indicator", path="ema.close.9"),
+        Operator.CROSSES_ABOVE,
+        Operand(source="indicator", path="ema.close.21"),
+    )
+    strategy = _strategy(strategy_id, LogicGate.SEQUENCE, [rsi_low, ema_cross])
+    return strategy.model_copy(update={"sequence_window": window})
+
+
+def _sequence_feed():
+    # (rsi, ema9) por candle; a EMA21 fica em 1.0
+    return [
+        (25, 0.9),  # 0: RSI baixo arma a sequência
+        (50, 0.95),
+        (50, 1.1),  # 2: cruzamento dentro da janela -> dispara
+        (25, 1.2),  # 3: arma de novo
+        (50, 0.9),
+        (50, 0.8),
+        (50, 0.7),
+        (50, 1.1),  # 7: cruzamento 4 candles depois, fora da janela de 3
+        (25, 0.9),  # 8: arma
+        (25, 0.8),  # 9: RSI ainda baixo renova o prazo
+        (50, 0.8),
+        (50, 0.8),
+        (50, 1.1),  # 12: 3 candles depois da renovação -> dispara
+        (50, 0.9),
+        (50, 1.1),  # 14: cruzamento sem RSI baixo antes
+    ]
+
+
+def _sequence_context(rsi, fast):
+    return EvaluationContext(price={"close": 1.0}, indicators={"rsi.close.14": rsi, "ema.close.9": fast, "ema.close.21": 1.0})
+
+
+def test_sequence_requires_conditions_in_order_within_the_window():
+    strategy = _rsi_then_cross(20, window=3)
+    engine, single = ConfluenceEngine(), ConfluenceEngine()
+    engine.register(strategy)
+    # Uma estratégia ALL com as mesmas condições compartilha os predicados sem afetar a sequência
+    engine.register(_strategy(21, LogicGate.ALL, strategy.conditions))
+
+    table_hits, process_hits = [], []
+    for index, (rsi, fast) in enumerate(_sequence_feed()):
+        context = _sequence_context(rsi, fast)
+        if 20 in [s.id for s in engine.evaluate_candle("EURUSD", "M1", context)]:
+            table_hits.append(index)
+        if single.process(strategy, context):
+            process_hits.append(index)
+
+    assert table_hits == [2, 12]
+    assert process_hits == table_hits
+
+
+def test_sequence_state_survives_export_and_import():
+    strategy = _rsi_then_cross(30, window=3)
+    engine = ConfluenceEngine()
+    engine.register(strategy)
+    for rsi, fast in [(25, 0.9), (50, 0.95)]:
+        engine.evaluate_candle("EURUSD", "M1", _sequence_context(rsi, fast))
+
+    state = engine.export_state()
+    assert state == {"sequences": {"EURUSD:M1": {"30": [1, 2, strategy.updated_at.isoformat()]}}}
+
+    restarted = ConfluenceEngine()
+    restarted.register(strategy)
+    assert restarted.import_state(json.loads(json.dumps(state))) == 1
+    # A memória de cruzamento recomeça: o primeiro candle só a preenche
+    restarted.evaluate_candle("EURUSD", "M1", _sequence_context(50, 0.95))
+    assert [s.id for s in restarted.evaluate_candle("EURUSD", "M1", _sequence_context(50, 1.1))] == [30]
+
+    edited = ConfluenceEngine()
+    edited.register(strategy.model_copy(update={"updated_at": datetime.utcnow() + timedelta(seconds=1)}))
+    assert edited.import_state(state) == 0
+
+
+def _ema_cross(fast_path="ema.close.9", slow_path="ema.close.21"):
+    return _condition(
+        Operand(source="indicator", path=fast_path),
+        Operator.CROSSES_ABOVE,
+        Operand(source="indicator", path=slow_path),
+    )
+
+
+def _ema_context(symbol, fast, slow=1.0):
+    return EvaluationContext(
+        price={"close": 1.0}, indicators={"ema.close.9": fast, "ema.close.21": slow, "ema.close.50": slow}, symbol=symbol, timeframe="M1"
+    )
+
+
+def test_crossover_memory_is_kept_per_symbol():
+    strategy = _strategy(40, LogicGate.ALL, [_ema_cross()]).model_copy(update={"symbols": ["EURUSD", "GBPUSD"]})
+    engine, single = ConfluenceEngine(), ConfluenceEngine()
+    engine.register(strategy)
+
+    # EURUSD está abaixo da média lenta e GBPUSD acima: intercalados, não há cruzamento
+    feed = [("EURUSD", 0.9), ("GBPUSD", 1.1), ("EURUSD", 0.95), ("GBPUSD", 1.2), ("EURUSD", 1.05)]
+    table_hits = [bool(engine.evaluate_candle(symbol, "M1", _ema_context(symbol, fast))) for symbol, fast in feed]
+    process_hits = [single.process(strategy, _ema_context(symbol, fast)) for symbol, fast in feed]
+
+    assert table_hits == process_hits == [False, False, False, False, True]
+    single.unregister(40)
+    assert single._compiled == {} and len(single._slots) == 0
+
+
+def test_crossover_memory_is_shared_and_freed_with_the_strategies():
+    engine = ConfluenceEngine()
+    engine.register(_strategy(50, LogicGate.ALL, [_ema_cross()]))
+    engine.evaluate_candle("EURUSD", "M1", _ema_context("EURUSD", 0.9))
+
+    # Outro cruzamento da mesma EMA rápida já encontra o valor anterior; as duas condições disparam juntas
+    both = _strategy(51, LogicGate.ALL, [_ema_cross(), _ema_cross(slow_path="ema.close.50")])
+    engine.register(both)
+    table = engine.predicate_table("EURUSD", "M1")
+    assert len(table.memory) == 3
+    assert [s.id for s in engine.evaluate_candle("EURUSD", "M1", _ema_context("EURUSD", 1.1))] == [50, 51]
+
+    engine.unregister(51)
+    assert len(table.memory) == 2
+    engine.unregister(50)
+    assert engine.predicate_table("EURUSD", "M1") is None
+    assert len(engine._slots) == 0
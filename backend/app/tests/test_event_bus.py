@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.services.event_bus import DeliveryMode, Event, EventBus, EventPolicy
+
+
+class SlowSubscriber:
+    def __init__(self) -> None:
+        self.seen: list[dict] = []
+        self.gate = asyncio.Event()
+
+    async def __call__(self, payload: dict) -> None:
+        await self.gate.wait()
+        self.seen.append(payload)
+
+
+def _tick(symbol: str, price: float) -> Event:
+    return Event(type="market.tick", payload={"symbol": symbol, "timeframe": "M1", "price": price})
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_publish_and_ticks_conflate() -> None:
+    bus = EventBus(queue_size=4)
+    slow, fast = SlowSubscriber(), SlowSubscriber()
+    fast.gate.set()
+    await bus.subscribe("market.tick", slow)
+    await bus.subscribe("market.tick", fast)
+
+    await bus.publish(_tick("EURUSD", 1.0))
+    await asyncio.sleep(0)  # consumidor do assinante lento retira o primeiro tick e fica preso
+    for price in range(2, 50):
+        await bus.publish(_tick("EURUSD", float(price)))
+        await bus.publish(_tick("GBPUSD", float(price)))
+
+    slow_metrics = bus.metrics()["subscribers"][0]
+    assert slow_metrics["depth"] == 2
+    assert slow_metrics["dropped"] == 0
+    assert slow_metrics["conflated"] == 94
+
+    slow.gate.set()
+    await bus.join()
+    assert [(p["symbol"], p["price"]) for p in slow.seen] == [("EURUSD", 1.0), ("EURUSD", 49.0), ("GBPUSD", 49.0)]
+    assert fast.seen[-1]["price"] == 49.0
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_alerts_are_never_dropped() -> None:
+    bus = EventBus(queue_size=2)
+    slow = SlowSubscriber()
+    await bus.subscribe("alert.triggered", slow)
+
+    publisher = asyncio.ensure_future(
+        asyncio.gather(*(bus.publish(Event("alert.triggered", {"id": i})) for i in range(10)))
+    )
+    await asyncio.sleep(0.01)
+    assert not publisher.done()
+    assert bus.metrics()["subscribers"][0]["blocked"] > 0
+
+    slow.gate.set()
+    await publisher
+    await bus.join()
+    assert sorted(p["id"] for p in slow.seen) == list(range(10))
+    assert bus.metrics()["dropped"] == 0
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_counts_and_failing_subscriber_is_isolated() -> None:
+    bus = EventBus(queue_size=3, policies={"log": EventPolicy(DeliveryMode.DROP_OLDEST)})
+    slow = SlowSubscriber()
+
+    async def broken(payload: dict) -> None:
+        raise RuntimeError("falha do assinante")
+
+    await bus.subscribe("log", slow)
+    await bus.subscribe("log", broken)
+    for i in range(10):
+        await bus.publish(Event("log", {"id": i}))
+
+    slow.gate.set()
+    await bus.join()
+    slow_metrics, broken_metrics = bus.metrics()["subscribers"]
+    assert [p["id"] for p in slow.seen] == [7, 8, 9]
+    assert slow_metrics["dropped"] == 7
+    assert broken_metrics["errors"] == broken_metrics["delivered"]
+    await bus.unsubscribe("log", slow)
+    assert len(bus.metrics()["subscribers"]) == 1
+    await bus.close()
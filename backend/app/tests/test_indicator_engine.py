@@ -0,0 +1,130 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.indicators.registry import IndicatorPlan, registry
+
+
+def _candles(count: int, seed: int = 7) -> list[Candle]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    price = 1.0850
+    candles = []
+    for i in range(count):
+        close = max(price + rng.gauss(0, 0.0008), 0.5)
+        candles.append(
+            Candle(
+                timestamp=start + timedelta(minutes=i),
+                open=price,
+                high=max(price, close) + 0.0002,
+                low=min(price, close) - 0.0002,
+                close=close,
+                volume=rng.uniform(10, 100),
+            )
+        )
+        price = close
+    return candles
+
+
+def _assert_same(left: dict[str, float], right: dict[str, float]) -> None:
+    assert left.keys() == right.keys()
+    for path, value in left.items():
+        # O caminho em lote semeia o sinal a partir de um histórico de só 60 MACDs
+        tolerance = 1e-8 if path == "macd.signal" else 1e-9
+        assert math.isclose(value, right[path], rel_tol=1e-9, abs_tol=tolerance), path
+
+
+@pytest.mark.parametrize("count", [29, 30, 45, 800])
+def test_streaming_matches_batch(count: int) -> None:
+    streaming = IndicatorEngine(streaming=True)
+    batch = IndicatorEngine(streaming=False)
+
+    for candle in _candles(count):
+        expected = batch.update("EURUSD", "M1", candle).to_mapping()
+        actual = streaming.update("EURUSD", "M1", candle).to_mapping()
+        _assert_same(actual, expected)
+
+
+def test_streaming_flat_prices_keep_rsi_at_100() -> None:
+    engine = IndicatorEngine()
+    for i in range(40):
+        candle = Candle(datetime(2024, 1, 1) + timedelta(minutes=i), 1.1, 1.1, 1.1, 1.1, 1.0)
+        snapshot = engine.update("EURUSD", "M1", candle)
+    assert snapshot.rsi == 100.0
+    assert snapshot.bb_upper == pytest.approx(1.1)
+
+
+def test_compute_series_matches_batch_path() -> None:
+    candles = _candles(700)
+    batch = IndicatorEngine(streaming=False)
+    series = IndicatorEngine().compute_series(candles)
+
+    for index, candle in enumerate(candles):
+        expected = batch.update("EURUSD", "M1", candle).to_mapping()
+        row = {path: value for path, value in series.iloc[index].items() if not math.isnan(value)}
+        _assert_same(row, expected)
+
+
+@pytest.mark.parametrize("history", [10, 35, 600])
+@pytest.mark.parametrize("streaming", [True, False])
+def test_warm_up_continues_like_live_updates(history: int, streaming: bool) -> None:
+    candles = _candles(history + 80)
+    live = IndicatorEngine(streaming=streaming)
+    warmed = IndicatorEngine(streaming=streaming)
+
+    for candle in candles[:history]:
+        expected = live.update("EURUSD", "M1", candle)
+    snapshot = warmed.warm_up("EURUSD", "M1", candles[:history])
+    _assert_same(snapshot.to_mapping(), expected.to_mapping())
+
+    for candle in candles[history:]:
+        expected = live.update("EURUSD", "M1", candle).to_mapping()
+        _assert_same(warmed.update("EURUSD", "M1", candle).to_mapping(), expected)
+
+
+def test_plan_shares_intermediate_nodes() -> None:
+    plan = IndicatorPlan(["macd.signal", "macd.line", "ema.close.12", "ema.close.26", "macd.histogram"])
+    kinds = sorted(definition.kind for definition in plan.nodes)
+    assert kinds == ["diff", "ema", "ema", "ema", "macd"]
+
+
+def test_custom_paths_stream_like_vectorized() -> None:
+    paths = ("ema.close.50", "rsi.high.7", "bb.lower.20.3", "macd.histogram.5.35.5")
+    candles = _candles(300)
+    engine = IndicatorEngine(default_paths=paths)
+    series = engine.compute_series(candles, paths)
+
+    for index, candle in enumerate(candles):
+        actual = engine.update_mapping("EURUSD", "M1", candle)
+        row = {path: value for path, value in series.iloc[index].items() if not math.isnan(value)}
+        _assert_same(actual, row)
+    assert set(actual) == set(paths)
+
+
+def test_require_computes_only_referenced_paths_and_seeds_from_window() -> None:
+    candles = _candles(200)
+    engine = IndicatorEngine(default_paths=())
+    reference = IndicatorEngine(default_paths=("ema.close.50", "rsi.close.14"))
+
+    for candle in candles[:120]:
+        assert engine.update_mapping("EURUSD", "M1", candle) == {}
+        reference.update("EURUSD", "M1", candle)
+
+    engine.require("EURUSD", "M1", ["ema.close.50", "rsi.close.14"])
+    for candle in candles[120:]:
+        _assert_same(
+            engine.update_mapping("EURUSD", "M1", candle), reference.update_mapping("EURUSD", "M1", candle)
+        )
+
+    engine.release("EURUSD", "M1", ["ema.close.50", "rsi.close.14"])
+    assert engine.update_mapping("EURUSD", "M1", candles[-1]) == {}
+
+
+def test_unknown_indicator_path_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        registry.parse("ema.typical.9")
+    with pytest.raises(ValueError):
+        IndicatorEngine().require("EURUSD", "M1", ["vwap.close.20"])
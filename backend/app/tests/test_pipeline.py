@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.indicators.engine import Candle
+from app.services.pipeline import IngestionPipeline, OverflowPolicy
+
+
+def _candle(minute: int) -> Candle:
+    return Candle(datetime(2024, 1, 1) + timedelta(minutes=minute), 1.0, 1.0, 1.0, 1.0 + minute, 1.0)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.seen: list[tuple[str, float]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, symbol: str, timeframe: str, candle: Candle) -> None:
+        await self.gate.wait()
+        self.seen.append((symbol, candle.close))
+
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_order_per_symbol() -> None:
+    recorder = Recorder()
+    pipeline = IngestionPipeline(recorder, shards=3, queue_size=4)
+    await pipeline.start()
+    for minute in range(20):
+        for symbol in ("EURUSD", "GBPUSD", "USDJPY"):
+            await pipeline.submit(symbol, "M1", _candle(minute))
+    await pipeline.stop()
+
+    for symbol in ("EURUSD", "GBPUSD", "USDJPY"):
+        closes = [close for seen_symbol, close in recorder.seen if seen_symbol == symbol]
+        assert closes == [1.0 + minute for minute in range(20)]
+
+
+async def _fill_blocked(policy: OverflowPolicy) -> tuple[Recorder, IngestionPipeline]:
+    recorder = Recorder()
+    recorder.gate.clear()
+    pipeline = IngestionPipeline(recorder, shards=1, queue_size=2, policy=policy)
+    await pipeline.start()
+    await pipeline.submit("EURUSD", "M1", _candle(0))
+    await asyncio.sleep(0)  # worker retira o primeiro candle e fica bloqueado no handler
+    for minute in range(1, 6):
+        await pipeline.submit("EURUSD", "M1", _candle(minute))
+    return recorder, pipeline
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy_discards_and_counts() -> None:
+    recorder, pipeline = await _fill_blocked(OverflowPolicy.DROP_OLDEST)
+    metrics = pipeline.metrics()
+    assert metrics["depth"] == 2
+    assert metrics["shards"][0]["dropped"] == 3
+
+    recorder.gate.set()
+    await pipeline.stop()
+    assert [close for _, close in recorder.seen] == [1.0, 5.0, 6.0]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_keeps_latest_candle() -> None:
+    recorder, pipeline = await _fill_blocked(OverflowPolicy.COALESCE)
+    assert pipeline.metrics()["shards"][0]["coalesced"] == 3
+
+    recorder.gate.set()
+    await pipeline.stop()
+    assert [close for _, close in recorder.seen] == [1.0, 2.0, 6.0]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_drops_oldest_for_a_new_key_instead_of_blocking() -> None:
+    recorder, pipeline = await _fill_blocked(OverflowPolicy.COALESCE)
+    # Fila cheia só com EURUSD: GBPUSD não tem item pendente para substituir
+    await asyncio.wait_for(pipeline.submit("GBPUSD", "M1", _candle(7)), timeout=1)
+    shard = pipeline.metrics()["shards"][0]
+    assert (shard["depth"], shard["dropped"], shard["coalesced"]) == (2, 1, 3)
+
+    recorder.gate.set()
+    await pipeline.stop()
+    assert recorder.seen == [("EURUSD", 1.0), ("EURUSD", 6.0), ("GBPUSD", 8.0)]
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.event_bus import event_bus
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+
+
+def _strategy(strategy_id: int, symbols: list[str]) -> StrategyRead:
+    now = datetime.utcnow()
+    condition = StrategyCondition(
+        left=Operand(source="indicator", path="ema.close.5"),
+        operator=Operator.GREATER_THAN,
+        right=Operand(source="price", path="close"),
+    )
+    return StrategyRead(
+        id=strategy_id, name="queda", conditions=[condition], symbols=symbols,
+        is_active=True, created_at=now, updated_at=now,
+    )
+
+
+def _falling(count: int) -> list[Candle]:
+    start = datetime(2024, 1, 1)
+    return [Candle(start + timedelta(minutes=i), 2.0, 2.0, 1.0, 2.0 - i / 100, 1.0) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_process_mode_matches_in_process_alerts() -> None:
+    symbols = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD"]
+    candles = _falling(40)
+    received: list[tuple[int, str, float]] = []
+
+    async def collect(payload: dict) -> None:
+        alert = payload["alert"]
+        received.append((alert["strategy_id"], alert["symbol"], alert["price"]))
+
+    await event_bus.subscribe("alert.triggered", collect)
+    try:
+        local = MarketStreamService(MarketShard(IndicatorEngine(default_paths=()), ConfluenceEngine()))
+        await local.register_strategy(_strategy(9001, symbols))
+        for symbol in symbols:
+            await local.on_candles(symbol, "M1", candles)
+        await local.unregister_strategy(_strategy(9001, symbols))
+        await event_bus.join()
+        expected, received[:] = list(received), []
+
+        sharded = MarketStreamService()
+        await sharded.register_strategy(_strategy(9001, symbols))
+        await sharded.start_processes(2)
+        try:
+            assert {sharded.processes.shard_for(symbol) for symbol in symbols} == {0, 1}
+            for symbol in symbols:
+                await sharded.on_candles(symbol, "M1", candles[:25])
+                for candle in candles[25:]:
+                    await sharded.on_candle(symbol, "M1", candle)
+            await event_bus.join()
+        finally:
+            await sharded.stop_processes()
+    finally:
+        await event_bus.unsubscribe("alert.triggered", collect)
+
+    # Indicadores ficam disponíveis a partir do 30º candle
+    assert len(expected) == len(symbols) * 11
+    assert received == expected
@@ -0,0 +1,153 @@
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.indicators.engine import Candle
+from app.main import app
+from app.rules.engine import ConfluenceEngine, EvaluationContext
+from app.schemas.strategy import LogicGate, Operand, Operator, StrategyCondition, StrategyCreate, StrategyUpdate
+from app.services.alert_store import alert_store
+from app.services.market_stream import MarketStreamService, market_stream_service
+from app.services.strategy_repository import StrategyRepository
+from app.services.strategy_store import StrategyStore
+
+
+def _payload(name: str, symbols: list[str], is_active: bool = True) -> StrategyCreate:
+    condition = StrategyCondition(
+        left=Operand(source="indicator", path="rsi.close.14"),
+        operator=Operator.GREATER_THAN,
+        right=Operand(source="number", value=70),
+    )
+    return StrategyCreate(name=name, conditions=[condition], symbols=symbols, is_active=is_active)
+
+
+@pytest.mark.asyncio
+async def test_strategies_survive_restart_and_are_registered(tmp_path) -> None:
+    url = f"sqlite+aiosqlite:///{tmp_path / 'strategies.sqlite3'}"
+    store = StrategyStore()
+    assert await store.open(StrategyRepository(url)) == []
+    first = await store.create(_payload("sobrecompra", ["EURUSD", "GBPUSD"]))
+    second = await store.create(_payload("pausada", ["USDJPY"], is_active=False))
+    removed = await store.create(_payload("removida", ["EURUSD"]))
+    await store.update(second.id, StrategyUpdate(name="pausada v2"))
+    assert await store.delete(removed.id)
+    await store.close()
+
+    restarted = StrategyStore()
+    loaded = await restarted.open(StrategyRepository(url))
+    assert [strategy.id for strategy in loaded] == [first.id, second.id]
+    assert restarted.get(first.id) == first
+    assert restarted.get(second.id).name == "pausada v2"
+    assert loaded[0].conditions[0].right.value == 70
+
+    service = MarketStreamService()
+    assert await service.register_many(loaded) == 1
+    assert list(service._active) == [first.id]
+
+    third = await restarted.create(_payload("nova", ["EURUSD"]))
+    assert third.id > removed.id
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_databases_without_new_columns_are_migrated(tmp_path) -> None:
+    path = tmp_path / "legacy.sqlite3"
+    with closing(sqlite3.connect(path)) as connection:
+        connection.execute(
+            "CREATE TABLE strategies (id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(200) NOT NULL, logic VARCHAR(16) NOT NULL,"
+            " conditions JSON NOT NULL, symbols JSON NOT NULL, timeframe VARCHAR(8) NOT NULL, is_active BOOLEAN NOT NULL,"
+            " created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO strategies (name, logic, conditions, symbols, timeframe, is_active, created_at, updated_at)"
+            " VALUES ('antiga', 'SEQUENCE', '[]', '[\"EURUSD\"]', 'M1', 1, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"
+        )
+        connection.commit()
+
+    store = StrategyStore()
+    (legacy,) = await store.open(StrategyRepository(f"sqlite+aiosqlite:///{path}"))
+    assert (legacy.sequence_window, legacy.cooldown_seconds, legacy.edge_trigger) == (5, 0, False)
+    updated = await store.update(legacy.id, StrategyUpdate(sequence_window=8))
+    await store.close()
+
+    restarted = StrategyStore()
+    assert await restarted.open(StrategyRepository(f"sqlite+aiosqlite:///{path}")) == [updated]
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_patching_conditions_keeps_the_strategy_alerting() -> None:
+    base = "/api/v1/v1/strategies/"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = (await client.post(base, json=_payload("nível", ["PATCHSYM"]).model_dump(mode="json"))).json()
+        condition = {"left": {"source": "price", "path": "close"}, "operator": "gt", "right": {"source": "number", "value": 0}}
+        patched = await client.patch(f"{base}{created['id']}", json={"conditions": [condition]})
+        assert patched.status_code == 200
+        assert patched.json()["conditions"][0]["left"]["path"] == "close"
+
+        await market_stream_service.on_candle("PATCHSYM", "M1", Candle(datetime(2024, 5, 1), 1.0, 1.0, 1.0, 1.0, 1.0))
+        alerts, _ = alert_store.query(strategy_id=created["id"])
+        assert len(alerts) == 1
+        await client.delete(f"{base}{created['id']}")
+
+
+@pytest.mark.asyncio
+async def test_created_sequence_strategy_compiles_with_its_window() -> None:
+    rsi_low = StrategyCondition(
+        left=Operand(source="indicator", path="rsi.close.14"), operator=Operator.LESS_THAN, right=Operand(source="number", value=30)
+    )
+    rsi_high = StrategyCondition(
+        left=Operand(source="indicator", path="rsi.close.14"), operator=Operator.GREATER_THAN, right=Operand(source="number", value=70)
+    )
+    payload = StrategyCreate(name="sequência", logic=LogicGate.SEQUENCE, conditions=[rsi_low, rsi_high], symbols=["EURUSD"], sequence_window=12)
+    strategy = await StrategyStore().create(payload)
+    assert strategy.sequence_window == 12
+
+    engine = ConfluenceEngine()
+    engine.register(strategy)
+    hits = [
+        bool(engine.evaluate_candle("EURUSD", "M1", EvaluationContext(price={}, indicators={"rsi.close.14": rsi})))
+        for rsi in [20] + [50] * 10 + [80]
+    ]
+    # Onze candles depois do primeiro passo: dentro da janela de 12, fora da padrão de 5
+    assert hits == [False] * 11 + [True]
+
+
+@pytest.mark.asyncio
+async def test_created_strategy_keeps_its_gate_settings() -> None:
+    base = "/api/v1/v1/strategies/"
+    condition = {"left": {"source": "price", "path": "close"}, "operator": "gt", "right": {"source": "number", "value": 0}}
+    body = {"name": "portão", "conditions": [condition], "symbols": ["GATESYM"], "cooldown_seconds": 300, "edge_trigger": True}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = (await client.post(base, json=body)).json()
+        assert created["cooldown_seconds"] == 300
+        assert created["edge_trigger"] is True
+
+        # 9:01 repete o disparo de 9:00, 9:03 cai no cooldown, 9:10 alerta de novo
+        for minute in (0, 1, 3, 10):
+            await market_stream_service.on_candle("GATESYM", "M1", Candle(datetime(2024, 5, 1, 9, minute), 1.0, 1.0, 1.0, 1.0, 1.0))
+        alerts, _ = alert_store.query(strategy_id=created["id"])
+        assert len(alerts) == 2
+        await client.delete(f"{base}{created['id']}")
+
+
+@pytest.mark.asyncio
+async def test_renaming_keeps_the_strategy_inside_its_cooldown() -> None:
+    base = "/api/v1/v1/strategies/"
+    condition = {"left": {"source": "price", "path": "close"}, "operator": "gt", "right": {"source": "number", "value": 0}}
+    body = {"name": "cooldown", "conditions": [condition], "symbols": ["RENAMESYM"], "cooldown_seconds": 300}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = (await client.post(base, json=body)).json()
+        await market_stream_service.on_candle("RENAMESYM", "M1", Candle(datetime(2024, 5, 1, 9, 0), 1.0, 1.0, 1.0, 1.0, 1.0))
+        assert (await client.patch(f"{base}{created['id']}", json={"name": "cooldown v2"})).status_code == 200
+        await market_stream_service.on_candle("RENAMESYM", "M1", Candle(datetime(2024, 5, 1, 9, 1), 1.0, 1.0, 1.0, 1.0, 1.0))
+
+        alerts, _ = alert_store.query(strategy_id=created["id"])
+        assert len(alerts) == 1
+        await client.delete(f"{base}{created['id']}")
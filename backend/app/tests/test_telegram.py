@@ -0,0 +1,129 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core.config import Settings
+from app.schemas.alert import AlertCreate
+from app.services.alert_store import alert_store
+from app.services.telegram import TelegramNotifier, TokenBucket, split_message
+
+
+class FakeTelegram(ThreadingHTTPServer):
+    """Servidor HTTP local que imita ``/bot<token>/sendMessage``."""
+
+    def __init__(self, throttle_first: int = 1) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.messages: list[tuple[str, str]] = []
+        self.connections = 0
+        self.throttle_first = throttle_first
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # mantém a conexão para o keep-alive do cliente
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert self.path == "/botTOKEN/sendMessage"
+        with self.server.lock:
+            if self.server.throttle_first:
+                self.server.throttle_first -= 1
+                status, data = 429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 0}}
+            else:
+                self.server.messages.append((body["chat_id"], body["text"]))
+                status, data = 200, {"ok": True, "result": {"message_id": len(self.server.messages)}}
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_telegram():
+    server = FakeTelegram()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _settings(url: str) -> Settings:
+    return Settings(
+        telegram_token="TOKEN",
+        telegram_chat_ids=["100", "200"],
+        telegram_api_url=url,
+        telegram_chat_rate=50.0,
+        telegram_retry_base=0.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_burst_is_delivered_as_digest_with_retry_and_message_ids(fake_telegram: FakeTelegram) -> None:
+    notifier = TelegramNotifier(_settings(fake_telegram.url))
+    await notifier.start()
+    alerts = [
+        alert_store.create(AlertCreate(strategy_id=i, symbol="EURUSD", timeframe="M1", price=1.1 + i / 100))
+        for i in range(5)
+    ]
+    for alert in alerts:
+        notifier.notify_alert(alert)
+    await notifier.stop()
+
+    texts = {chat: text for chat, text in fake_telegram.messages}
+    assert sorted(texts) == ["100", "200"]
+    assert texts["100"].startswith("🚨 5 alertas acionados")
+    assert all(f"Estratégia #{i}:" in texts["100"] for i in range(5))
+    assert notifier.metrics.digests == 1
+    assert notifier.metrics.retried == 1
+    assert notifier.metrics.sent == 2
+    # Conexões keep-alive reaproveitadas entre a tentativa limitada e os envios
+    assert fake_telegram.connections <= 2
+
+    references = {alert.telegram_message_id for alert in alerts}
+    assert len(references) == 1
+    assert sorted(reference.split(":")[0] for reference in references.pop().split(",")) == ["100", "200"]
+
+
+@pytest.mark.asyncio
+async def test_single_alert_uses_alert_format(fake_telegram: FakeTelegram) -> None:
+    fake_telegram.throttle_first = 0
+    notifier = TelegramNotifier(_settings(fake_telegram.url).model_copy(update={"telegram_chat_ids": ["100"]}))
+    await notifier.start()
+    alert = alert_store.create(AlertCreate(strategy_id=7, symbol="GBPUSD", timeframe="M5", price=1.25))
+    notifier.notify_alert(alert)
+    await notifier.stop()
+
+    assert fake_telegram.messages == [("100", "🚨 Estratégia #7 acionada\nAtivo: GBPUSD (M5)\nPreço: 1.25")]
+    assert alert.telegram_message_id == "100:1"
+
+
+def test_token_bucket_spaces_reservations() -> None:
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 5.0
+    assert bucket.reserve() == 0.0
+
+
+def test_split_message_respects_limit() -> None:
+    text = "\n".join(f"linha {i}" for i in range(1000))
+    chunks = split_message(text, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks) == text
@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta
+
+import httpx
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.indicators.buffer import to_epoch_ns
+from app.indicators.engine import Candle, IndicatorEngine
+from app.main import app
+from app.services.tick_builder import TickCandleBuilder, tick_ingestion
+
+START = datetime(2024, 1, 1, 9, 0)
+
+
+def _ticks(count: int, seed: int = 1) -> list[tuple[str, int, float, float]]:
+    rng = random.Random(seed)
+    price, moment, ticks = 1.1, START, []
+    for _ in range(count):
+        moment += timedelta(milliseconds=rng.randint(50, 900))
+        price += rng.gauss(0, 0.0002)
+        ticks.append(("EURUSD", to_epoch_ns(moment), price, float(rng.randint(1, 9))))
+    return ticks
+
+
+def test_builds_bars_matching_resampled_ticks() -> None:
+    ticks = _ticks(2_000)
+    builder = TickCandleBuilder("M1")
+    closed = [candle for _, candle in builder.add_many(ticks)]
+
+    frame = pd.DataFrame(ticks, columns=["symbol", "ts", "price", "volume"])
+    frame.index = pd.to_datetime(frame["ts"])
+    bars = frame.resample("1min").agg({"price": ["first", "max", "min", "last"], "volume": "sum"}).dropna()
+    expected = [(ts.to_pydatetime(), *row) for ts, row in zip(bars.index, bars.to_numpy().tolist())]
+
+    built = [*closed, builder.partial("EURUSD")]
+    assert [(c.timestamp, c.open, c.high, c.low, c.close, c.volume) for c in built] == pytest.approx(expected)
+    assert builder.metrics.bars == len(closed) and builder.metrics.late == 0
+
+
+def test_out_of_order_ticks_and_expiry_by_tick_clock() -> None:
+    builder = TickCandleBuilder("M1", grace=2.0)
+    at = lambda seconds: to_epoch_ns(START + timedelta(seconds=seconds))  # noqa: E731
+
+    builder.add_many([("EURUSD", at(10), 1.0, 1), ("EURUSD", at(5), 0.9, 1), ("GBPUSD", at(30), 2.0, 1)])
+    partial = builder.partial("EURUSD")
+    assert (partial.open, partial.low, partial.close) == (0.9, 0.9, 1.0)
+
+    # EURUSD fecha com o próprio tick do período seguinte; GBPUSD só depois da tolerância
+    closed = builder.add_many([("EURUSD", at(61), 1.1, 1)])
+    assert [symbol for symbol, _ in closed] == ["EURUSD"]
+    closed = builder.add_many([("EURUSD", at(63), 1.2, 1)])
+    assert [(symbol, candle.close) for symbol, candle in closed] == [("GBPUSD", 2.0)]
+    assert builder.metrics.expired == 1
+
+    assert builder.add_many([("GBPUSD", at(40), 2.1, 1), ("EURUSD", at(20), 1.0, 1)]) == []
+    assert builder.metrics.late == 2
+    assert builder.partial("GBPUSD") is None
+
+
+def test_preview_does_not_advance_indicator_state() -> None:
+    engine, reference = IndicatorEngine(), IndicatorEngine()
+    candles = [Candle(START + timedelta(minutes=i), 1 + i * 1e-3, 1 + i * 1e-3, 1 + i * 1e-3, 1 + (i % 7) * 1e-3, 1) for i in range(120)]
+    for candle in candles[:-1]:
+        engine.update("EURUSD", "M1", candle)
+        reference.update("EURUSD", "M1", candle)
+
+    preview = engine.preview("EURUSD", "M1", candles[-1])
+    expected = reference.update_mapping("EURUSD", "M1", candles[-1])
+    assert engine.update_mapping("EURUSD", "M1", candles[-1]) == expected
+    # Com todo o histórico na janela a prévia coincide com o fechamento do candle
+    assert preview == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_tick_endpoint_closes_bars_and_rejects_invalid_batches() -> None:
+    base = START + timedelta(days=30)
+    body = [
+        {"symbol": "TICKHTTP", "timestamp": (base + timedelta(seconds=1)).isoformat(), "bid": 1.0, "ask": 1.2},
+        {"symbol": "TICKHTTP", "timestamp": (base + timedelta(seconds=20)).isoformat(), "price": 1.3, "volume": 2},
+        {"symbol": "TICKHTTP", "timestamp": (base + timedelta(seconds=70)).isoformat(), "price": 1.4},
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        accepted = await client.post("/api/v1/v1/simulations/ticks", json=body)
+        invalid = await client.post("/api/v1/v1/simulations/ticks", json=[{"symbol": "TICKHTTP", "timestamp": base.isoformat()}])
+        metrics = await client.get("/api/v1/v1/metrics/ticks")
+
+    assert accepted.json() == {"status": "accepted", "ticks": 3, "closed": 1}
+    assert invalid.status_code == 422
+    assert metrics.json()["ticks"] >= 3
+    partial = tick_ingestion.builder.partial("TICKHTTP")
+    assert (partial.open, partial.timestamp) == (1.4, base + timedelta(minutes=1))
+
+
+def test_tick_websocket_reports_invalid_messages_and_keeps_the_connection() -> None:
+    base = START + timedelta(days=31)
+    with TestClient(app).websocket_connect("/ws/ticks") as websocket:
+        websocket.send_text('[{"symbol": "TICKWS"}]')
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json([{"symbol": "TICKWS", "timestamp": base.isoformat(), "price": 1.5}])
+        websocket.send_json([{"symbol": "TICKWS", "timestamp": (base + timedelta(seconds=5)).isoformat(), "price": 1.6}])
+        websocket.send_text('"fim"')
+        assert websocket.receive_json()["type"] == "error"
+
+    assert tick_ingestion.builder.partial("TICKWS").close == 1.6
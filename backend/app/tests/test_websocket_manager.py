@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.event_bus import Event, event_bus
+from app.services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.frames: list[str] = []
+        self.closed = False
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(text)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _subscribe(**fields) -> str:
+    return json.dumps({"action": "subscribe", **fields})
+
+
+@pytest.mark.asyncio
+async def test_thousand_clients_receive_only_their_topics_from_one_encoding() -> None:
+    manager = WebSocketManager(send_timeout=0.05, tick_interval=0)
+    eurusd = [FakeWebSocket() for _ in range(500)]
+    gbpusd = [FakeWebSocket() for _ in range(499)]
+    slow = FakeWebSocket(delay=1.0)
+    for client in eurusd:
+        await manager.connect(client)
+        await manager.handle_message(client, _subscribe(events=["market.tick"], symbols=["EURUSD"], timeframes=["M1"]))
+    for client in [*gbpusd, slow]:
+        await manager.connect(client)
+        await manager.handle_message(client, _subscribe(symbols=["GBPUSD"]))
+    for client in [*eurusd, *gbpusd]:
+        client.frames.clear()
+
+    try:
+        await event_bus.publish(Event("market.tick", {"symbol": "EURUSD", "timeframe": "M1", "price": 1.1}))
+        await event_bus.publish(Event("market.tick", {"symbol": "EURUSD", "timeframe": "M5", "price": 1.1}))
+        await event_bus.publish(
+            Event("alert.triggered", {"alert": {"symbol": "GBPUSD", "timeframe": "M1"}, "strategy": {"id": 1}})
+        )
+        await event_bus.join()
+    finally:
+        await manager.close()
+
+    assert all(len(client.frames) == 1 for client in eurusd)
+    assert len({id(client.frames[0]) for client in eurusd}) == 1
+    assert json.loads(eurusd[0].frames[0])["price"] == 1.1
+    assert all(len(client.frames) == 1 for client in gbpusd)
+    assert json.loads(gbpusd[0].frames[0])["type"] == "alert.triggered"
+    # Cliente que estoura o timeout de envio é desconectado
+    assert slow.closed
+    assert manager.connections == 999
+
+
+@pytest.mark.asyncio
+async def test_subscription_messages() -> None:
+    manager = WebSocketManager(send_timeout=0.05)
+    client = FakeWebSocket()
+    await manager.connect(client)
+    try:
+        assert len(manager.targets(("market.tick", "USDJPY", "M15"))) == 1
+
+        await manager.handle_message(client, _subscribe(events=["market.tick"], symbols=["EURUSD", "GBPUSD"]))
+        assert json.loads(client.frames[-1])["topics"] == ["market.tick:EURUSD:*", "market.tick:GBPUSD:*"]
+        assert not manager.targets(("market.tick", "USDJPY", "M15"))
+
+        await manager.handle_message(client, json.dumps({"action": "unsubscribe", "events": ["market.tick"], "symbols": ["GBPUSD"]}))
+        assert json.loads(client.frames[-1])["topics"] == ["market.tick:EURUSD:*"]
+
+        await manager.handle_message(client, _subscribe(events=["order.filled"]))
+        assert json.loads(client.frames[-1])["type"] == "error"
+        await manager.handle_message(client, "não é json")
+        assert json.loads(client.frames[-1])["type"] == "error"
+    finally:
+        await manager.disconnect(client)
+        await manager.close()
+    assert manager.connections == 0
+
+
+class GatedWebSocket(FakeWebSocket):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def send_text(self, text: str) -> None:
+        await self.gate.wait()
+        self.frames.append(text)
+
+
+def _tick(symbol: str, price: float) -> dict:
+    return {"symbol": symbol, "timeframe": "M1", "price": price}
+
+
+@pytest.mark.asyncio
+async def test_ticks_are_conflated_into_one_frame_per_interval() -> None:
+    manager = WebSocketManager(send_timeout=5.0, tick_interval=0.1, max_tick_interval=0.8)
+    fast, slow = FakeWebSocket(), GatedWebSocket()
+    slow.gate.set()
+    await manager.connect(fast)
+    await manager.connect(slow)
+    await manager.close()  # sem laço automático: os flushes abaixo usam relógio explícito
+    forward = manager._forwarder("market.tick")
+    for client in (fast, slow):
+        await manager.handle_message(client, _subscribe(events=["market.tick"]))
+    fast.frames.clear()
+    slow.frames.clear()
+    slow.gate.clear()
+
+    for price in range(100):
+        await forward(_tick("EURUSD", float(price)))
+        await forward(_tick("GBPUSD", float(price)))
+    assert await manager.flush(now=0.0) == 2
+    await asyncio.sleep(0)
+    frame = json.loads(fast.frames[0])
+    assert frame["type"] == "market.ticks"
+    assert [(tick["symbol"], tick["price"]) for tick in frame["ticks"]] == [("EURUSD", 99.0), ("GBPUSD", 99.0)]
+
+    # O cliente lento ainda não terminou o envio: o intervalo dobra e nada novo é enviado
+    await forward(_tick("EURUSD", 100.0))
+    assert await manager.flush(now=0.1) == 1
+    assert manager.client_interval(slow) == 0.2
+    await forward(_tick("EURUSD", 101.0))
+    await manager.flush(now=0.35)
+    assert manager.client_interval(slow) == 0.4
+
+    slow.gate.set()
+    await asyncio.sleep(0)
+    await manager.flush(now=0.8)
+    await asyncio.sleep(0)
+    assert len(slow.frames) == 2
+    assert [tick["price"] for tick in json.loads(slow.frames[1])["ticks"]] == [101.0]
+
+    for step in range(manager.RECOVERY_FLUSHES):
+        await forward(_tick("EURUSD", 200.0 + step))
+        await manager.flush(now=1.3 + step * 0.5)
+        await asyncio.sleep(0)
+    assert manager.client_interval(slow) == 0.2
+    assert manager.client_interval(fast) == 0.1
+
+    for client in (fast, slow):
+        await manager.disconnect(client)
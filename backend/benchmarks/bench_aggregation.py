@@ -0,0 +1,56 @@
+"""Compara o feed enviando M1, M5 e M15 separadamente com o envio só de M1 consolidado no servidor.
+
+Uso: ``python -m benchmarks.bench_aggregation`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.services.candle_aggregator import CandleAggregator
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+from benchmarks.bench_warm_up import build_history
+
+BATCH = 100
+
+
+def rolled(history: list[Candle], timeframe: str) -> list[Candle]:
+    aggregator = CandleAggregator([timeframe])
+    return aggregator.update("EURUSD", "M1", history)[timeframe]
+
+
+async def feed(service: MarketStreamService, streams: dict[str, list[Candle]]) -> float:
+    started = time.perf_counter()
+    for timeframe, candles in streams.items():
+        for start in range(0, len(candles), BATCH):
+            await service.on_candles("EURUSD", timeframe, candles[start : start + BATCH])
+    return time.perf_counter() - started
+
+
+def service(aggregator: CandleAggregator | None) -> MarketStreamService:
+    return MarketStreamService(shard=MarketShard(IndicatorEngine(), ConfluenceEngine()), aggregator=aggregator)
+
+
+async def main() -> None:
+    history = build_history(100_000)
+    separate = {"M1": history, "M5": rolled(history, "M5"), "M15": rolled(history, "M15")}
+    payloads = sum(len(candles) for candles in separate.values())
+
+    elapsed = await feed(service(None), separate)
+    print(f"{'feed M1 + M5 + M15':<30} {payloads:>8} candles recebidos  {elapsed * 1000:>10.1f} ms")
+    elapsed = await feed(service(CandleAggregator(["M5", "M15"])), {"M1": history})
+    print(f"{'feed M1 + consolidação':<30} {len(history):>8} candles recebidos  {elapsed * 1000:>10.1f} ms")
+
+    aggregator = CandleAggregator(["M5", "M15"])
+    started = time.perf_counter()
+    for start in range(0, len(history), BATCH):
+        aggregator.update("EURUSD", "M1", history[start : start + BATCH])
+    elapsed = time.perf_counter() - started
+    print(f"{'CandleAggregator.update()':<30} {len(history):>8} candles  {len(history) / elapsed:>12,.0f} candles/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
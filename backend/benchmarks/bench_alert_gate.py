@@ -0,0 +1,72 @@
+"""Tempestade de alertas de uma condição de nível: com e sem cooldown/modo borda.
+
+Estratégias com condição sempre verdadeira disparam em todo candle; sem o
+``AlertGate`` cada disparo cria alerta, mensagem do Telegram e evento.
+
+Uso: ``python -m benchmarks.bench_alert_gate`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.indicators.buffer import to_epoch_ns
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.alert_gate import AlertGate
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+
+STRATEGIES = 200
+SYMBOLS = [f"SYM{index}" for index in range(5)]
+CANDLES = 50
+
+
+def build_strategies(**options) -> list[StrategyRead]:
+    condition = StrategyCondition(
+        left=Operand(source="price", path="close"), operator=Operator.GREATER_THAN, right=Operand(source="number", value=0)
+    )
+    now = datetime.utcnow()
+    return [
+        StrategyRead(id=index, name=f"s{index}", conditions=[condition], symbols=SYMBOLS, is_active=True, created_at=now, updated_at=now, **options)
+        for index in range(1, STRATEGIES + 1)
+    ]
+
+
+async def run(label: str, strategies: list[StrategyRead]) -> None:
+    service = MarketStreamService(shard=MarketShard(IndicatorEngine(), ConfluenceEngine()))
+    await service.register_many(strategies)
+    start = datetime(2024, 1, 1)
+    started = time.perf_counter()
+    for index in range(CANDLES):
+        candle = Candle(start + timedelta(minutes=index), 1.0, 1.0, 1.0, 1.0, 1.0)
+        for symbol in SYMBOLS:
+            await service.on_candles(symbol, "M1", [candle])
+    elapsed = time.perf_counter() - started
+    gate = service.gate.snapshot()
+    triggers = STRATEGIES * len(SYMBOLS) * CANDLES
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms  {triggers / elapsed:>10,.0f} disparos/s  {gate['passed']:>6} alertas  {gate['suppressed']:>6} suprimidos")
+
+
+async def main() -> None:
+    # Sem token o notificador só formata a mensagem e registra um aviso por alerta
+    logging.disable(logging.WARNING)
+    print(f"{STRATEGIES} estratégias x {len(SYMBOLS)} símbolos x {CANDLES} candles")
+    await run("sem filtro", build_strategies())
+    await run("cooldown 10 min", build_strategies(cooldown_seconds=600))
+    await run("modo borda", build_strategies(edge_trigger=True))
+
+    gate = AlertGate()
+    strategy = build_strategies(edge_trigger=True)[0]
+    timestamps = [to_epoch_ns(datetime(2024, 1, 1) + timedelta(minutes=index)) for index in range(200_000)]
+    started = time.perf_counter()
+    for timestamp in timestamps:
+        gate.admit(strategy, "EURUSD", "M1", timestamp)
+    print(f"AlertGate.admit()       {(time.perf_counter() - started) / len(timestamps) * 1e9:9.0f} ns/disparo")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Vazão do log de alertas em SQLite (WAL + group commit), isolado e com o pipeline sob carga.
+
+Uso: ``python -m benchmarks.bench_alert_log`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.indicators.engine import Candle
+from app.schemas.alert import AlertCreate
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.alert_log import AlertLog
+from app.services.alert_store import AlertStore, alert_store
+from app.services.market_stream import market_stream_service
+from app.services.pipeline import IngestionPipeline
+
+ALERTS = 100_000
+SYMBOLS = [f"SYM{index}" for index in range(20)]
+STRATEGIES_PER_SYMBOL = 5
+CANDLES_PER_SYMBOL = 1_000
+
+
+def isolated(directory: Path) -> None:
+    store = AlertStore(maxlen=500)
+    log = AlertLog(directory / "isolated.sqlite3")
+    store.attach_log(log)
+    payload = AlertCreate(strategy_id=1, symbol="EURUSD", timeframe="M1", price=1.1, indicator_snapshot={"rsi.close.14": 50.0})
+    started = time.perf_counter()
+    for _ in range(ALERTS):
+        store.create(payload)
+    enqueued = time.perf_counter() - started
+    log.flush().result()
+    elapsed = time.perf_counter() - started
+    store.detach_log().close()
+    print(f"{'create() + log':<30} {ALERTS:>8} alertas  enfileirados em {enqueued * 1000:>7.1f} ms  "
+          f"gravados {ALERTS / elapsed:>10,.0f} alertas/s  ({log.commits} commits)")
+
+
+async def under_load(directory: Path) -> None:
+    log = AlertLog(directory / "pipeline.sqlite3")
+    alert_store.attach_log(log)
+    now = datetime.utcnow()
+    strategy_id = 0
+    for symbol in SYMBOLS:
+        for _ in range(STRATEGIES_PER_SYMBOL):
+            strategy_id += 1
+            condition = StrategyCondition(
+                left=Operand(source="price", path="close"), operator=Operator.GREATER_THAN,
+                right=Operand(source="number", value=0),
+            )
+            await market_stream_service.register_strategy(
+                StrategyRead(id=strategy_id, name=f"s{strategy_id}", conditions=[condition], symbols=[symbol],
+                             is_active=True, created_at=now, updated_at=now)
+            )
+
+    pipeline = IngestionPipeline(market_stream_service.on_candle, shards=4, queue_size=1_000)
+    await pipeline.start()
+    start = datetime(2024, 1, 1)
+    started = time.perf_counter()
+    for minute in range(CANDLES_PER_SYMBOL):
+        candle = Candle(start + timedelta(minutes=minute), 1.0, 1.0, 1.0, 1.0, 1.0)
+        for symbol in SYMBOLS:
+            await pipeline.submit(symbol, "M1", candle)
+    await pipeline.stop()
+    ingested = time.perf_counter() - started
+    await asyncio.wrap_future(log.flush())
+    elapsed = time.perf_counter() - started
+    alert_store.detach_log().close()
+
+    candles = CANDLES_PER_SYMBOL * len(SYMBOLS)
+    print(f"{'pipeline (ingestão)':<30} {candles:>8} candles  {candles / ingested:>10,.0f} candles/s")
+    print(f"{'pipeline (alertas gravados)':<30} {log.written:>8} alertas  {log.written / elapsed:>10,.0f} alertas/s  "
+          f"({log.commits} commits)")
+
+
+def main() -> None:
+    # Sem Telegram configurado cada alerta geraria um aviso no log
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        isolated(Path(directory))
+        asyncio.run(under_load(Path(directory)))
+
+
+if __name__ == "__main__":
+    main()
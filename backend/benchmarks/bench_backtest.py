@@ -0,0 +1,112 @@
+"""Backtest vetorizado de um ano de M1 comparado ao replay candle a candle pelo ``ConfluenceEngine``.
+
+Uso: ``python -m benchmarks.bench_backtest`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import LogicGate, Operand, Operator, StrategyCondition, StrategyRead
+from app.services.backtest import load_history, run_backtest
+from app.services.market_shard import MarketShard
+
+YEAR_M1 = 365 * 24 * 60
+REPLAY_SAMPLE = 20_000
+
+
+def build_history(size: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    closes = np.maximum(1.0850 + np.cumsum(rng.normal(0, 0.0008, size)), 0.5)
+    opens = np.concatenate(([1.0850], closes[:-1]))
+    return pd.DataFrame(
+        {
+            "open": opens,
+            "high": np.maximum(opens, closes) + 0.0002,
+            "low": np.minimum(opens, closes) - 0.0002,
+            "close": closes,
+            "volume": rng.uniform(10, 100, size),
+        },
+        index=pd.date_range("2024-01-01", periods=size, freq="min", name="timestamp"),
+    )
+
+
+def build_strategy() -> StrategyRead:
+    now = datetime.utcnow()
+    return StrategyRead(
+        id=1,
+        name="cruzamento com filtro",
+        logic=LogicGate.ALL,
+        conditions=[
+            StrategyCondition(
+                left=Operand(source="indicator", path="ema.close.9"),
+                operator=Operator.CROSSES_ABOVE,
+                right=Operand(source="indicator", path="ema.close.50"),
+            ),
+            StrategyCondition(
+                left=Operand(source="indicator", path="rsi.close.14"),
+                operator=Operator.LESS_THAN,
+                right=Operand(source="number", value=70),
+            ),
+            StrategyCondition(
+                left=Operand(source="price", path="close"),
+                operator=Operator.GREATER_THAN,
+                right=Operand(source="indicator", path="bb.middle.20"),
+            ),
+        ],
+        symbols=["EURUSD"],
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def replay(strategy: StrategyRead, history: pd.DataFrame) -> list[datetime]:
+    shard = MarketShard(IndicatorEngine(), ConfluenceEngine())
+    shard.register(strategy)
+    triggers = []
+    for row in history.itertuples():
+        candle = Candle(row.Index.to_pydatetime(), row.open, row.high, row.low, row.close, row.volume)
+        if shard.process("EURUSD", "M1", [candle]).triggers:
+            triggers.append(candle.timestamp)
+    return triggers
+
+
+def main() -> None:
+    history = build_history(YEAR_M1)
+    strategy = build_strategy()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "eurusd_m1.csv"
+        history.to_csv(path)
+        started = time.perf_counter()
+        loaded = load_history(path)
+        load_elapsed = time.perf_counter() - started
+
+    result = run_backtest(strategy, loaded)
+    print(f"{'leitura do CSV':<26} {len(loaded):>8} candles  {load_elapsed:>8.2f} s")
+    print(
+        f"{'backtest vetorizado':<26} {result.candles:>8} candles  {result.elapsed_ms / 1000:>8.2f} s  "
+        f"{len(result.triggers)} disparos"
+    )
+
+    sample = history.iloc[:REPLAY_SAMPLE]
+    started = time.perf_counter()
+    expected = replay(strategy, sample)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'replay candle a candle':<26} {len(sample):>8} candles  {elapsed:>8.2f} s  "
+        f"(~{elapsed * YEAR_M1 / len(sample) / 60:.1f} min para um ano)"
+    )
+    assert run_backtest(strategy, sample).triggers == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Ingestão HTTP: um POST por candle x ``/candles/batch`` em JSON e NDJSON.
+
+Os candles são processados em linha (sem o lifespan), com uma estratégia ativa
+por símbolo para que indicadores e regras participem da medição.
+
+Uso: ``python -m benchmarks.bench_batch_ingestion`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.main import app
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.market_stream import market_stream_service
+
+CANDLES = 10_000
+SYMBOLS = 10
+BATCH_SIZE = 500
+BASE_URL = "/api/v1/v1/simulations"
+
+
+def build_bars(prefix: str, count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    prices = [1.0 + index / 10 for index in range(SYMBOLS)]
+    bars = []
+    for i in range(count):
+        index = i % SYMBOLS
+        close = max(prices[index] + rng.gauss(0, 0.001), 0.5)
+        bars.append(
+            {
+                "symbol": f"{prefix}{index}",
+                "timeframe": "M1",
+                "open": prices[index],
+                "high": max(prices[index], close),
+                "low": min(prices[index], close),
+                "close": close,
+                "volume": 1.0,
+                "timestamp": (start + timedelta(minutes=i // SYMBOLS)).isoformat(),
+            }
+        )
+        prices[index] = close
+    return bars
+
+
+async def register(prefix: str, first_id: int) -> None:
+    now = datetime.utcnow()
+    for index in range(SYMBOLS):
+        # Condições que nunca disparam: mede apenas indicadores e avaliação
+        conditions = [
+            StrategyCondition(
+                left=Operand(source="indicator", path=path), operator=Operator.GREATER_THAN,
+                right=Operand(source="number", value=1e9),
+            )
+            for path in ("ema.close.9", "rsi.close.14", "macd.signal", "bb.upper.20")
+        ]
+        await market_stream_service.register_strategy(
+            StrategyRead(
+                id=first_id + index, name=f"bench-{prefix}{index}", conditions=conditions,
+                symbols=[f"{prefix}{index}"], is_active=True, created_at=now, updated_at=now,
+            )
+        )
+
+
+def report(label: str, size: int, elapsed: float) -> None:
+    print(f"{label:<34} {size:>8} candles  {elapsed * 1000:>10.1f} ms  {size / elapsed:>12,.0f} candles/s")
+
+
+async def main() -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await register("SINGLE", 1)
+        bars = build_bars("SINGLE", CANDLES)
+        started = time.perf_counter()
+        for bar in bars:
+            await client.post(f"{BASE_URL}/candles", json=bar)
+        report("POST /candles (1 por vez)", len(bars), time.perf_counter() - started)
+
+        await register("JSON", 1_000)
+        bars = build_bars("JSON", CANDLES)
+        started = time.perf_counter()
+        for offset in range(0, len(bars), BATCH_SIZE):
+            await client.post(f"{BASE_URL}/candles/batch", json=bars[offset : offset + BATCH_SIZE])
+        report(f"POST /candles/batch JSON x{BATCH_SIZE}", len(bars), time.perf_counter() - started)
+
+        await register("NDJSON", 2_000)
+        bars = build_bars("NDJSON", CANDLES)
+        started = time.perf_counter()
+        for offset in range(0, len(bars), BATCH_SIZE):
+            body = "\n".join(json.dumps(bar) for bar in bars[offset : offset + BATCH_SIZE])
+            await client.post(
+                f"{BASE_URL}/candles/batch", content=body, headers={"content-type": "application/x-ndjson"}
+            )
+        report(f"POST /candles/batch NDJSON x{BATCH_SIZE}", len(bars), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
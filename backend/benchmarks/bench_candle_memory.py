@@ -0,0 +1,60 @@
+"""Compara a memória de ``deque[Candle]`` com o ``CandleBuffer`` colunar.
+
+Uso: ``python -m benchmarks.bench_candle_memory`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from app.indicators.buffer import CandleBuffer, to_epoch_ns
+from app.indicators.engine import Candle
+
+KEYS = 1_000
+WINDOW = 500
+
+
+def build_deques() -> list[deque]:
+    start = datetime(2024, 1, 1)
+    keys = []
+    for k in range(KEYS):
+        candles: deque = deque(maxlen=WINDOW)
+        for i in range(WINDOW):
+            price = 1.0 + k * 1e-4 + i * 1e-6
+            candles.append(Candle(start + timedelta(minutes=i), price, price, price, price, 1.0))
+        keys.append(candles)
+    return keys
+
+
+def build_buffers() -> list[CandleBuffer]:
+    start = to_epoch_ns(datetime(2024, 1, 1))
+    keys = []
+    for k in range(KEYS):
+        buffer = CandleBuffer(WINDOW)
+        for i in range(WINDOW):
+            price = 1.0 + k * 1e-4 + i * 1e-6
+            buffer.append(start + i * 60_000_000_000, price, price, price, price, 1.0)
+        keys.append(buffer)
+    return keys
+
+
+def measure(label: str, builder) -> int:
+    tracemalloc.start()
+    data = builder()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    print(f"{label:<22} {current / 2**20:>8.1f} MiB  ({current / KEYS / 1024:.1f} KiB por chave)")
+    return current
+
+
+def main() -> None:
+    print(f"{KEYS} chaves x {WINDOW} candles")
+    legacy = measure("deque[Candle]", build_deques)
+    columnar = measure("CandleBuffer", build_buffers)
+    print(f"redução: {legacy / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
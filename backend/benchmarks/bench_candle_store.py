@@ -0,0 +1,53 @@
+"""Mede gravação, consultas por intervalo e aquecimento a partir do ``CandleStore``.
+
+Uso: ``python -m benchmarks.bench_candle_store`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from app.indicators.engine import Candle, IndicatorEngine
+from app.services.candle_store import CandleStore
+from benchmarks.bench_warm_up import build_history, timed
+
+
+def query_latency(store: CandleStore, symbol: str, history: list[Candle], queries: int = 2_000) -> None:
+    rng = random.Random(7)
+    started = time.perf_counter()
+    for _ in range(queries):
+        first = history[rng.randrange(len(history) - 500)].timestamp
+        window = store.range(symbol, "M1", first, first + timedelta(minutes=499))
+        assert len(window) == 500
+    elapsed = time.perf_counter() - started
+    print(f"range() de 500 candles em {len(history):>9,} {elapsed / queries * 1e6:>10.1f} us/consulta")
+
+
+def main() -> None:
+    history = build_history(1_000_000)
+    with tempfile.TemporaryDirectory(prefix="candles-") as directory:
+        store = CandleStore(directory)
+
+        def ingest() -> None:
+            # Lotes de 100 candles, como chegam pelo POST /market/candles
+            for start in range(0, len(history), 100):
+                store.append_many("EURUSD", "M1", history[start : start + 100])
+
+        timed("append_many() em lotes de 100", len(history), ingest)
+        timed("append() candle a candle", 20_000, lambda: [store.append("GBPUSD", "M1", c) for c in history[:20_000]])
+
+        for size in (10_000, 100_000, 1_000_000):
+            store.append_many(f"SIZE{size}", "M1", history[:size])
+            query_latency(store, f"SIZE{size}", history[:size])
+
+        window = store.tail("EURUSD", "M1", 100_000)
+        candles = history[-100_000:]
+        timed("warm_up() a partir de Candle", len(candles), lambda: IndicatorEngine().warm_up("EURUSD", "M1", candles))
+        timed("warm_up_window() do mapeamento", len(window), lambda: IndicatorEngine().warm_up_window("EURUSD", "M1", window))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
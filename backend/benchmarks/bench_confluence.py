@@ -0,0 +1,138 @@
+"""Avaliação de 10 mil estratégias por candle: interpretador original x tabela de predicados compilados.
+
+Uso: ``python -m benchmarks.bench_confluence`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime
+
+from app.rules.engine import ConfluenceEngine, EvaluationContext
+from app.schemas.strategy import LogicGate, Operand, Operator, StrategyCondition, StrategyRead
+
+STRATEGIES = 10_000
+CANDLES = 20
+PATHS = ["ema.close.9", "ema.close.21", "rsi.close.14", "macd.line", "macd.signal", "bb.upper.20", "bb.lower.20"]
+
+
+def build_strategies(count: int, seed: int = 1) -> list[StrategyRead]:
+    rng = random.Random(seed)
+    comparisons = [Operator.GREATER_THAN, Operator.LESS_THAN, Operator.GREATER_OR_EQUAL, Operator.LESS_OR_EQUAL]
+    now = datetime.utcnow()
+    strategies = []
+    for strategy_id in range(1, count + 1):
+        conditions = []
+        for _ in range(rng.randint(2, 4)):
+            left = Operand(source="indicator", path=rng.choice(PATHS))
+            if rng.random() < 0.5:
+                right = Operand(source="number", value=rng.choice(range(10, 95, 5)))
+            else:
+                right = Operand(source=rng.choice(["indicator", "price"]), path=rng.choice(PATHS + ["close"]))
+            operator = Operator.CROSSES_ABOVE if rng.random() < 0.1 else rng.choice(comparisons)
+            conditions.append(StrategyCondition(left=left, operator=operator, right=right))
+        strategies.append(
+            StrategyRead(
+                id=strategy_id,
+                name=f"s{strategy_id}",
+                logic=rng.choice([LogicGate.ALL, LogicGate.ANY]),
+                conditions=conditions,
+                symbols=["EURUSD"],
+                is_active=True,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    return strategies
+
+
+class InterpretedEngine:
+    """Cópia do avaliador original, que percorre os modelos Pydantic a cada candle.
+
+    A memória de cruzamento é guardada por condição, como nos predicados compartilhados.
+    """
+
+    def __init__(self) -> None:
+        self._previous: dict[int, dict[int, float]] = {}
+
+    def process(self, strategy: StrategyRead, context: EvaluationContext) -> bool:
+        resolved = [
+            self._condition(strategy.id, index, condition, context)
+            for index, condition in enumerate(strategy.conditions)
+        ]
+        return any(resolved) if strategy.logic == LogicGate.ANY else all(resolved)
+
+    def _condition(
+        self, strategy_id: int, index: int, condition: StrategyCondition, context: EvaluationContext
+    ) -> bool:
+        left = self._operand(condition.left, context)
+        right = self._operand(condition.right, context)
+        if left is None or right is None:
+            return False
+        op = condition.operator
+        if op == Operator.GREATER_THAN:
+            return left > right
+        if op == Operator.LESS_THAN:
+            return left < right
+        if op == Operator.GREATER_OR_EQUAL:
+            return left >= right
+        if op == Operator.LESS_OR_EQUAL:
+            return left <= right
+        if op == Operator.CROSSES_ABOVE:
+            memory = self._previous.setdefault(strategy_id, {})
+            previous = memory.get(index)
+            memory[index] = left
+            return previous is not None and previous <= right and left > right
+        return False
+
+    @staticmethod
+    def _operand(operand: Operand, context: EvaluationContext) -> float | None:
+        if operand.source == "number":
+            return operand.value
+        if operand.source == "price":
+            return context.price.get(operand.path)
+        return context.indicators.get(operand.path)
+
+
+def contexts(seed: int = 2) -> list[EvaluationContext]:
+    rng = random.Random(seed)
+    return [
+        EvaluationContext(
+            price={"close": rng.uniform(0, 100)},
+            indicators={path: rng.uniform(0, 100) for path in PATHS},
+        )
+        for _ in range(CANDLES)
+    ]
+
+
+def main() -> None:
+    strategies = build_strategies(STRATEGIES)
+    frames = contexts()
+
+    interpreted = InterpretedEngine()
+    started = time.perf_counter()
+    expected = [{s.id for s in strategies if interpreted.process(s, ctx)} for ctx in frames]
+    legacy = (time.perf_counter() - started) / CANDLES
+
+    engine = ConfluenceEngine()
+    started = time.perf_counter()
+    for strategy in strategies:
+        engine.register(strategy)
+    compile_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [{s.id for s in engine.evaluate_candle("EURUSD", "M1", ctx)} for ctx in frames]
+    compiled = (time.perf_counter() - started) / CANDLES
+
+    assert actual == expected, "resultados divergentes"
+    print(f"{STRATEGIES} estratégias, média de {CANDLES} candles")
+    print(f"interpretado  {legacy * 1000:8.2f} ms/candle")
+    print(f"compilado     {compiled * 1000:8.2f} ms/candle  ({legacy / compiled:.1f}x)")
+    print(f"compilação    {compile_time * 1000:8.2f} ms (uma vez, no registro)")
+    table = engine.predicate_table("EURUSD", "M1")
+    conditions = sum(len(s.conditions) for s in strategies)
+    print(f"predicados    {len(table)} distintos para {conditions} condições")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Custo de duplicatas e correções de candles comparado a reconstruir a chave inteira.
+
+Uso: ``python -m benchmarks.bench_corrections`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+
+from app.indicators.engine import IndicatorEngine
+from benchmarks.bench_warm_up import build_history
+
+REPEAT = 2_000
+
+
+def per_call(label: str, func, repeat: int = REPEAT) -> None:
+    started = time.perf_counter()
+    for index in range(repeat):
+        func(index)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<44} {elapsed / repeat * 1e6:>10.1f} us/candle")
+
+
+def main() -> None:
+    history = build_history(20_000)
+
+    for interval in (16, 10**9):
+        engine = IndicatorEngine(checkpoint_interval=interval)
+        started = time.perf_counter()
+        for start in range(0, len(history), 100):
+            engine.update_many("EURUSD", "M1", history[start : start + 100])
+        elapsed = time.perf_counter() - started
+        label = "sem checkpoints" if interval > len(history) else f"checkpoint a cada {interval}"
+        print(f"{'update_many() ' + label:<44} {elapsed / len(history) * 1e6:>10.1f} us/candle")
+
+    engine = IndicatorEngine()
+    engine.update_many("EURUSD", "M1", history)
+    last = history[-1]
+    per_call("duplicata exata", lambda _: engine.update_many("EURUSD", "M1", [last]))
+    per_call(
+        "substituição da barra em formação",
+        lambda index: engine.update_many("EURUSD", "M1", [replace(last, close=last.close + index * 1e-6)]),
+    )
+    for depth in (8, 32, 60):
+        candle = history[-depth]
+        per_call(
+            f"correção {depth} candles atrás",
+            lambda index: engine.update_many("EURUSD", "M1", [replace(candle, close=candle.close + index * 1e-6)]),
+            repeat=500,
+        )
+    # Alternativa sem checkpoints: reconstruir a chave pela janela em memória
+    window = engine.candle_window("EURUSD", "M1").copy()
+    per_call("reconstrução pela janela (warm_up_window)", lambda _: engine.warm_up_window("EURUSD", "M1", window), repeat=200)
+
+
+if __name__ == "__main__":
+    main()
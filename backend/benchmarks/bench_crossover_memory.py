@@ -0,0 +1,98 @@
+"""Memória de cruzamento com 100 mil pares estratégia×símbolo.
+
+Compara a memória compartilhada por chave symbol:timeframe (um valor anterior
+por operando) com o layout de um dict por estratégia e símbolo, que é o que
+guardar o valor por ``(estratégia, símbolo, operando)`` exigiria.
+
+Uso: ``python -m benchmarks.bench_crossover_memory`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.rules.engine import ConfluenceEngine, EvaluationContext
+from app.schemas.strategy import LogicGate, Operand, Operator, StrategyCondition, StrategyRead
+
+STRATEGIES = 10_000
+SYMBOLS = [f"SYM{index}" for index in range(10)]
+CANDLES = 5
+PATHS = ["ema.close.9", "ema.close.21", "ema.close.50", "macd.line", "macd.signal", "bb.upper.20", "bb.lower.20", "rsi.close.14"]
+
+
+def build_strategies(count: int, seed: int = 5) -> list[StrategyRead]:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    strategies = []
+    for strategy_id in range(1, count + 1):
+        fast, slow = rng.sample(PATHS, 2)
+        conditions = [
+            StrategyCondition(
+                left=Operand(source="indicator", path=fast),
+                operator=rng.choice([Operator.CROSSES_ABOVE, Operator.CROSSES_BELOW]),
+                right=Operand(source="indicator", path=slow),
+            ),
+            StrategyCondition(
+                left=Operand(source="indicator", path="rsi.close.14"),
+                operator=Operator.LESS_THAN,
+                right=Operand(source="number", value=rng.randrange(20, 80, 5)),
+            ),
+        ]
+        strategies.append(
+            StrategyRead(
+                id=strategy_id,
+                name=f"s{strategy_id}",
+                logic=LogicGate.ANY,
+                conditions=conditions,
+                symbols=SYMBOLS,
+                is_active=True,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    return strategies
+
+
+def main() -> None:
+    strategies = build_strategies(STRATEGIES)
+    rng = random.Random(9)
+    frames = [
+        EvaluationContext(price={"close": 1.0}, indicators={path: rng.uniform(0, 100) for path in PATHS})
+        for _ in range(CANDLES)
+    ]
+    pairs = STRATEGIES * len(SYMBOLS)
+
+    engine = ConfluenceEngine()
+    for strategy in strategies:
+        engine.register(strategy)
+    started = time.perf_counter()
+    for context in frames:
+        for symbol in SYMBOLS:
+            engine.evaluate_candle(symbol, "M1", context)
+    elapsed = (time.perf_counter() - started) / (CANDLES * len(SYMBOLS))
+
+    memories = [engine.predicate_table(symbol, "M1").memory for symbol in SYMBOLS]
+    shared = sum(sys.getsizeof(memory.values) + sys.getsizeof(memory._refs) for memory in memories)
+    operands = sum(len(memory) for memory in memories)
+
+    # Layout alternativo: valor anterior por (estratégia, símbolo, operando)
+    tracemalloc.start()
+    per_pair = {
+        (strategy.id, symbol): {strategy.conditions[0].left.path: float(index)}
+        for index, strategy in enumerate(strategies)
+        for symbol in SYMBOLS
+    }
+    per_pair_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{STRATEGIES} estratégias x {len(SYMBOLS)} símbolos = {pairs} pares")
+    print(f"memória compartilhada por chave  {shared / 1024:10.1f} KiB  ({operands} operandos em {len(memories)} chaves)")
+    print(f"dict por estratégia e símbolo    {per_pair_bytes / 1024:10.1f} KiB  ({len(per_pair)} dicts)")
+    print(f"avaliação                        {elapsed * 1000:10.2f} ms/candle por símbolo")
+
+
+if __name__ == "__main__":
+    main()
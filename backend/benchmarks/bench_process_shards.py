@@ -0,0 +1,65 @@
+"""Indicadores e regras no processo da API x particionados entre processos worker.
+
+Uso: ``python -m benchmarks.bench_process_shards`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+
+from app.indicators.engine import IndicatorEngine
+from app.rules.engine import ConfluenceEngine
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyRead
+from app.services.market_shard import MarketShard
+from app.services.market_stream import MarketStreamService
+from benchmarks.bench_warm_up import build_history
+
+SYMBOLS = [f"SYM{index}" for index in range(8)]
+CANDLES = 20_000
+BATCH_SIZE = 500
+PATHS = ["ema.close.9", "ema.close.21", "ema.close.50", "rsi.close.14", "macd.signal", "bb.upper.20", "bb.lower.20"]
+
+
+def build_strategy() -> StrategyRead:
+    now = datetime.utcnow()
+    conditions = [
+        StrategyCondition(
+            left=Operand(source="indicator", path=path), operator=Operator.GREATER_THAN,
+            right=Operand(source="number", value=1e9),
+        )
+        for path in PATHS
+    ]
+    return StrategyRead(
+        id=1, name="bench", conditions=conditions, symbols=SYMBOLS, is_active=True, created_at=now, updated_at=now
+    )
+
+
+async def run(service: MarketStreamService, label: str) -> None:
+    history = build_history(CANDLES)
+    await service.register_strategy(build_strategy())
+
+    async def feed(symbol: str) -> None:
+        for offset in range(0, len(history), BATCH_SIZE):
+            await service.on_candles(symbol, "M1", history[offset : offset + BATCH_SIZE])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(feed(symbol) for symbol in SYMBOLS))
+    elapsed = time.perf_counter() - started
+    total = CANDLES * len(SYMBOLS)
+    print(f"{label:<24} {total:>8} candles  {elapsed * 1000:>10.1f} ms  {total / elapsed:>12,.0f} candles/s")
+
+
+async def main() -> None:
+    await run(MarketStreamService(MarketShard(IndicatorEngine(default_paths=()), ConfluenceEngine())), "no processo da API")
+    for processes in (2, 4):
+        service = MarketStreamService(MarketShard(IndicatorEngine(default_paths=()), ConfluenceEngine()))
+        await service.start_processes(processes)
+        try:
+            await run(service, f"{processes} processos")
+        finally:
+            await service.stop_processes()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Custo do autômato SEQUENCE com dezenas de milhares de pares estratégia×símbolo.
+
+Compara a avaliação por candle com as mesmas estratégias em ALL e mede o
+tamanho do estado e a exportação/restauração usada no reinício.
+
+Uso: ``python -m benchmarks.bench_sequence`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import json
+import random
+import time
+
+from app.rules.engine import ConfluenceEngine, EvaluationContext
+from app.schemas.strategy import LogicGate, StrategyRead
+from benchmarks.bench_confluence import PATHS, build_strategies
+
+STRATEGIES = 10_000
+SYMBOLS = [f"SYM{index}" for index in range(5)]
+CANDLES = 20
+
+
+def register(strategies: list[StrategyRead], logic: LogicGate) -> ConfluenceEngine:
+    engine = ConfluenceEngine()
+    for strategy in strategies:
+        engine.register(strategy.model_copy(update={"logic": logic, "symbols": SYMBOLS, "sequence_window": 10}))
+    return engine
+
+
+def main() -> None:
+    rng = random.Random(3)
+    frames = [
+        EvaluationContext(price={"close": rng.uniform(0, 100)}, indicators={path: rng.uniform(0, 100) for path in PATHS})
+        for _ in range(CANDLES)
+    ]
+    strategies = build_strategies(STRATEGIES)
+    pairs = STRATEGIES * len(SYMBOLS)
+    print(f"{STRATEGIES} estratégias x {len(SYMBOLS)} símbolos = {pairs} pares, média de {CANDLES} candles")
+
+    engines = {}
+    for logic in (LogicGate.ALL, LogicGate.SEQUENCE):
+        engine = engines[logic] = register(strategies, logic)
+        started = time.perf_counter()
+        hits = 0
+        for context in frames:
+            for symbol in SYMBOLS:
+                hits += len(engine.evaluate_candle(symbol, "M1", context))
+        elapsed = (time.perf_counter() - started) / (CANDLES * len(SYMBOLS))
+        print(f"{logic.value:<9} {elapsed * 1000:8.2f} ms/candle por símbolo  {hits:>7} disparos")
+
+    engine = engines[LogicGate.SEQUENCE]
+    tables = [engine.predicate_table(symbol, "M1") for symbol in SYMBOLS]
+    state_bytes = sum(t._steps.itemsize * len(t._steps) + t._deadlines.itemsize * len(t._deadlines) for t in tables)
+    print(f"estado    {state_bytes / 1024:8.1f} KiB ({state_bytes / pairs:.0f} bytes por par)")
+
+    started = time.perf_counter()
+    payload = json.dumps(engine.export_state())
+    exported = time.perf_counter() - started
+    restarted = register(strategies, LogicGate.SEQUENCE)
+    started = time.perf_counter()
+    restored = restarted.import_state(json.loads(payload))
+    imported = time.perf_counter() - started
+    print(f"exportar  {exported * 1000:8.2f} ms ({len(payload) / 1024:.0f} KiB de JSON)")
+    print(f"restaurar {imported * 1000:8.2f} ms ({restored} sequências em andamento)")
+
+
+if __name__ == "__main__":
+    main()
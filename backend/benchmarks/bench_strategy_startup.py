@@ -0,0 +1,70 @@
+"""Tempo de inicialização com 50k estratégias persistidas: carga em lote do banco e registro no motor.
+
+Uso: ``python -m benchmarks.bench_strategy_startup`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.schemas.strategy import Operand, Operator, StrategyCondition, StrategyCreate
+from app.services.market_stream import MarketStreamService
+from app.services.strategy_repository import StrategyRepository
+from app.services.strategy_store import StrategyStore
+
+STRATEGIES = 50_000
+SYMBOLS = [f"SYM{index}" for index in range(500)]
+
+
+def _row(index: int, now: datetime) -> dict:
+    conditions = [
+        StrategyCondition(
+            left=Operand(source="indicator", path=f"ema.close.{5 + index % 20}"),
+            operator=Operator.CROSSES_ABOVE,
+            right=Operand(source="indicator", path="ema.close.50"),
+        ),
+        StrategyCondition(
+            left=Operand(source="indicator", path="rsi.close.14"),
+            operator=Operator.LESS_THAN,
+            right=Operand(source="number", value=30 + index % 10),
+        ),
+    ]
+    payload = StrategyCreate(
+        name=f"estrategia-{index}",
+        conditions=conditions,
+        symbols=[SYMBOLS[index % len(SYMBOLS)], SYMBOLS[(index * 7) % len(SYMBOLS)]],
+        is_active=index % 10 != 0,
+    )
+    return {**payload.model_dump(mode="json"), "created_at": now, "updated_at": now}
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite+aiosqlite:///{Path(directory) / 'strategies.sqlite3'}"
+        repository = StrategyRepository(url)
+        await repository.create_schema()
+        now = datetime.utcnow()
+        started = time.perf_counter()
+        await repository.insert_many(_row(index, now) for index in range(STRATEGIES))
+        print(f"{'seed (insert_many)':<28} {STRATEGIES:>7} estratégias  {time.perf_counter() - started:>6.2f} s")
+        await repository.close()
+
+        store = StrategyStore()
+        service = MarketStreamService()
+        started = time.perf_counter()
+        strategies = await store.open(StrategyRepository(url))
+        loaded = time.perf_counter()
+        active = await service.register_many(strategies)
+        registered = time.perf_counter()
+        await store.close()
+
+    print(f"{'carga (open)':<28} {len(strategies):>7} estratégias  {loaded - started:>6.2f} s")
+    print(f"{'registro (register_many)':<28} {active:>7} ativas       {registered - loaded:>6.2f} s")
+    print(f"{'inicialização total':<28} {'':>7}              {registered - started:>6.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Otimização de parâmetros sobre um ano de M1: grade em processos com séries compartilhadas
+versus um backtest independente por ponto.
+
+Uso: ``python -m benchmarks.bench_sweep`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+from app.schemas.backtest import ParameterRange
+from app.schemas.strategy import Strategy
+from app.services.backtest import run_backtest
+from app.services.sweep import ParameterSweep, rank, render
+from benchmarks.bench_backtest import YEAR_M1, build_history
+
+TEMPLATE = {
+    "name": "cruzamento {fast}/{slow} rsi<{level}",
+    "conditions": [
+        {
+            "left": {"source": "indicator", "path": "ema.close.{fast}"},
+            "operator": "crosses_above",
+            "right": {"source": "indicator", "path": "ema.close.{slow}"},
+        },
+        {
+            "left": {"source": "indicator", "path": "rsi.close.14"},
+            "operator": "lt",
+            "right": {"source": "number", "value": "{level}"},
+        },
+    ],
+}
+PARAMETERS = {
+    "fast": ParameterRange(start=5, stop=20, step=1),
+    "slow": ParameterRange(values=[30, 50, 100, 200]),
+    "level": ParameterRange(start=30, stop=70, step=5),
+}
+NAIVE_SAMPLE = 20
+
+
+def main() -> None:
+    history = build_history(YEAR_M1)
+    processes = os.cpu_count() or 1
+
+    started = time.perf_counter()
+    sweep = ParameterSweep(TEMPLATE, PARAMETERS, horizon=15, processes=processes)
+    first = None
+    points = []
+    for point in sweep.run(history):
+        first = first or time.perf_counter() - started
+        points.append(point)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'sweep':<22} {len(points):>5} pontos  {elapsed:>7.2f} s  primeiro resultado em {first:.2f} s  "
+        f"({processes} processos, {len(sweep.batches)} lotes)"
+    )
+
+    sample = points[:NAIVE_SAMPLE]
+    started = time.perf_counter()
+    for point in sample:
+        run_backtest(Strategy.model_validate(render(TEMPLATE, point.params)), history, horizons=(15,))
+    naive = (time.perf_counter() - started) / len(sample)
+    print(f"{'backtest por ponto':<22} {len(sample):>5} pontos  {naive * len(sample):>7.2f} s  (~{naive * len(points):.0f} s para a grade)")
+
+    best = rank(points, "mean_return", min_triggers=30)[0]
+    print(f"melhor: {best.params}  disparos={best.triggers}  retorno médio={best.mean_return:.2e}")
+
+
+if __name__ == "__main__":
+    main()
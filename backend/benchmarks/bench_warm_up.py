@@ -0,0 +1,50 @@
+"""Compara a ingestão de históricos candle a candle com o aquecimento vetorizado.
+
+Uso: ``python -m benchmarks.bench_warm_up`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.indicators.engine import Candle, IndicatorEngine
+
+
+def build_history(size: int, seed: int = 42) -> list[Candle]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    price = 1.0850
+    candles = []
+    for i in range(size):
+        close = max(price + rng.gauss(0, 0.0008), 0.5)
+        candles.append(
+            Candle(start + timedelta(minutes=i), price, max(price, close), min(price, close), close, 1.0)
+        )
+        price = close
+    return candles
+
+
+def timed(label: str, size: int, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {size:>8} candles  {elapsed * 1000:>10.1f} ms  {size / elapsed:>12,.0f} candles/s")
+    return elapsed
+
+
+def main() -> None:
+    history = build_history(100_000)
+
+    def loop(engine: IndicatorEngine, candles: list[Candle]) -> None:
+        for candle in candles:
+            engine.update("EURUSD", "M1", candle)
+
+    timed("update() em lote (streaming=False)", 5_000, lambda: loop(IndicatorEngine(streaming=False), history[:5_000]))
+    timed("update() streaming", len(history), lambda: loop(IndicatorEngine(), history))
+    timed("warm_up() vetorizado", len(history), lambda: IndicatorEngine().warm_up("EURUSD", "M1", history))
+    timed("compute_series()", len(history), lambda: IndicatorEngine().compute_series(history))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Fan-out de ticks para 1 000 WebSockets simulados.
+
+Compara a difusão original, o envio por tópico com serialização única e a
+conflação em frames ``market.ticks`` (um flush a cada 100 ticks, como se
+chegassem 1 000 ticks/s com intervalo de 100 ms).
+
+Uso: ``python -m benchmarks.bench_websocket_fanout`` a partir de ``backend/``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from app.services.websocket_manager import WebSocketManager
+
+CLIENTS = 1_000
+SYMBOLS = [f"SYM{index}" for index in range(10)]
+TICKS = 1_000
+
+
+class NullWebSocket:
+    def __init__(self) -> None:
+        self.frames = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.frames += 1
+
+    async def close(self) -> None:
+        pass
+
+
+def ticks() -> list[dict]:
+    return [
+        {"symbol": SYMBOLS[i % len(SYMBOLS)], "timeframe": "M1", "price": 1.0 + i / 1e4, "timestamp": "2024-01-01T00:00:00"}
+        for i in range(TICKS)
+    ]
+
+
+async def legacy(clients: list[NullWebSocket]) -> None:
+    # Cópia do ``_broadcast`` original: todos os clientes, um ``json.dumps`` e um envio sequencial por cliente
+    for payload in ticks():
+        for client in clients:
+            await client.send_text(json.dumps({"type": "market.tick", **payload}))
+
+
+async def indexed(manager: WebSocketManager) -> None:
+    for payload in ticks():
+        await manager.broadcast("market.tick", payload)
+
+
+async def conflated(manager: WebSocketManager) -> None:
+    forward = manager._forwarder("market.tick")
+    for index, payload in enumerate(ticks(), start=1):
+        await forward(payload)
+        if index % 100 == 0:
+            await manager.flush(now=index / 1_000)
+            await asyncio.sleep(0)
+
+
+async def subscribe_all(manager: WebSocketManager) -> list[NullWebSocket]:
+    clients = [NullWebSocket() for _ in range(CLIENTS)]
+    for index, client in enumerate(clients):
+        await manager.connect(client)
+        await manager.handle_message(
+            client, json.dumps({"action": "subscribe", "events": ["market.tick"], "symbols": [SYMBOLS[index % len(SYMBOLS)]]})
+        )
+    return clients
+
+
+async def main() -> None:
+    clients = [NullWebSocket() for _ in range(CLIENTS)]
+    started = time.perf_counter()
+    await legacy(clients)
+    elapsed = time.perf_counter() - started
+    frames = sum(client.frames for client in clients)
+    print(f"{'difusão original':<28} {TICKS} ticks  {elapsed * 1000:>9.1f} ms  {frames:>9} frames")
+
+    manager = WebSocketManager(send_timeout=1.0, tick_interval=0)
+    clients = await subscribe_all(manager)
+    started = time.perf_counter()
+    await indexed(manager)
+    elapsed = time.perf_counter() - started
+    frames = sum(client.frames for client in clients) - CLIENTS  # descontando a confirmação de inscrição
+    print(f"{'tópicos + serialização única':<28} {TICKS} ticks  {elapsed * 1000:>9.1f} ms  {frames:>9} frames")
+    await manager.close()
+
+    manager = WebSocketManager(send_timeout=1.0, tick_interval=0.1)
+    clients = await subscribe_all(manager)
+    await manager.close()  # flush manual, sem o laço periódico
+    started = time.perf_counter()
+    await conflated(manager)
+    elapsed = time.perf_counter() - started
+    frames = sum(client.frames for client in clients) - CLIENTS
+    print(f"{'conflação a cada 100 ms':<28} {TICKS} ticks  {elapsed * 1000:>9.1f} ms  {frames:>9} frames")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())